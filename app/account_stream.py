@@ -0,0 +1,369 @@
+"""
+Estado da conta via WebSocket privado da Bybit.
+
+Authenticates on ``/v5/private`` and subscribes to ``order``, ``execution``,
+``position`` and ``wallet``, keeping open orders, recent fills, positions
+and balances in memory. The reads return the same v5 shapes as the REST
+client, so the account endpoints serve them without an upstream request.
+
+The stream only carries changes, so the state is seeded from a REST
+snapshot after every (re)connect and compared with a fresh snapshot every
+``reconcile_interval`` seconds: differences are counted as drift and the
+REST view wins, except for entries the stream updated while the snapshot
+was in flight. Until the first snapshot after a connect, the reads return
+None and callers fall back to REST.
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+import websockets
+
+from app.async_bybit_client import async_bybit_client
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("order", "execution", "position", "wallet")
+
+# orderStatus values of orders still working on the book
+OPEN_STATUSES = {"New", "PartiallyFilled", "Untriggered"}
+
+# Fields compared by reconciliation; mark price, PnL and equity move on their own
+DRIFT_FIELDS = {
+    "orders": ("orderStatus", "qty", "price", "cumExecQty"),
+    "positions": ("side", "size", "avgPrice"),
+    "wallet": ("totalWalletBalance",),
+}
+
+
+def private_ws_url() -> str:
+    if settings.ws_private_url:
+        return settings.ws_private_url
+    if settings.mock_exchange_url:
+        return settings.mock_exchange_url.rstrip("/").replace("http", "ws", 1) + "/v5/private"
+    if settings.use_testnet:
+        return "wss://stream-testnet.bybit.com/v5/private"
+    if settings.use_demo:
+        return "wss://stream-demo.bybit.com/v5/private"
+    return "wss://stream.bybit.com/v5/private"
+
+
+def _ok(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {"retCode": 0, "retMsg": "OK", "result": result, "time": int(time.time() * 1000)}
+
+
+def _position_key(position: Dict[str, Any]) -> Tuple[str, int]:
+    return position.get("symbol", ""), int(position.get("positionIdx", 0))
+
+
+class AccountStream:
+    """Ordens, execuções, posições e saldo em memória alimentados pelo WebSocket privado"""
+
+    # 50 open orders per page
+    MAX_ORDER_PAGES = 20
+
+    def __init__(
+        self,
+        url: str,
+        client: Any,
+        api_key: str,
+        api_secret: str,
+        category: str = "linear",
+        account_type: str = "UNIFIED",
+        reconcile_interval: float = 60.0,
+        ping_interval: float = 20.0,
+        max_backoff: float = 30.0,
+        history_size: int = 500
+    ):
+        self.url = url
+        self.client = client
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.category = category
+        self.account_type = account_type
+        self.reconcile_interval = reconcile_interval
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        self.positions: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self.wallet: Dict[str, Dict[str, Any]] = {}
+        self.executions: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        # Called with every streamed order update (v5 order dict)
+        self.order_listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Monotonic time of the last streamed update per (kind, key), so a
+        # snapshot taken before it does not overwrite it
+        self._touched: Dict[Tuple[str, Hashable], float] = {}
+
+        self.connected = False
+        self.synced = False
+        self.reconnects = 0
+        self.messages = 0
+        # Frames that could not be parsed or applied; they are skipped, not fatal
+        self.errors = 0
+        self.reconciliations = 0
+        self.drift = {kind: 0 for kind in DRIFT_FIELDS}
+        self.last_reconcile: Optional[float] = None
+        # The last snapshot had more open orders than MAX_ORDER_PAGES; reads fall back to REST
+        self.orders_truncated = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def live(self) -> bool:
+        return self.connected and self.synced
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self.connected = False
+        self.synced = False
+
+    # Connection
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    await self._authenticate(ws)
+                    await ws.send(json.dumps({"op": "subscribe", "args": list(TOPICS)}))
+                    self.connected = True
+                    attempt = 0
+                    logger.info("Account stream connected to %s", self.url)
+                    background = [asyncio.create_task(self._ping(ws)), asyncio.create_task(self._reconcile_loop())]
+                    try:
+                        async for raw in ws:
+                            self.handle_message(raw)
+                    finally:
+                        for task in background:
+                            task.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Account stream error: %s", e)
+            self.connected = False
+            self.synced = False
+            self.reconnects += 1
+            delay = min(2 ** attempt, self.max_backoff)
+            attempt += 1
+            logger.info("Reconnecting account stream in %ss", delay)
+            await asyncio.sleep(delay)
+
+    async def _authenticate(self, ws) -> None:
+        expires = int((time.time() + 10) * 1000)
+        signature = hmac.new(self.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        await ws.send(json.dumps({"op": "auth", "args": [self.api_key, expires, signature]}))
+        while True:
+            reply = json.loads(await asyncio.wait_for(ws.recv(), 10))
+            if reply.get("op") == "auth":
+                if not reply.get("success"):
+                    raise ConnectionError(f"Account stream auth failed: {reply.get('ret_msg')}")
+                return
+
+    async def _ping(self, ws) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    async def _reconcile_loop(self) -> None:
+        # Seeds the state right after (re)connecting, then checks it periodically
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.warning("Account reconciliation failed: %s", e)
+            await asyncio.sleep(self.reconcile_interval if self.synced else min(self.reconcile_interval, 5.0))
+
+    # Stream updates
+
+    def handle_message(self, raw: str) -> None:
+        """Aplica uma mensagem do stream privado ao estado em memória"""
+        try:
+            self._dispatch(json.loads(raw))
+        except Exception:
+            # Reconciliation repairs whatever this frame would have changed
+            self.errors += 1
+            logger.exception("Skipping account stream message: %r", raw[:200])
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        topic = message.get("topic")
+        if not topic:
+            if message.get("op") == "subscribe" and not message.get("success", True):
+                logger.error("Account stream subscribe failed: %s", message.get("ret_msg"))
+            return
+
+        self.messages += 1
+        data = message.get("data", [])
+        now = time.monotonic()
+        if topic == "order":
+            self._on_orders(data, now)
+        elif topic == "execution":
+            self.executions.extend(e for e in data if e.get("category", self.category) == self.category)
+        elif topic == "position":
+            self._on_positions(data, now)
+        elif topic == "wallet":
+            for account in data:
+                account_type = account.get("accountType", self.account_type)
+                self.wallet[account_type] = account
+                self._touched[("wallet", account_type)] = now
+
+    def _on_orders(self, data: List[Dict[str, Any]], now: float) -> None:
+        for order in data:
+            if order.get("category", self.category) != self.category:
+                continue
+            order_id = order.get("orderId", "")
+            if order.get("orderStatus") in OPEN_STATUSES:
+                self.orders[order_id] = order
+            else:
+                self.orders.pop(order_id, None)
+            self._touched[("orders", order_id)] = now
+            for listener in self.order_listeners:
+                try:
+                    listener(order)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Order listener failed for %s", order_id)
+
+    def _on_positions(self, data: List[Dict[str, Any]], now: float) -> None:
+        for position in data:
+            if position.get("category", self.category) != self.category:
+                continue
+            # The stream calls the average price entryPrice; REST calls it avgPrice
+            if "avgPrice" not in position and "entryPrice" in position:
+                position = {**position, "avgPrice": position["entryPrice"]}
+            key = _position_key(position)
+            if float(position.get("size") or 0) > 0:
+                self.positions[key] = position
+            else:
+                self.positions.pop(key, None)
+            self._touched[("positions", key)] = now
+
+    # Reconciliation
+
+    async def reconcile(self) -> Dict[str, int]:
+        """Compara o estado com um snapshot REST e adota o REST onde divergirem"""
+        started = time.monotonic()
+        orders, positions, wallet = await asyncio.gather(
+            self._open_orders_snapshot(),
+            self.client.get_positions(category=self.category),
+            self.client.get_wallet_balance(account_type=self.account_type)
+        )
+        fresh = {
+            "orders": orders,
+            "positions": {
+                _position_key(p): p for p in positions.get("result", {}).get("list", []) if float(p.get("size") or 0) > 0
+            },
+            "wallet": {a.get("accountType", self.account_type): a for a in wallet.get("result", {}).get("list", [])},
+        }
+        # The first snapshot after a connect seeds the state; only later ones can drift
+        seeding = not self.synced
+        found = {}
+        self.orders_truncated = orders is None
+        for kind, snapshot in fresh.items():
+            if snapshot is None:
+                continue
+            found[kind] = self._merge(kind, getattr(self, kind), snapshot, started)
+            if not seeding:
+                self.drift[kind] += found[kind]
+        if not seeding and any(found.values()):
+            logger.warning("Account state drifted from REST: %s", found)
+        # Older stream updates are covered by this snapshot
+        self._touched = {key: at for key, at in self._touched.items() if at > started}
+
+        self.synced = True
+        self.reconciliations += 1
+        self.last_reconcile = time.time()
+        return found
+
+    async def _open_orders_snapshot(self) -> Optional[Dict[Hashable, Any]]:
+        """Todas as páginas de ordens abertas; None se passar de MAX_ORDER_PAGES"""
+        orders: Dict[Hashable, Any] = {}
+        cursor = None
+        for _ in range(self.MAX_ORDER_PAGES):
+            response = await self.client.get_open_orders(category=self.category, limit=50, cursor=cursor)
+            result = response.get("result", {})
+            orders.update((o["orderId"], o) for o in result.get("list", []))
+            cursor = result.get("nextPageCursor")
+            if not cursor:
+                return orders
+        # A truncated snapshot would evict every order past it as drift
+        logger.warning("More than %s pages of open orders, skipping order reconciliation", self.MAX_ORDER_PAGES)
+        return None
+
+    def _merge(self, kind: str, current: Dict[Hashable, Any], snapshot: Dict[Hashable, Any], started: float) -> int:
+        fields = DRIFT_FIELDS[kind]
+        drifted = 0
+        for key in set(current) | set(snapshot):
+            if self._touched.get((kind, key), 0.0) > started:
+                continue
+            ours, theirs = current.get(key), snapshot.get(key)
+            if ours is None or theirs is None or any(ours.get(f) != theirs.get(f) for f in fields):
+                drifted += 1
+            if theirs is None:
+                current.pop(key, None)
+            else:
+                current[key] = theirs
+        return drifted
+
+    # Reads, shaped like the REST responses; None while the state is not live
+
+    def get_open_orders(self, category: str = "linear", symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not self.live or category != self.category or self.orders_truncated:
+            return None
+        orders = [o for o in self.orders.values() if symbol is None or o.get("symbol") == symbol]
+        # Newest first, like /v5/order/realtime
+        orders.sort(key=lambda o: int(o.get("createdTime") or 0), reverse=True)
+        return _ok({"list": orders, "category": category})
+
+    def get_positions(self, category: str = "linear", symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if not self.live or category != self.category:
+            return None
+        positions = [p for p in self.positions.values() if symbol is None or p.get("symbol") == symbol]
+        return _ok({"list": positions, "category": category})
+
+    def get_wallet_balance(self, account_type: str = "UNIFIED") -> Optional[Dict[str, Any]]:
+        if not self.live or account_type not in self.wallet:
+            return None
+        return _ok({"list": [self.wallet[account_type]]})
+
+    def recent_executions(self, symbol: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        executions = [e for e in self.executions if symbol is None or e.get("symbol") == symbol]
+        return executions[-limit:] if limit > 0 else []
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "synced": self.synced,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "errors": self.errors,
+            "open_orders": len(self.orders),
+            "orders_truncated": self.orders_truncated,
+            "positions": len(self.positions),
+            "executions": len(self.executions),
+            "reconciliations": self.reconciliations,
+            "last_reconcile_age": round(time.time() - self.last_reconcile, 1) if self.last_reconcile else None,
+            "drift": self.drift
+        }
+
+
+account_stream = AccountStream(
+    private_ws_url(),
+    async_bybit_client,
+    settings.bybit_api_key,
+    settings.bybit_api_secret,
+    reconcile_interval=settings.account_reconcile_interval
+)
@@ -0,0 +1,324 @@
+import hashlib
+import hmac
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode
+
+import httpx
+
+from app.config import settings
+from app.metrics import upstream_errors, upstream_request_duration
+from app.rate_limiter import RATE_LIMIT_RET_CODE, RateLimiter, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+RECV_WINDOW = "5000"
+
+
+class BybitAPIError(Exception):
+    """A resposta chegou, mas com retCode != 0 (a exchange recusou o pedido)"""
+
+    def __init__(self, ret_code: Any, message: str):
+        super().__init__(f"Bybit API Error: {message}")
+        self.ret_code = ret_code
+        self.ret_msg = message
+
+
+class AsyncBybitClient:
+    """
+    Cliente assíncrono para a API v5 da Bybit.
+
+    Same methods as ``BybitClient`` but awaitable and built on a pooled
+    keep-alive ``httpx.AsyncClient`` with HMAC signing done locally, so many
+    requests share a few TCP/TLS connections on one event loop without
+    going through the thread pool.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        timeout: float = 10.0,
+        rate_limiter: Optional[RateLimiter] = None
+    ):
+        self.base_url = base_url or settings.base_url
+        self.api_key = settings.bybit_api_key if api_key is None else api_key
+        self.api_secret = settings.bybit_api_secret if api_secret is None else api_secret
+        self._limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self._timeout = timeout
+        self._http: Optional[httpx.AsyncClient] = None
+        self.rate_limiter = rate_limiter
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        # Created on first use so it binds to the running event loop
+        if self._http is None or self._http.is_closed:
+            self._http = httpx.AsyncClient(base_url=self.base_url, limits=self._limits, timeout=self._timeout)
+        return self._http
+
+    async def aclose(self) -> None:
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+
+    def _sign(self, timestamp: str, payload: str) -> Dict[str, str]:
+        if not self.api_key or not self.api_secret:
+            raise ValueError("API credentials not configured. Please check your .env file.")
+        prehash = timestamp + self.api_key + RECV_WINDOW + payload
+        signature = hmac.new(self.api_secret.encode(), prehash.encode(), hashlib.sha256).hexdigest()
+        return {
+            "X-BAPI-API-KEY": self.api_key,
+            "X-BAPI-TIMESTAMP": timestamp,
+            "X-BAPI-RECV-WINDOW": RECV_WINDOW,
+            "X-BAPI-SIGN": signature
+        }
+
+    def _handle_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        """Processa resposta da API e trata erros"""
+        if response.get('retCode') != 0:
+            error_msg = response.get('retMsg', 'Unknown error')
+            logger.error("API Error: %s", error_msg)
+            raise BybitAPIError(response.get('retCode'), error_msg)
+        return response
+
+    async def _get(self, path: str, params: Dict[str, Any], signed: bool = False) -> Dict[str, Any]:
+        # The signature covers the exact query string, so encode it once and send it as is
+        query = urlencode({k: v for k, v in params.items() if v is not None})
+        group = await self._acquire(path)
+        # Sign after waiting for the budget so the timestamp stays inside recv_window
+        headers = self._sign(str(int(time.time() * 1000)), query) if signed else {}
+        response = await self._send("GET", path, f"{path}?{query}" if query else path, headers=headers)
+        return self._process(group, path, response)
+
+    async def _post(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        body = json.dumps({k: v for k, v in params.items() if v is not None})
+        group = await self._acquire(path)
+        headers = self._sign(str(int(time.time() * 1000)), body)
+        headers["Content-Type"] = "application/json"
+        response = await self._send("POST", path, path, content=body, headers=headers)
+        return self._process(group, path, response)
+
+    async def _acquire(self, path: str) -> Optional[str]:
+        if self.rate_limiter is None:
+            return None
+        group = self.rate_limiter.group_for(path)
+        await self.rate_limiter.acquire(group)
+        return group
+
+    async def _send(self, method: str, path: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            return await self.http.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            upstream_errors.inc(path, type(e).__name__)
+            raise
+        finally:
+            upstream_request_duration.observe(time.perf_counter() - started, path)
+
+    def _process(self, group: Optional[str], path: str, response: httpx.Response) -> Dict[str, Any]:
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+        # An IP level limit comes back as HTTP 403/429 without a JSON body
+        ret_code = RATE_LIMIT_RET_CODE if response.status_code in (403, 429) else (data or {}).get("retCode")
+        if response.status_code >= 400:
+            upstream_errors.inc(path, f"http_{response.status_code}")
+        elif ret_code != 0:
+            upstream_errors.inc(path, f"ret_{ret_code}")
+        if group is not None:
+            self.rate_limiter.observe(group, response.headers, ret_code)
+        if ret_code == RATE_LIMIT_RET_CODE:
+            # Same answer the local limiter gives (429), not a generic API or HTTP error
+            raise RateLimitExceeded(f"Bybit rate limit hit (HTTP {response.status_code}, retCode {ret_code}) on {path}")
+        response.raise_for_status()
+        return self._handle_response(data)
+
+    async def get_server_time(self) -> Dict[str, Any]:
+        """Obtém tempo do servidor"""
+        try:
+            return await self._get("/v5/market/time", {})
+        except Exception as e:
+            logger.error("Error getting server time: %s", e)
+            raise
+
+    async def get_account_info(self) -> Dict[str, Any]:
+        """Obtém informações da conta"""
+        try:
+            return await self._get("/v5/account/info", {}, signed=True)
+        except Exception as e:
+            logger.error("Error getting account info: %s", e)
+            raise
+
+    async def get_wallet_balance(self, account_type: str = "UNIFIED", coin: Optional[str] = None) -> Dict[str, Any]:
+        """Obtém saldo da carteira"""
+        try:
+            return await self._get("/v5/account/wallet-balance", {"accountType": account_type, "coin": coin}, signed=True)
+        except Exception as e:
+            logger.error("Error getting wallet balance: %s", e)
+            raise
+
+    async def get_positions(self, category: str = "linear", symbol: Optional[str] = None, settle_coin: str = "USDT") -> Dict[str, Any]:
+        """Obtém posições abertas"""
+        try:
+            params = {"category": category}
+            if symbol:
+                params["symbol"] = symbol
+            else:
+                params["settleCoin"] = settle_coin
+            return await self._get("/v5/position/list", params, signed=True)
+        except Exception as e:
+            logger.error("Error getting positions: %s", e)
+            raise
+
+    async def get_tickers(self, category: str = "linear", symbol: Optional[str] = None) -> Dict[str, Any]:
+        """Obtém preços atuais (tickers)"""
+        try:
+            return await self._get("/v5/market/tickers", {"category": category, "symbol": symbol})
+        except Exception as e:
+            logger.error("Error getting tickers: %s", e)
+            raise
+
+    async def get_klines(
+        self,
+        category: str = "linear",
+        symbol: str = "BTCUSDT",
+        interval: str = "60",
+        limit: int = 200,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Obtém dados de candlestick (klines), opcionalmente entre start/end (ms)"""
+        try:
+            params = {
+                "category": category,
+                "symbol": symbol,
+                "interval": interval,
+                "limit": limit,
+                "start": start,
+                "end": end
+            }
+            return await self._get("/v5/market/kline", params)
+        except Exception as e:
+            logger.error("Error getting klines: %s", e)
+            raise
+
+    async def place_order(
+        self,
+        category: str,
+        symbol: str,
+        side: str,
+        order_type: str,
+        qty: str,
+        price: Optional[str] = None,
+        time_in_force: str = "GTC",
+        position_idx: int = 0,
+        order_link_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Cria uma ordem"""
+        try:
+            params = {
+                "category": category,
+                "symbol": symbol,
+                "side": side,
+                "orderType": order_type,
+                "qty": qty,
+                "timeInForce": time_in_force,
+                "positionIdx": position_idx,
+                "orderLinkId": order_link_id
+            }
+
+            if price and order_type == "Limit":
+                params["price"] = price
+
+            return await self._post("/v5/order/create", params)
+        except Exception as e:
+            logger.error("Error placing order: %s", e)
+            raise
+
+    async def get_open_orders(
+        self,
+        category: str = "linear",
+        symbol: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Lista ordens abertas (a Bybit devolve 20 por página se `limit` não for
+        passado, máximo 50); a próxima página vem de ``result.nextPageCursor``.
+        """
+        try:
+            params = {"category": category, "symbol": symbol, "limit": limit, "cursor": cursor}
+            if not symbol:
+                # Linear queries without a symbol must be scoped by settleCoin
+                params["settleCoin"] = "USDT"
+            return await self._get("/v5/order/realtime", params, signed=True)
+        except Exception as e:
+            logger.error("Error getting open orders: %s", e)
+            raise
+
+    async def cancel_order(self, category: str, symbol: str, order_id: str) -> Dict[str, Any]:
+        """Cancela uma ordem"""
+        try:
+            return await self._post("/v5/order/cancel", {"category": category, "symbol": symbol, "orderId": order_id})
+        except Exception as e:
+            logger.error("Error cancelling order: %s", e)
+            raise
+
+    async def amend_order(
+        self,
+        category: str,
+        symbol: str,
+        order_id: str,
+        qty: Optional[str] = None,
+        price: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Altera quantidade e/ou preço de uma ordem aberta"""
+        try:
+            params = {"category": category, "symbol": symbol, "orderId": order_id, "qty": qty, "price": price}
+            return await self._post("/v5/order/amend", params)
+        except Exception as e:
+            logger.error("Error amending order: %s", e)
+            raise
+
+    # Batch endpoints: one request for many orders; per-order outcomes are in
+    # result.list and retExtInfo.list, in request order
+
+    async def place_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Cria várias ordens (parâmetros v5 de /v5/order/create) numa requisição"""
+        try:
+            return await self._post("/v5/order/create-batch", {"category": category, "request": orders})
+        except Exception as e:
+            logger.error("Error placing order batch: %s", e)
+            raise
+
+    async def amend_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return await self._post("/v5/order/amend-batch", {"category": category, "request": orders})
+        except Exception as e:
+            logger.error("Error amending order batch: %s", e)
+            raise
+
+    async def cancel_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        try:
+            return await self._post("/v5/order/cancel-batch", {"category": category, "request": orders})
+        except Exception as e:
+            logger.error("Error cancelling order batch: %s", e)
+            raise
+
+
+async_bybit_client = AsyncBybitClient(
+    rate_limiter=RateLimiter(
+        {
+            "market": settings.rate_limit_market,
+            "order": settings.rate_limit_order,
+            "account": settings.rate_limit_account
+        },
+        max_wait=settings.rate_limit_max_wait
+    )
+)
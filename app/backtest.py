@@ -0,0 +1,236 @@
+"""
+Backtest vetorizado da estratégia SMA.
+
+Signals, positions, fees, equity, drawdown and the trade list are computed
+with whole-array NumPy operations, mirroring ``SimpleSMA.generate_signal``:
+a BUY at bar ``i`` is a fast/slow crossover between bars ``i - 1`` and ``i``.
+Orders are filled at the close of the signal bar, so the position earns the
+return of bar ``i + 1`` onwards.
+"""
+import argparse
+import csv
+import json
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from app.candles import COLUMNS as CANDLE_COLUMNS, CandleSeries
+from app.indicators import sma
+
+
+def crossover_signals(closes: np.ndarray, fast_period: int, slow_period: int) -> np.ndarray:
+    """+1 on BUY crossovers, -1 on SELL crossovers, 0 otherwise"""
+    fast = sma(closes, fast_period)
+    slow = sma(closes, slow_period)
+    signals = np.zeros(len(closes), dtype=np.int8)
+    if len(closes) < 2:
+        return signals
+    prev_fast, prev_slow = fast[:-1], slow[:-1]
+    cur_fast, cur_slow = fast[1:], slow[1:]
+    # Comparisons with NaN are False, so the warm-up period never signals
+    buy = (prev_fast <= prev_slow) & (cur_fast > cur_slow)
+    sell = (prev_fast >= prev_slow) & (cur_fast < cur_slow)
+    signals[1:][buy] = 1
+    signals[1:][sell] = -1
+    return signals
+
+
+class BacktestResult:
+    """Arrays por candle e lista de trades de um backtest"""
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        closes: np.ndarray,
+        signals: np.ndarray,
+        positions: np.ndarray,
+        returns: np.ndarray,
+        equity: np.ndarray,
+        drawdown: np.ndarray,
+        trades: Dict[str, np.ndarray],
+        fees_paid: float,
+        initial_equity: float
+    ):
+        self.timestamps = timestamps
+        self.closes = closes
+        self.signals = signals
+        self.positions = positions
+        self.returns = returns
+        self.equity = equity
+        self.drawdown = drawdown
+        self.trades = trades
+        self.fees_paid = fees_paid
+        self.initial_equity = initial_equity
+
+    def summary(self) -> Dict[str, Any]:
+        pnl = self.trades["pnl"]
+        n_trades = len(pnl)
+        initial = self.initial_equity
+        final = float(self.equity[-1]) if len(self.equity) else initial
+        return {
+            "bars": int(len(self.closes)),
+            "trades": n_trades,
+            "win_rate": float((pnl > 0).mean()) if n_trades else 0.0,
+            "initial_equity": initial,
+            "final_equity": final,
+            "total_return": final / initial - 1 if initial else 0.0,
+            "total_pnl": final - initial,
+            "max_drawdown": float(-self.drawdown.min()) if len(self.drawdown) else 0.0,
+            "fees_paid": self.fees_paid,
+        }
+
+    def trade_list(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Últimos `limit` trades como dicts"""
+        t = self.trades
+        n = len(t["pnl"])
+        start = 0 if limit is None else max(0, n - limit)
+        return [
+            {
+                "side": "Buy" if t["side"][i] > 0 else "Sell",
+                "entry_time": int(t["entry_time"][i]),
+                "exit_time": int(t["exit_time"][i]),
+                "entry_price": float(t["entry_price"][i]),
+                "exit_price": float(t["exit_price"][i]),
+                "return": float(t["return"][i]),
+                "pnl": float(t["pnl"][i]),
+            }
+            for i in range(start, n)
+        ]
+
+
+def run_backtest(
+    timestamps: np.ndarray,
+    closes: np.ndarray,
+    fast_period: int = 9,
+    slow_period: int = 21,
+    fee_rate: float = 0.00055,
+    slippage: float = 0.0,
+    allow_short: bool = True,
+    initial_equity: float = 10_000.0
+) -> BacktestResult:
+    """
+    Runs the SMA crossover over ``closes`` (oldest first).
+
+    ``fee_rate`` and ``slippage`` are fractions of notional charged on every
+    change of position (a reversal pays twice). With ``allow_short=False``
+    SELL signals only close the long.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    closes = np.asarray(closes, dtype=np.float64)
+    n = len(closes)
+
+    signals = crossover_signals(closes, fast_period, slow_period)
+    targets = signals.astype(np.float64) if allow_short else np.where(signals > 0, 1.0, 0.0)
+
+    # Forward-fill the last signal: index of the latest non-zero signal at every bar
+    idx = np.where(signals != 0, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    positions = np.where(signals[idx] != 0, targets[idx], 0.0)
+
+    bar_returns = np.zeros(n)
+    if n > 1:
+        bar_returns[1:] = closes[1:] / closes[:-1] - 1
+    held = np.zeros(n)
+    held[1:] = positions[:-1]
+    turnover = np.abs(np.diff(positions, prepend=0.0))
+    cost = turnover * (fee_rate + slippage)
+
+    returns = held * bar_returns - cost
+    equity = initial_equity * np.cumprod(1 + returns)
+    peak = np.maximum.accumulate(equity) if n else equity
+    drawdown = equity / peak - 1 if n else equity
+    equity_before = np.empty(n)
+    if n:
+        equity_before[0] = initial_equity
+        equity_before[1:] = equity[:-1]
+    fees_paid = float((equity_before * cost).sum())
+
+    trades = _trades(timestamps, closes, positions, equity, fee_rate + slippage)
+    return BacktestResult(
+        timestamps, closes, signals, positions, returns, equity, drawdown, trades, fees_paid, initial_equity
+    )
+
+
+def _trades(
+    timestamps: np.ndarray, closes: np.ndarray, positions: np.ndarray, equity: np.ndarray, cost: float
+) -> Dict[str, np.ndarray]:
+    n = len(positions)
+    changes = np.flatnonzero(np.diff(positions, prepend=0.0))
+    # Every change closes the running trade and may open a new one
+    entries = changes[positions[changes] != 0]
+    exits = np.searchsorted(changes, entries, side="right")
+    # A trade still open on the last bar is marked to its close
+    closed = exits < len(changes)
+    exit_idx = np.where(closed, changes[np.minimum(exits, len(changes) - 1)], n - 1)
+
+    side = positions[entries]
+    entry_price = closes[entries]
+    exit_price = closes[exit_idx]
+    gross = side * (exit_price / entry_price - 1)
+    # The open one has only paid its entry, like the equity curve
+    net = gross - np.where(closed, 2 * cost, cost)
+    entry_equity = equity[entries]
+    return {
+        "side": side,
+        "entry_time": timestamps[entries],
+        "exit_time": timestamps[exit_idx],
+        "entry_price": entry_price,
+        "exit_price": exit_price,
+        "return": net,
+        "pnl": net * entry_equity,
+    }
+
+
+def load_csv(path: str) -> CandleSeries:
+    """Lê candles de um CSV com cabeçalho timestamp,open,high,low,close,volume"""
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        return CandleSeries.empty()
+    return CandleSeries.from_columns({
+        column: np.array([r[column] for r in rows]).astype(np.int64 if column == "timestamp" else np.float64)
+        for column in CANDLE_COLUMNS
+    }).validate()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Backtest da estratégia SMA")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="60")
+    parser.add_argument("--csv", help="CSV com candles; por padrão usa o arquivo de candles")
+    parser.add_argument("--archive-dir")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--fast", type=int, default=9)
+    parser.add_argument("--slow", type=int, default=21)
+    parser.add_argument("--fee", type=float, default=0.00055)
+    parser.add_argument("--slippage", type=float, default=0.0)
+    parser.add_argument("--long-only", action="store_true")
+    parser.add_argument("--trades", type=int, default=0, help="Quantidade de trades a exibir")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        candles = load_csv(args.csv)
+    else:
+        from app.candle_archive import CandleArchive
+        from app.config import settings
+        archive = CandleArchive(args.archive_dir or settings.candle_archive_dir or "data/candles")
+        candles = archive.range(args.symbol, args.interval, args.start, args.end)
+
+    result = run_backtest(
+        candles.timestamp,
+        candles.close,
+        fast_period=args.fast,
+        slow_period=args.slow,
+        fee_rate=args.fee,
+        slippage=args.slippage,
+        allow_short=not args.long_only
+    )
+    output = {"summary": result.summary()}
+    if args.trades:
+        output["trades"] = result.trade_list(args.trades)
+    print(json.dumps(output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
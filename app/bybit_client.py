@@ -1,5 +1,4 @@
 from typing import Optional, Dict, Any, List
-from pybit.unified_trading import HTTP
 from app.config import settings
 import logging
 
@@ -12,6 +11,9 @@ class BybitClient:
     
     def __init__(self):
         """Inicializa o cliente Bybit"""
+        # pybit (and its requests session) is only imported once a client is built
+        from pybit.unified_trading import HTTP
+
         try:
             if not settings.bybit_api_key or not settings.bybit_api_secret:
                 raise ValueError("API credentials not configured. Please check your .env file.")
@@ -40,14 +42,14 @@ class BybitClient:
                 logger.info("⚠️  Connected to Bybit MAINNET")
                 
         except Exception as e:
-            logger.error(f"Failed to initialize Bybit client: {e}")
+            logger.error("Failed to initialize Bybit client: %s", e)
             raise
 
     def _handle_response(self, response: Dict[str, Any]) -> Dict[str, Any]:
         """Processa resposta da API e trata erros"""
         if response.get('retCode') != 0:
             error_msg = response.get('retMsg', 'Unknown error')
-            logger.error(f"API Error: {error_msg}")
+            logger.error("API Error: %s", error_msg)
             raise Exception(f"Bybit API Error: {error_msg}")
         return response
 
@@ -57,7 +59,7 @@ class BybitClient:
             response = self.client.get_server_time()
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting server time: {e}")
+            logger.error("Error getting server time: %s", e)
             raise
 
     def get_account_info(self) -> Dict[str, Any]:
@@ -66,7 +68,7 @@ class BybitClient:
             response = self.client.get_account_info()
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting account info: {e}")
+            logger.error("Error getting account info: %s", e)
             raise
 
     def get_wallet_balance(self, account_type: str = "UNIFIED", coin: Optional[str] = None) -> Dict[str, Any]:
@@ -78,7 +80,7 @@ class BybitClient:
             response = self.client.get_wallet_balance(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting wallet balance: {e}")
+            logger.error("Error getting wallet balance: %s", e)
             raise
 
     def get_positions(self, category: str = "linear", symbol: Optional[str] = None, settle_coin: str = "USDT") -> Dict[str, Any]:
@@ -92,7 +94,7 @@ class BybitClient:
             response = self.client.get_positions(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting positions: {e}")
+            logger.error("Error getting positions: %s", e)
             raise
 
     def get_tickers(self, category: str = "linear", symbol: Optional[str] = None) -> Dict[str, Any]:
@@ -104,7 +106,7 @@ class BybitClient:
             response = self.client.get_tickers(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting tickers: {e}")
+            logger.error("Error getting tickers: %s", e)
             raise
 
     def get_klines(
@@ -112,19 +114,26 @@ class BybitClient:
         category: str = "linear",
         symbol: str = "BTCUSDT",
         interval: str = "60",
-        limit: int = 200
+        limit: int = 200,
+        start: Optional[int] = None,
+        end: Optional[int] = None
     ) -> Dict[str, Any]:
-        """Obtém dados de candlestick (klines)"""
+        """Obtém dados de candlestick (klines), opcionalmente entre start/end (ms)"""
         try:
-            response = self.client.get_kline(
-                category=category,
-                symbol=symbol,
-                interval=interval,
-                limit=limit
-            )
+            params = {
+                "category": category,
+                "symbol": symbol,
+                "interval": interval,
+                "limit": limit
+            }
+            if start is not None:
+                params["start"] = start
+            if end is not None:
+                params["end"] = end
+            response = self.client.get_kline(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting klines: {e}")
+            logger.error("Error getting klines: %s", e)
             raise
 
     def place_order(
@@ -156,7 +165,7 @@ class BybitClient:
             response = self.client.place_order(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error placing order: {e}")
+            logger.error("Error placing order: %s", e)
             raise
 
     def get_open_orders(self, category: str = "linear", symbol: Optional[str] = None) -> Dict[str, Any]:
@@ -168,7 +177,7 @@ class BybitClient:
             response = self.client.get_open_orders(**params)
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error getting open orders: {e}")
+            logger.error("Error getting open orders: %s", e)
             raise
 
     def cancel_order(self, category: str, symbol: str, order_id: str) -> Dict[str, Any]:
@@ -181,8 +190,23 @@ class BybitClient:
             )
             return self._handle_response(response)
         except Exception as e:
-            logger.error(f"Error cancelling order: {e}")
+            logger.error("Error cancelling order: %s", e)
             raise
 
 
-bybit_client = BybitClient()
\ No newline at end of file
+_client: Optional[BybitClient] = None
+
+
+def get_bybit_client() -> BybitClient:
+    """Cria o cliente no primeiro uso; sem credenciais o erro aparece só aí"""
+    global _client
+    if _client is None:
+        _client = BybitClient()
+    return _client
+
+
+def __getattr__(name: str) -> Any:
+    # Keeps `from app.bybit_client import bybit_client` working without building it at import
+    if name == "bybit_client":
+        return get_bybit_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,168 @@
+"""
+Agregação de candles de timeframes maiores a partir do candle base (1m).
+
+Higher-timeframe candles are resampled from closed base candles with
+whole-array NumPy reductions: buckets are aligned to multiples of the
+interval since the epoch (UTC midnight for "D", Monday for "W"), the open is
+the first base open, the close the last base close, high/low the extremes
+and volume the sum. A bucket is only kept once every base candle inside it
+is present, so holes in the base data never produce a wrong candle.
+"""
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.candles import CandleSeries
+
+# Bybit weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * 86_400_000
+
+
+def interval_offset(interval: str) -> int:
+    return WEEK_OFFSET_MS if interval == "W" else 0
+
+
+def bucket_start(timestamp: int, step: int, offset: int = 0) -> int:
+    return (timestamp - offset) // step * step + offset
+
+
+def resample(series: CandleSeries, step: int, offset: int = 0) -> Tuple[CandleSeries, np.ndarray]:
+    """Candles agregados de ``series`` e quantos candles base cada um contém"""
+    if not len(series):
+        return CandleSeries.empty(), np.empty(0, dtype=np.int64)
+    buckets = (series.timestamp - offset) // step * step + offset
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(series)] - 1
+    candles = CandleSeries(
+        buckets[starts],
+        series.open[starts],
+        np.maximum.reduceat(series.high, starts),
+        np.minimum.reduceat(series.low, starts),
+        series.close[ends],
+        np.add.reduceat(series.volume, starts)
+    )
+    return candles, ends - starts + 1
+
+
+class CandleAggregator:
+    """
+    Closed higher-timeframe candles per (category, symbol, interval), folded
+    incrementally from the base interval: each ``fold`` only resamples base
+    candles from the first bucket not yet complete, and the aggregated
+    history outlives the base window it was built from.
+    """
+
+    def __init__(self, base_interval: str = "1", base_step: int = 60_000, max_candles: int = 1000):
+        self.base_interval = base_interval
+        self.base_step = base_step
+        self.max_candles = max_candles
+        self._closed: Dict[Tuple[str, str, str], CandleSeries] = {}
+        self._steps: Dict[Tuple[str, str, str], int] = {}
+        self.served = 0
+
+    def supports(self, interval: str, step: Optional[int]) -> bool:
+        return (
+            step is not None
+            and interval != self.base_interval
+            and step > self.base_step
+            and step % self.base_step == 0
+        )
+
+    def fold(self, category: str, symbol: str, interval: str, step: int, base: CandleSeries) -> None:
+        """Incorpora candles base fechados aos candles agregados de `interval`"""
+        key = (category, symbol, interval)
+        self._steps[key] = step
+        closed = self._closed.get(key, CandleSeries.empty())
+        if len(closed):
+            base = base.between(int(closed.timestamp[-1]) + step)
+        if not len(base):
+            return
+        candles, counts = resample(base, step, interval_offset(interval))
+        closed = closed.merge(candles[counts == step // self.base_step])
+        if len(closed) > self.max_candles:
+            closed = closed[-self.max_candles:].copy()
+        self._closed[key] = closed
+
+    def fold_all(self, category: str, symbol: str, base: CandleSeries) -> None:
+        """Chamado quando candles base fecham; atualiza todos os intervalos já pedidos"""
+        for key, step in list(self._steps.items()):
+            if key[0] == category and key[1] == symbol:
+                self.fold(category, symbol, key[2], step, base)
+
+    def covers(
+        self,
+        category: str,
+        symbol: str,
+        interval: str,
+        step: int,
+        base: CandleSeries,
+        now: int,
+        limit: int,
+        max_base: int
+    ) -> bool:
+        """
+        Whether ``window`` can serve ``limit`` candles once the base entry is
+        synced, judged only from data already held: the aggregated history
+        must be contiguous over its part of the window and the base candles
+        (at most ``max_base`` of them, ending now) must reach back to the
+        first bucket it lacks.
+        """
+        if not len(base):
+            return False
+        self.fold(category, symbol, interval, step, base)
+        current = bucket_start(now, step, interval_offset(interval))
+        start = current - (limit - 1) * step
+        closed = self._closed.get((category, symbol, interval), CandleSeries.empty()).between(start)
+        if len(closed) and (int(closed.timestamp[0]) != start or (np.diff(closed.timestamp) != step).any()):
+            return False
+        needed_from = int(closed.timestamp[-1]) + step if len(closed) else start
+        earliest = max(int(base.timestamp[0]), bucket_start(now, self.base_step) - max_base * self.base_step)
+        return needed_from >= earliest
+
+    def window(
+        self,
+        category: str,
+        symbol: str,
+        interval: str,
+        step: int,
+        base: CandleSeries,
+        base_forming: Optional[CandleSeries],
+        now: int,
+        limit: int
+    ) -> Optional[CandleSeries]:
+        """
+        The last ``limit`` candles (the forming one last) when the base data
+        covers them without holes, otherwise None so the caller downloads
+        the interval itself.
+        """
+        self.fold(category, symbol, interval, step, base)
+        if base_forming is None or not len(base_forming):
+            return None
+        forming_ts = int(base_forming.timestamp[-1])
+        if forming_ts != bucket_start(now, self.base_step):
+            return None
+
+        offset = interval_offset(interval)
+        current = bucket_start(now, step, offset)
+        part = CandleSeries.concat([base.between(current), base_forming[-1:]])
+        if int(part.timestamp[0]) != current or len(part) != (forming_ts - current) // self.base_step + 1:
+            return None
+        forming, _ = resample(part, step, offset)
+
+        if limit <= 1:
+            self.served += 1
+            return forming
+        closed = self._closed.get((category, symbol, interval), CandleSeries.empty())[-(limit - 1):]
+        if (
+            len(closed) < limit - 1
+            or int(closed.timestamp[-1]) != current - step
+            or (np.diff(closed.timestamp) != step).any()
+        ):
+            return None
+        self.served += 1
+        return CandleSeries.concat([closed, forming])
+
+    def invalidate(self, category: Optional[str] = None, symbol: Optional[str] = None) -> None:
+        for store in (self._closed, self._steps):
+            for key in [k for k in store if (category is None or k[0] == category) and (symbol is None or k[1] == symbol)]:
+                del store[key]
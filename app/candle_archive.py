@@ -0,0 +1,191 @@
+"""
+Arquivo persistente de candles em colunas NumPy.
+
+Each (symbol, interval) is a directory with one append-only file per column
+(``timestamp.i8``, ``open.f8``, ...). Files are raw little-endian arrays, so
+reads are ``np.memmap`` views and range slices never copy.
+"""
+import argparse
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.candles import CandleSeries
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("timestamp", "<i8"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+)
+
+
+def _file_name(column: str, dtype: str) -> str:
+    return f"{column}.{dtype[1:]}"
+
+
+class CandleArchive:
+    """Candles fechados por (symbol, interval) em arquivos colunares mapeados em memória"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._maps: Dict[Tuple[str, str], Tuple[int, CandleSeries]] = {}
+
+    def _dir(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _path(self, symbol: str, interval: str, column: str, dtype: str) -> str:
+        return os.path.join(self._dir(symbol, interval), _file_name(column, dtype))
+
+    def _length(self, symbol: str, interval: str) -> int:
+        """Rows present in every column; a torn append leaves some columns longer"""
+        lengths = []
+        for column, dtype in COLUMNS:
+            path = self._path(symbol, interval, column, dtype)
+            size = os.path.getsize(path) if os.path.exists(path) else 0
+            lengths.append(size // np.dtype(dtype).itemsize)
+        return min(lengths)
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """Lista os pares (symbol, interval) arquivados"""
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(
+            (symbol, interval)
+            for symbol in os.listdir(self.root)
+            if os.path.isdir(os.path.join(self.root, symbol))
+            for interval in os.listdir(os.path.join(self.root, symbol))
+        )
+
+    def series(self, symbol: str, interval: str) -> CandleSeries:
+        """Read-only memory mapped views of every column"""
+        key = (symbol.upper(), interval)
+        n = self._length(symbol, interval)
+        cached = self._maps.get(key)
+        if cached is not None and cached[0] == n:
+            return cached[1]
+
+        if n == 0:
+            candles = CandleSeries.empty()
+        else:
+            candles = CandleSeries.from_columns({
+                column: np.memmap(self._path(symbol, interval, column, dtype), dtype=dtype, mode="r", shape=(n,))
+                for column, dtype in COLUMNS
+            })
+        self._maps[key] = (n, candles)
+        return candles
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        ts = self.series(symbol, interval).timestamp
+        return int(ts[-1]) if len(ts) else None
+
+    def range(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> CandleSeries:
+        """Candles with start <= timestamp <= end (ms), as zero-copy slices"""
+        return self.series(symbol, interval).between(start, end)
+
+    def append(self, symbol: str, interval: str, klines: CandleSeries) -> int:
+        """
+        Appends closed candles (oldest first). Candles not newer than the
+        last archived one are skipped so replays of an overlapping window are
+        harmless. Returns rows written.
+        """
+        with self._lock:
+            last = self.last_timestamp(symbol, interval)
+            rows = klines if last is None else klines[klines.timestamp > last]
+            if not len(rows):
+                return 0
+
+            n = self._length(symbol, interval)
+            os.makedirs(self._dir(symbol, interval), exist_ok=True)
+            for column, dtype in COLUMNS:
+                values = np.ascontiguousarray(getattr(rows, column), dtype=dtype)
+                with open(self._path(symbol, interval, column, dtype), "ab") as f:
+                    # Drop the tail of a torn append so every column continues at row n
+                    f.truncate(n * np.dtype(dtype).itemsize)
+                    f.write(values.tobytes())
+            return len(rows)
+
+    def compact(self, symbol: str, interval: str) -> Dict[str, int]:
+        """
+        Repairs one series: truncates torn appends, sorts by timestamp and
+        drops duplicates (last write wins). Columns are rewritten atomically.
+        """
+        with self._lock:
+            n = self._length(symbol, interval)
+            cols = {
+                column: np.fromfile(self._path(symbol, interval, column, dtype), dtype=dtype, count=n)
+                if n else np.empty(0, dtype=dtype)
+                for column, dtype in COLUMNS
+            }
+            before = n
+            torn = sum(
+                os.path.getsize(self._path(symbol, interval, column, dtype)) // np.dtype(dtype).itemsize - n
+                for column, dtype in COLUMNS
+                if os.path.exists(self._path(symbol, interval, column, dtype))
+            )
+
+            # Stable sort keeps write order among equal timestamps; keep the last one
+            order = np.argsort(cols["timestamp"], kind="stable")
+            ts = cols["timestamp"][order]
+            keep = np.ones(len(ts), dtype=bool)
+            if len(ts) > 1:
+                keep[:-1] = ts[:-1] != ts[1:]
+            order = order[keep]
+
+            # Drop mappings before replacing the files underneath them
+            self._maps.pop((symbol.upper(), interval), None)
+            os.makedirs(self._dir(symbol, interval), exist_ok=True)
+            for column, dtype in COLUMNS:
+                path = self._path(symbol, interval, column, dtype)
+                tmp = path + ".tmp"
+                cols[column][order].astype(dtype).tofile(tmp)
+                os.replace(tmp, path)
+
+            return {"rows": int(len(order)), "duplicates": int(before - len(order)), "torn": int(torn)}
+
+
+candle_archive: Optional[CandleArchive] = (
+    CandleArchive(settings.candle_archive_dir) if settings.candle_archive_dir else None
+)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Manutenção do arquivo de candles")
+    parser.add_argument("command", choices=["info", "compact"])
+    parser.add_argument("--dir", default=settings.candle_archive_dir or "data/candles")
+    parser.add_argument("--symbol")
+    parser.add_argument("--interval")
+    args = parser.parse_args(argv)
+
+    archive = CandleArchive(args.dir)
+    keys = [
+        (s, i) for s, i in archive.keys()
+        if (args.symbol is None or s == args.symbol.upper()) and (args.interval is None or i == args.interval)
+    ]
+    for symbol, interval in keys:
+        if args.command == "compact":
+            print(f"{symbol} {interval}: {archive.compact(symbol, interval)}")
+        else:
+            ts = archive.series(symbol, interval).timestamp
+            first = int(ts[0]) if len(ts) else None
+            last = int(ts[-1]) if len(ts) else None
+            print(f"{symbol} {interval}: {len(ts)} candles, {first} -> {last}")
+
+
+if __name__ == "__main__":
+    main()
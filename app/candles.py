@@ -0,0 +1,125 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+COLUMNS = ("timestamp", "open", "high", "low", "close", "volume")
+PRICE_COLUMNS = ("open", "high", "low", "close")
+
+
+class CandleSeries:
+    """
+    Candles (oldest first) as contiguous NumPy columns: ``timestamp`` int64
+    in ms, OHLCV float64. Slices are views; validation runs once per batch in
+    the constructors that take external data instead of once per candle.
+    """
+
+    __slots__ = COLUMNS
+
+    def __init__(
+        self,
+        timestamp: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ):
+        self.timestamp = np.asarray(timestamp, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def empty(cls) -> "CandleSeries":
+        return cls(*(np.empty(0, dtype=np.int64 if c == "timestamp" else np.float64) for c in COLUMNS))
+
+    @classmethod
+    def from_bybit(cls, raw: Sequence[Sequence[str]]) -> "CandleSeries":
+        """Lista `result.list` da Bybit (mais recente primeiro, strings) -> série validada"""
+        if not raw:
+            return cls.empty()
+        table = np.array(raw)
+        if table.ndim != 2 or table.shape[1] < 6:
+            raise ValueError(f"Unexpected kline payload shape {table.shape}")
+        table = table[::-1]
+        values = table[:, 1:6].astype(np.float64)
+        return cls(
+            table[:, 0].astype(np.int64),
+            values[:, 0], values[:, 1], values[:, 2], values[:, 3], values[:, 4]
+        ).validate()
+
+    @classmethod
+    def from_dicts(cls, rows: Iterable[Mapping[str, Any]]) -> "CandleSeries":
+        rows = list(rows)
+        return cls(*(
+            np.fromiter((r[c] for r in rows), dtype=np.int64 if c == "timestamp" else np.float64, count=len(rows))
+            for c in COLUMNS
+        )).validate()
+
+    @classmethod
+    def from_columns(cls, columns: Mapping[str, np.ndarray]) -> "CandleSeries":
+        """Sem cópia quando as colunas já têm o dtype certo (ex: memmap do arquivo)"""
+        return cls(*(columns[c] for c in COLUMNS))
+
+    @classmethod
+    def concat(cls, parts: Sequence["CandleSeries"]) -> "CandleSeries":
+        parts = [p for p in parts if len(p)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(p, c) for p in parts]) for c in COLUMNS))
+
+    def validate(self) -> "CandleSeries":
+        n = len(self.timestamp)
+        if any(len(getattr(self, c)) != n for c in COLUMNS):
+            raise ValueError("Candle columns have different lengths")
+        if n > 1 and not (np.diff(self.timestamp) > 0).all():
+            raise ValueError("Candle timestamps must be strictly increasing")
+        if not all(np.isfinite(getattr(self, c)).all() for c in PRICE_COLUMNS + ("volume",)):
+            raise ValueError("Candle values must be finite")
+        return self
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __getitem__(self, index: Union[int, slice, np.ndarray]) -> Union["CandleSeries", Dict[str, Any]]:
+        if isinstance(index, (int, np.integer)):
+            return {c: getattr(self, c)[index].item() for c in COLUMNS}
+        return CandleSeries(*(getattr(self, c)[index] for c in COLUMNS))
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {c: getattr(self, c) for c in COLUMNS}
+
+    def copy(self) -> "CandleSeries":
+        return CandleSeries(*(getattr(self, c).copy() for c in COLUMNS))
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> "CandleSeries":
+        """View com start <= timestamp <= end"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamp, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamp, end, side="right"))
+        return self[lo:hi]
+
+    def merge(self, other: "CandleSeries") -> "CandleSeries":
+        """Union ordered by timestamp; on equal timestamps `other` wins"""
+        if not len(other):
+            return self
+        if not len(self) or other.timestamp[0] > self.timestamp[-1]:
+            return CandleSeries.concat([self, other])
+        merged = CandleSeries.concat([self, other])
+        order = np.argsort(merged.timestamp, kind="stable")
+        ts = merged.timestamp[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[:-1] = ts[:-1] != ts[1:]
+        return merged[order[keep]]
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Uma lista de dicts para respostas JSON"""
+        cols = [getattr(self, c).tolist() for c in COLUMNS]
+        return [dict(zip(COLUMNS, row)) for row in zip(*cols)]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, c).nbytes for c in COLUMNS)
@@ -9,7 +9,58 @@ class Settings(BaseSettings):
     bybit_api_secret: str = Field("", env="BYBIT_API_SECRET")
     use_testnet: bool = Field(True, env="USE_TESTNET")
     use_demo: bool = Field(False, env="USE_DEMO")
+    # Local mock server (python -m app.mock_exchange); overrides testnet/demo/mainnet when set
+    mock_exchange_url: str = Field("", env="MOCK_EXCHANGE_URL")
     symbols: str = Field("BTCUSDT,ETHUSDT,BNBUSDT", env="SYMBOLS")
+    kline_cache_max_candles: int = Field(1000, env="KLINE_CACHE_MAX_CANDLES")
+    kline_aggregate: bool = Field(True, env="KLINE_AGGREGATE")
+    # Per-method TTL (s) of coalesced account reads; 0 only deduplicates in-flight calls.
+    # Klines and tickers have their own caches (KLINE_CACHE_*, TICKER_CACHE_TTL)
+    read_cache_ttls: str = Field(
+        "get_wallet_balance=2,get_positions=1,get_open_orders=1,get_account_info=30",
+        env="READ_CACHE_TTLS"
+    )
+    read_cache_max_entries: int = Field(512, env="READ_CACHE_MAX_ENTRIES")
+    ticker_cache_ttl: float = Field(2.0, env="TICKER_CACHE_TTL")
+    candle_archive_dir: str = Field("", env="CANDLE_ARCHIVE_DIR")
+    scheduler_intervals: str = Field("60", env="SCHEDULER_INTERVALS")
+    scheduler_strategies: str = Field("sma", env="SCHEDULER_STRATEGIES")
+    scheduler_max_concurrency: int = Field(4, env="SCHEDULER_MAX_CONCURRENCY")
+    scheduler_autostart: bool = Field(False, env="SCHEDULER_AUTOSTART")
+    market_data_ws: bool = Field(False, env="MARKET_DATA_WS")
+    ws_public_url: str = Field("", env="WS_PUBLIC_URL")
+    ws_intervals: str = Field("60", env="WS_INTERVALS")
+    ws_record_path: str = Field("", env="WS_RECORD_PATH")
+    # L2 order book levels subscribed per symbol (1, 50, 200 or 500 on linear); 0 disables the book
+    ws_orderbook_depth: int = Field(50, env="WS_ORDERBOOK_DEPTH")
+    # Private stream (orders, executions, positions, wallet) serving the account endpoints from memory
+    account_ws: bool = Field(False, env="ACCOUNT_WS")
+    ws_private_url: str = Field("", env="WS_PRIVATE_URL")
+    # Seconds between REST snapshots compared against the streamed state
+    account_reconcile_interval: float = Field(60.0, env="ACCOUNT_RECONCILE_INTERVAL")
+    # Requests per second per endpoint group, kept under Bybit's published limits
+    rate_limit_market: float = Field(20.0, env="RATE_LIMIT_MARKET")
+    rate_limit_order: float = Field(10.0, env="RATE_LIMIT_ORDER")
+    rate_limit_account: float = Field(10.0, env="RATE_LIMIT_ACCOUNT")
+    rate_limit_max_wait: float = Field(2.0, env="RATE_LIMIT_MAX_WAIT")
+    # Pre-fill tickers and recent klines in the background at startup; /ready waits for it
+    warmup: bool = Field(True, env="WARMUP")
+    warmup_timeout: float = Field(15.0, env="WARMUP_TIMEOUT")
+    warmup_kline_limit: int = Field(200, env="WARMUP_KLINE_LIMIT")
+    log_level: str = Field("INFO", env="LOG_LEVEL")
+    # "json" (one object per line) or "text"
+    log_format: str = Field("json", env="LOG_FORMAT")
+    # Fraction of INFO/DEBUG records kept per logger prefix; warnings and errors are never sampled
+    log_sample_rates: str = Field("httpx=0.01", env="LOG_SAMPLE_RATES")
+    # Log raw exchange responses (also switchable at runtime on /api/debug/logging)
+    log_payloads: bool = Field(False, env="LOG_PAYLOADS")
+    # Route orders and account reads to the local matching engine instead of Bybit
+    paper_trading: bool = Field(False, env="PAPER_TRADING")
+    paper_initial_balance: float = Field(10000.0, env="PAPER_INITIAL_BALANCE")
+    paper_taker_fee: float = Field(0.00055, env="PAPER_TAKER_FEE")
+    paper_maker_fee: float = Field(0.0002, env="PAPER_MAKER_FEE")
+    paper_slippage: float = Field(0.0005, env="PAPER_SLIPPAGE")
+    paper_leverage: float = Field(10.0, env="PAPER_LEVERAGE")
 
     # Pydantic v2 style config for BaseSettings
     model_config = ConfigDict(env_file=".env", case_sensitive=False)
@@ -38,9 +89,26 @@ class Settings(BaseSettings):
             return []
         return [s for s in (item.strip() for item in self.symbols.split(",")) if s]
 
+    @property
+    def scheduler_intervals_list(self) -> List[str]:
+        """Intervalos avaliados pelo scheduler (ex: "1,60,D")"""
+        return [i.strip() for i in self.scheduler_intervals.split(",") if i.strip()]
+
+    @property
+    def scheduler_strategies_list(self) -> List[str]:
+        """Estratégias executadas pelo scheduler (ex: "sma,rsi")"""
+        return [name.strip().lower() for name in self.scheduler_strategies.split(",") if name.strip()]
+
+    @property
+    def ws_intervals_list(self) -> List[str]:
+        """Intervalos de kline assinados no WebSocket público"""
+        return [i.strip() for i in self.ws_intervals.split(",") if i.strip()]
+
     @property
     def base_url(self) -> str:
         """Retorna URL base da API Bybit"""
+        if self.mock_exchange_url:
+            return self.mock_exchange_url.rstrip("/")
         if self.use_testnet:
             return "https://api-testnet.bybit.com"
         if self.use_demo:
@@ -0,0 +1,471 @@
+"""
+Indicadores técnicos vetorizados e incrementais.
+
+Every indicator has two paths that produce the same numbers: module-level
+functions compute a whole array at once for backtests and batch analysis
+(along the last axis, so a symbols x bars matrix works too),
+and ``Indicator`` objects take one closed candle at a time in O(1) for live
+data. Recursive averages (EMA, Wilder) are seeded with the SMA of their
+first ``period`` inputs, so both paths start from the same value.
+
+``IndicatorStore`` keeps indicator state per (symbol, interval) so several
+strategies asking for the same indicator share one computation.
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, Optional, Tuple, Type
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.candles import CandleSeries
+
+# Chunk length of the vectorized recursion is chosen so decay ** -chunk stays below e ** 18
+_EWM_RANGE = 18.0
+
+
+def sma(values: np.ndarray, period: int) -> np.ndarray:
+    """SMA via cumulative sum; the first ``period - 1`` entries are NaN"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if period <= 0 or values.shape[-1] < period:
+        return out
+    cs = np.cumsum(values, axis=-1)
+    out[..., period - 1] = cs[..., period - 1] / period
+    out[..., period:] = (cs[..., period:] - cs[..., :-period]) / period
+    return out
+
+
+def _ewm(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """
+    y[i] = y[i - 1] + alpha * (x[i] - y[i - 1]) seeded with the mean of the
+    first ``period`` values. Within a chunk the recursion has the closed form
+    y[i] = d ** i * (y[0] + alpha * sum(x[j] * d ** -j)), evaluated with one
+    cumsum; chunks stay short enough for the weights not to lose precision.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if period <= 0 or values.shape[-1] < period:
+        return out
+    prev = values[..., :period].mean(axis=-1)
+    out[..., period - 1] = prev
+    rest = values[..., period:]
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[..., period:] = rest
+        return out
+
+    chunk = max(1, int(_EWM_RANGE / -math.log(decay)))
+    for lo in range(0, rest.shape[-1], chunk):
+        part = rest[..., lo:lo + chunk]
+        k = np.arange(1, part.shape[-1] + 1, dtype=np.float64)
+        y = decay ** k * (prev[..., None] + alpha * np.cumsum(part * decay ** -k, axis=-1))
+        out[..., period + lo:period + lo + part.shape[-1]] = y
+        prev = y[..., -1]
+    return out
+
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    return _ewm(values, period, 2.0 / (period + 1))
+
+
+def wilder(values: np.ndarray, period: int) -> np.ndarray:
+    """Média móvel de Wilder (RMA), usada por RSI e ATR"""
+    return _ewm(values, period, 1.0 / period)
+
+
+def _rsi_value(avg_gain: float, avg_loss: float) -> float:
+    if avg_loss == 0.0:
+        return 50.0 if avg_gain == 0.0 else 100.0
+    return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+
+
+def rsi(closes: np.ndarray, period: int = 14) -> np.ndarray:
+    closes = np.asarray(closes, dtype=np.float64)
+    out = np.full(closes.shape, np.nan)
+    if closes.shape[-1] <= period:
+        return out
+    delta = np.diff(closes, axis=-1)
+    avg_gain = wilder(np.clip(delta, 0.0, None), period)[..., period - 1:]
+    avg_loss = wilder(np.clip(-delta, 0.0, None), period)[..., period - 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    values = np.where(avg_loss == 0.0, np.where(avg_gain == 0.0, 50.0, 100.0), values)
+    out[..., period:] = values
+    return out
+
+
+def macd(
+    closes: np.ndarray, fast: int = 12, slow: int = 26, signal: int = 9
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(linha MACD, linha de sinal, histograma)"""
+    line = ema(closes, fast) - ema(closes, slow)
+    signal_line = np.full(line.shape, np.nan)
+    first = max(fast, slow) - 1
+    if line.shape[-1] > first:
+        signal_line[..., first:] = ema(line[..., first:], signal)
+    return line, signal_line, line - signal_line
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    tr = np.asarray(high - low, dtype=np.float64)
+    if tr.shape[-1] > 1:
+        prev_close = close[..., :-1]
+        tr[..., 1:] = np.maximum.reduce([
+            tr[..., 1:], np.abs(high[..., 1:] - prev_close), np.abs(low[..., 1:] - prev_close)
+        ])
+    return tr
+
+
+def atr(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> np.ndarray:
+    return wilder(true_range(high, low, close), period)
+
+
+def bollinger(
+    closes: np.ndarray, period: int = 20, width: float = 2.0
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(média, banda superior, banda inferior) com desvio padrão populacional"""
+    middle = sma(closes, period)
+    std = np.full(middle.shape, np.nan)
+    if period > 0 and middle.shape[-1] >= period:
+        windows = sliding_window_view(np.asarray(closes, dtype=np.float64), period, axis=-1)
+        std[..., period - 1:] = windows.std(axis=-1)
+    return middle, middle + width * std, middle - width * std
+
+
+class _EWMState:
+    """Incremental counterpart of ``_ewm``"""
+
+    __slots__ = ("period", "alpha", "count", "value")
+
+    def __init__(self, period: int, alpha: float):
+        self.period = period
+        self.alpha = alpha
+        self.count = 0
+        self.value = 0.0
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.value += x
+            return math.nan
+        if self.count == self.period:
+            self.value = (self.value + x) / self.period
+        else:
+            self.value = (1.0 - self.alpha) * self.value + self.alpha * x
+        return self.value
+
+
+class Indicator(ABC):
+    """
+    One indicator configuration plus its incremental state.
+
+    ``batch`` is stateless and returns every output over a whole candle
+    series; ``update`` consumes the next closed candle and returns the
+    outputs for it (NaN while warming up).
+    """
+
+    name = ""
+    outputs: Tuple[str, ...] = ()
+
+    def __init__(self, **params: Any):
+        self.params = params
+
+    @property
+    def key(self) -> Tuple[Hashable, ...]:
+        return (self.name,) + tuple(sorted(self.params.items()))
+
+    def spawn(self) -> "Indicator":
+        """Nova instância com os mesmos parâmetros e estado zerado"""
+        return type(self)(**self.params)
+
+    @abstractmethod
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        """Todas as saídas sobre a série inteira"""
+
+    @abstractmethod
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        """Saídas após o próximo candle fechado"""
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{type(self).__name__}({args})"
+
+
+class SMA(Indicator):
+    name = "sma"
+    outputs = ("sma",)
+    RESYNC_EVERY = 1000
+
+    def __init__(self, period: int = 20):
+        super().__init__(period=period)
+        self.period = period
+        self._buf = [0.0] * period
+        self._pos = 0
+        self._count = 0
+        self._sum = 0.0
+        self._pushes = 0
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        return {"sma": sma(candles.close, self.period)}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        if self._count >= self.period:
+            self._sum -= self._buf[self._pos]
+        else:
+            self._count += 1
+        self._buf[self._pos] = close
+        self._pos = (self._pos + 1) % self.period
+        self._sum += close
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            # Unfilled slots are still 0.0
+            self._sum = sum(self._buf)
+        return {"sma": self._sum / self.period if self._count >= self.period else math.nan}
+
+
+class EMA(Indicator):
+    name = "ema"
+    outputs = ("ema",)
+
+    def __init__(self, period: int = 21):
+        super().__init__(period=period)
+        self.period = period
+        self._ewm = _EWMState(period, 2.0 / (period + 1))
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        return {"ema": ema(candles.close, self.period)}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        return {"ema": self._ewm.update(close)}
+
+
+class RSI(Indicator):
+    name = "rsi"
+    outputs = ("rsi",)
+
+    def __init__(self, period: int = 14):
+        super().__init__(period=period)
+        self.period = period
+        self._gain = _EWMState(period, 1.0 / period)
+        self._loss = _EWMState(period, 1.0 / period)
+        self._prev: Optional[float] = None
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        return {"rsi": rsi(candles.close, self.period)}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        prev, self._prev = self._prev, close
+        if prev is None:
+            return {"rsi": math.nan}
+        delta = close - prev
+        avg_gain = self._gain.update(max(delta, 0.0))
+        avg_loss = self._loss.update(max(-delta, 0.0))
+        if math.isnan(avg_gain):
+            return {"rsi": math.nan}
+        return {"rsi": _rsi_value(avg_gain, avg_loss)}
+
+
+class MACD(Indicator):
+    name = "macd"
+    outputs = ("macd", "signal", "histogram")
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        super().__init__(fast=fast, slow=slow, signal=signal)
+        self.fast = fast
+        self.slow = slow
+        self.signal = signal
+        self._fast = _EWMState(fast, 2.0 / (fast + 1))
+        self._slow = _EWMState(slow, 2.0 / (slow + 1))
+        self._signal = _EWMState(signal, 2.0 / (signal + 1))
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        line, signal_line, histogram = macd(candles.close, self.fast, self.slow, self.signal)
+        return {"macd": line, "signal": signal_line, "histogram": histogram}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        line = self._fast.update(close) - self._slow.update(close)
+        if math.isnan(line):
+            return {"macd": math.nan, "signal": math.nan, "histogram": math.nan}
+        signal_line = self._signal.update(line)
+        return {"macd": line, "signal": signal_line, "histogram": line - signal_line}
+
+
+class ATR(Indicator):
+    name = "atr"
+    outputs = ("atr",)
+
+    def __init__(self, period: int = 14):
+        super().__init__(period=period)
+        self.period = period
+        self._ewm = _EWMState(period, 1.0 / period)
+        self._prev_close: Optional[float] = None
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        return {"atr": atr(candles.high, candles.low, candles.close, self.period)}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        tr = high - low
+        if self._prev_close is not None:
+            tr = max(tr, abs(high - self._prev_close), abs(low - self._prev_close))
+        self._prev_close = close
+        return {"atr": self._ewm.update(tr)}
+
+
+class Bollinger(Indicator):
+    """
+    Incremental path keeps the window mean and sum of squared deviations
+    with the sliding Welford update, which avoids the cancellation of
+    sum(x^2) - n * mean^2 at price scale.
+    """
+
+    name = "bollinger"
+    outputs = ("middle", "upper", "lower")
+    RESYNC_EVERY = 1000
+
+    def __init__(self, period: int = 20, width: float = 2.0):
+        super().__init__(period=period, width=width)
+        self.period = period
+        self.width = width
+        self._buf = [0.0] * period
+        self._pos = 0
+        self._count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._pushes = 0
+
+    def batch(self, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        middle, upper, lower = bollinger(candles.close, self.period, self.width)
+        return {"middle": middle, "upper": upper, "lower": lower}
+
+    def update(self, high: float, low: float, close: float) -> Dict[str, float]:
+        if self._count < self.period:
+            self._count += 1
+            delta = close - self._mean
+            self._mean += delta / self._count
+            self._m2 += delta * (close - self._mean)
+        else:
+            old = self._buf[self._pos]
+            mean = self._mean + (close - old) / self.period
+            self._m2 += (close - old) * (close - mean + old - self._mean)
+            self._mean = mean
+        self._buf[self._pos] = close
+        self._pos = (self._pos + 1) % self.period
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0 and self._count == self.period:
+            self._mean = sum(self._buf) / self.period
+            self._m2 = sum((x - self._mean) ** 2 for x in self._buf)
+
+        if self._count < self.period:
+            return {"middle": math.nan, "upper": math.nan, "lower": math.nan}
+        std = math.sqrt(max(self._m2, 0.0) / self.period)
+        return {
+            "middle": self._mean,
+            "upper": self._mean + self.width * std,
+            "lower": self._mean - self.width * std
+        }
+
+
+INDICATORS: Dict[str, Type[Indicator]] = {
+    cls.name: cls for cls in (SMA, EMA, RSI, MACD, ATR, Bollinger)
+}
+
+
+def make_indicator(name: str, **params: Any) -> Indicator:
+    cls = INDICATORS.get(name.lower())
+    if cls is None:
+        raise ValueError(f"Unknown indicator {name!r}, expected one of {sorted(INDICATORS)}")
+    return cls(**params)
+
+
+class _Tracked:
+    __slots__ = ("indicator", "last_timestamp", "values")
+
+    def __init__(self, indicator: Indicator):
+        self.indicator = indicator
+        self.last_timestamp: Optional[int] = None
+        self.values: Dict[str, float] = {name: math.nan for name in indicator.outputs}
+
+
+class IndicatorStore:
+    """
+    Indicators shared per (symbol, interval) and configuration.
+
+    ``latest`` advances one incremental state with only the closed candles
+    newer than the last call, rebuilding it from the given window when the
+    window no longer continues it (gap, restart). ``series`` memoizes the
+    batch arrays of the last window seen, so strategies evaluating the same
+    candles reuse them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states: Dict[Tuple[str, str, Hashable], _Tracked] = {}
+        self._series: Dict[Tuple[str, str, Hashable], Tuple[Tuple, Dict[str, np.ndarray]]] = {}
+        self.computed = 0
+        self.reused = 0
+
+    def latest(self, symbol: str, interval: str, indicator: Indicator, closed: CandleSeries) -> Dict[str, float]:
+        """Valores após o último candle fechado de ``closed``"""
+        key = (symbol, interval, indicator.key)
+        with self._lock:
+            tracked = self._states.get(key)
+            start = None
+            if tracked is not None and tracked.last_timestamp is not None:
+                i = int(np.searchsorted(closed.timestamp, tracked.last_timestamp, side="left"))
+                if i < len(closed) and closed.timestamp[i] == tracked.last_timestamp:
+                    start = i + 1
+            if start is None:
+                tracked = _Tracked(indicator.spawn())
+                self._states[key] = tracked
+                start = 0
+
+            update = tracked.indicator.update
+            rows = closed[start:]
+            for high, low, close in zip(rows.high.tolist(), rows.low.tolist(), rows.close.tolist()):
+                tracked.values = update(high, low, close)
+            if len(rows):
+                tracked.last_timestamp = int(rows.timestamp[-1])
+            return dict(tracked.values)
+
+    def series(self, symbol: str, interval: str, indicator: Indicator, candles: CandleSeries) -> Dict[str, np.ndarray]:
+        """Arrays completos sobre ``candles``; recalculados apenas quando a janela muda"""
+        key = (symbol, interval, indicator.key)
+        # The forming candle keeps its timestamp while its close moves, so the close is part of the window
+        window = (
+            (len(candles), int(candles.timestamp[0]), int(candles.timestamp[-1]), float(candles.close[-1]))
+            if len(candles) else ()
+        )
+        with self._lock:
+            cached = self._series.get(key)
+            if cached is not None and cached[0] == window:
+                self.reused += 1
+                return cached[1]
+
+        values = indicator.batch(candles)
+        with self._lock:
+            self.computed += 1
+            self._series[key] = (window, values)
+        return values
+
+    def reset(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        with self._lock:
+            for store in (self._states, self._series):
+                for key in [
+                    k for k in store
+                    if symbol is None or (k[0] == symbol and (interval is None or k[1] == interval))
+                ]:
+                    del store[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "states": len(self._states),
+            "series": len(self._series),
+            "computed": self.computed,
+            "reused": self.reused
+        }
+
+
+indicator_store = IndicatorStore()
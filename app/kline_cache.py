@@ -0,0 +1,328 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set, Tuple
+
+import numpy as np
+
+from app.async_bybit_client import AsyncBybitClient, async_bybit_client
+from app.candle_aggregator import CandleAggregator
+from app.candle_archive import CandleArchive, candle_archive
+from app.candles import CandleSeries
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Candle length in ms per Bybit interval. "M" is calendar based and bypasses the cache.
+INTERVAL_MS: Dict[str, int] = {
+    "1": 60_000,
+    "3": 3 * 60_000,
+    "5": 5 * 60_000,
+    "15": 15 * 60_000,
+    "30": 30 * 60_000,
+    "60": 60 * 60_000,
+    "120": 120 * 60_000,
+    "240": 240 * 60_000,
+    "360": 360 * 60_000,
+    "720": 720 * 60_000,
+    "D": 86_400_000,
+    "W": 7 * 86_400_000,
+}
+
+# Maximum candles Bybit returns per /v5/market/kline request
+BYBIT_MAX_LIMIT = 1000
+
+
+class _Entry:
+    def __init__(self):
+        self.closed = CandleSeries.empty()
+        self.forming: Optional[CandleSeries] = None
+        self.history_exhausted = False
+        self.checked_gaps: Set[Tuple[int, int]] = set()
+        self.archived_until: Optional[int] = None
+        self.stream_at: Optional[int] = None
+        # Completed tail downloads; a caller that saw this change while queued on the lock joined one
+        self.refreshes = 0
+        self.lock = asyncio.Lock()
+
+    @property
+    def last_closed(self) -> Optional[int]:
+        return int(self.closed.timestamp[-1]) if len(self.closed) else None
+
+    def clear(self) -> None:
+        self.closed = CandleSeries.empty()
+        self.forming = None
+        self.history_exhausted = False
+        self.checked_gaps.clear()
+
+
+class KlineCache:
+    """
+    Cache of closed candles per (category, symbol, interval).
+
+    Closed candles never change, so after the first download only the tail
+    since the last closed candle is requested (``start``), missing history
+    is backfilled with ``end`` and holes inside the window are refetched once.
+    The forming candle is always taken from the latest tail request.
+
+    Callers queued on an entry's lock while its tail is being downloaded
+    reuse that download instead of repeating it; there is no time-based
+    reuse, so the forming candle is as fresh as the last request.
+
+    With an ``aggregator``, higher intervals are resampled from the base
+    interval entry (1m) whenever its tail is current (kept by the stream, or
+    being downloaded right now) and it covers the requested window, so one
+    base tail serves every timeframe of a symbol.
+    """
+
+    # A stream update older than this no longer vouches for the tail
+    STREAM_FRESH_MS = 10_000
+
+    def __init__(
+        self,
+        client: AsyncBybitClient,
+        max_candles: int = 1000,
+        archive: Optional[CandleArchive] = None,
+        aggregator: Optional[CandleAggregator] = None
+    ):
+        self.client = client
+        self.max_candles = max_candles
+        self.archive = archive
+        self.aggregator = aggregator
+        self._entries: Dict[Tuple[str, str, str], _Entry] = {}
+        self.upstream_requests = 0
+        # Lookups, and those answered without downloading the tail
+        self.lookups = 0
+        self.hits = 0
+
+    @staticmethod
+    def _now_ms() -> int:
+        return int(time.time() * 1000)
+
+    async def _fetch(
+        self,
+        category: str,
+        symbol: str,
+        interval: str,
+        limit: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> CandleSeries:
+        self.upstream_requests += 1
+        response = await self.client.get_klines(
+            category=category,
+            symbol=symbol,
+            interval=interval,
+            limit=limit,
+            start=start,
+            end=end
+        )
+        if response.get("retCode") != 0:
+            raise Exception(f"Bybit API Error: {response.get('retMsg', 'Unknown error')}")
+        return CandleSeries.from_bybit(response.get("result", {}).get("list", []))
+
+    async def get_klines(
+        self,
+        category: str = "linear",
+        symbol: str = "BTCUSDT",
+        interval: str = "60",
+        limit: int = 200
+    ) -> CandleSeries:
+        """Retorna até `limit` candles (mais antigo primeiro), o último sendo o candle em formação"""
+        self.lookups += 1
+        step = INTERVAL_MS.get(interval)
+        if step is None or limit <= 0:
+            return await self._fetch(category, symbol, interval, min(max(limit, 1), BYBIT_MAX_LIMIT))
+
+        if self.aggregator is not None and self.aggregator.supports(interval, step):
+            klines = await self._from_base(category, symbol, interval, step, limit)
+            if klines is not None:
+                self.hits += 1
+                return klines
+
+        entry = self._entries.setdefault((category, symbol, interval), _Entry())
+        seen = entry.refreshes
+        async with entry.lock:
+            if not await self._sync(entry, category, symbol, interval, step, limit, joined=entry.refreshes != seen):
+                self.hits += 1
+            if entry.forming is None:
+                return entry.closed[-limit:]
+            closed = entry.closed[-(limit - 1):] if limit > 1 else CandleSeries.empty()
+            return CandleSeries.concat([closed, entry.forming])
+
+    async def _sync(
+        self, entry: _Entry, category: str, symbol: str, interval: str, step: int, limit: int, joined: bool = False
+    ) -> bool:
+        """
+        Tail, holes, history and archive of one entry (the caller holds its
+        lock); True if the tail was downloaded. ``joined``: a tail download
+        finished while the caller waited for the lock, so it is reused.
+        """
+        downloaded = False
+        if not joined:
+            downloaded = await self._refresh_tail(entry, category, symbol, interval, step, limit, self._now_ms())
+            if downloaded:
+                entry.refreshes += 1
+        await self._fill_gaps(entry, category, symbol, interval, step)
+        await self._backfill(entry, category, symbol, interval, step, limit - 1)
+        if self.aggregator is not None and interval == self.aggregator.base_interval:
+            # Fold before trimming so aggregated history keeps what the base window drops
+            self.aggregator.fold_all(category, symbol, entry.closed)
+        self._trim(entry, limit)
+        if self.archive is not None:
+            await self._archive(entry, symbol, interval)
+        return downloaded
+
+    async def _from_base(
+        self, category: str, symbol: str, interval: str, step: int, limit: int
+    ) -> Optional[CandleSeries]:
+        """Candles of `interval` resampled from the base entry, or None when it does not cover them"""
+        base_interval = self.aggregator.base_interval
+        base = self._entries.get((category, symbol, base_interval))
+        # Only reuse base data someone already loads; downloading it just for this would cost more
+        if base is None or not len(base.closed):
+            return None
+        now = self._now_ms()
+        base_step = INTERVAL_MS[base_interval]
+        # Decided before syncing: a base tail request that cannot serve the window
+        # would be paid on top of downloading the interval itself. A base tail
+        # being downloaded right now (lock held) is joined for free.
+        fresh = self._stream_covers_tail(base, base_step, now) or base.lock.locked()
+        if not fresh or not self.aggregator.covers(
+            category, symbol, interval, step, base.closed, now, limit, self.max_candles
+        ):
+            return None
+        seen = base.refreshes
+        async with base.lock:
+            await self._sync(base, category, symbol, base_interval, base_step, 1, joined=base.refreshes != seen)
+            return self.aggregator.window(
+                category, symbol, interval, step, base.closed, base.forming, self._now_ms(), limit
+            )
+
+    def _merge(self, entry: _Entry, klines: CandleSeries, step: int, now: int, tail: bool = False) -> None:
+        """Merges closed candles in timestamp order and keeps the newest open one as forming"""
+        if not len(klines):
+            return
+        is_closed = klines.timestamp + step <= now
+        if tail:
+            # Bybit always ends a tail response with the forming candle; a host clock
+            # running ahead must not store it as closed for good (and archive it)
+            is_closed[-1] = False
+        if not is_closed.all():
+            newest = klines[~is_closed][-1:]
+            if entry.forming is None or newest.timestamp[0] >= entry.forming.timestamp[0]:
+                entry.forming = newest
+            klines = klines[is_closed]
+        entry.closed = entry.closed.merge(klines)
+
+        if entry.forming is not None and len(entry.closed) and entry.forming.timestamp[0] <= entry.last_closed:
+            entry.forming = None
+
+    async def _refresh_tail(
+        self, entry: _Entry, category: str, symbol: str, interval: str, step: int, limit: int, now: int
+    ) -> bool:
+        if self._stream_covers_tail(entry, step, now):
+            return False
+        if len(entry.closed):
+            start = entry.last_closed + step
+            missing = (now - start) // step + 1
+            if missing <= BYBIT_MAX_LIMIT:
+                klines = await self._fetch(category, symbol, interval, max(missing, 1), start=start)
+                entry.forming = None
+                self._merge(entry, klines, step, now, tail=True)
+                return True
+            logger.info("Kline cache for %s/%s is %s candles behind, reloading", symbol, interval, missing)
+            entry.clear()
+
+        klines = await self._fetch(category, symbol, interval, min(limit, BYBIT_MAX_LIMIT))
+        self._merge(entry, klines, step, now, tail=True)
+        return True
+
+    def _stream_covers_tail(self, entry: _Entry, step: int, now: int) -> bool:
+        """True when the WebSocket already delivered every closed candle and the forming one"""
+        return (
+            entry.stream_at is not None
+            and now - entry.stream_at < self.STREAM_FRESH_MS
+            and len(entry.closed) > 0
+            and entry.forming is not None
+            and entry.forming.timestamp[0] == entry.last_closed + step
+            and entry.forming.timestamp[0] + step > now
+        )
+
+    def apply_stream(
+        self, category: str, symbol: str, interval: str, kline: CandleSeries, confirmed: bool
+    ) -> None:
+        """Aplica um candle recebido via WebSocket a uma entrada já carregada"""
+        step = INTERVAL_MS.get(interval)
+        entry = self._entries.get((category, symbol, interval))
+        if step is None or entry is None or not len(entry.closed) or not len(kline):
+            return
+        if confirmed:
+            self._merge(entry, kline, step, int(kline.timestamp[-1]) + step)
+            if self.aggregator is not None and interval == self.aggregator.base_interval:
+                self.aggregator.fold_all(category, symbol, entry.closed)
+        elif kline.timestamp[-1] > entry.last_closed:
+            entry.forming = kline[-1:]
+        entry.stream_at = self._now_ms()
+
+    async def _fill_gaps(self, entry: _Entry, category: str, symbol: str, interval: str, step: int) -> None:
+        ts = entry.closed.timestamp
+        holes = np.flatnonzero(np.diff(ts) != step)
+        gaps = [(int(ts[i]), int(ts[i + 1])) for i in holes if (int(ts[i]), int(ts[i + 1])) not in entry.checked_gaps]
+        for a, b in gaps:
+            # Exchange outages leave real holes; remember them so they are asked for only once
+            entry.checked_gaps.add((a, b))
+            count = min((b - a) // step - 1, BYBIT_MAX_LIMIT)
+            if count <= 0:
+                continue
+            klines = await self._fetch(category, symbol, interval, count, start=a + step, end=b - step)
+            self._merge(entry, klines, step, self._now_ms())
+
+    async def _backfill(
+        self, entry: _Entry, category: str, symbol: str, interval: str, step: int, needed: int
+    ) -> None:
+        while len(entry.closed) < needed and len(entry.closed) and not entry.history_exhausted:
+            count = min(needed - len(entry.closed), BYBIT_MAX_LIMIT)
+            before = len(entry.closed)
+            klines = await self._fetch(category, symbol, interval, count, end=int(entry.closed.timestamp[0]) - step)
+            self._merge(entry, klines, step, self._now_ms())
+            if len(entry.closed) == before:
+                entry.history_exhausted = True
+
+    def _trim(self, entry: _Entry, limit: int) -> None:
+        keep = max(self.max_candles, limit)
+        if len(entry.closed) > keep:
+            entry.closed = entry.closed[-keep:].copy()
+            entry.history_exhausted = False
+            first = int(entry.closed.timestamp[0])
+            entry.checked_gaps = {g for g in entry.checked_gaps if g[0] >= first}
+
+    async def _archive(self, entry: _Entry, symbol: str, interval: str) -> None:
+        """Appends closed candles newer than the last archived one"""
+        if not len(entry.closed):
+            return
+        start = 0
+        if entry.archived_until is not None:
+            start = int(np.searchsorted(entry.closed.timestamp, entry.archived_until, side="right"))
+        rows = entry.closed[start:]
+        if len(rows):
+            await asyncio.to_thread(self.archive.append, symbol, interval, rows)
+            entry.archived_until = entry.last_closed
+
+    def invalidate(self, category: Optional[str] = None, symbol: Optional[str] = None) -> None:
+        """Remove entradas do cache"""
+        for key in list(self._entries):
+            if (category is None or key[0] == category) and (symbol is None or key[1] == symbol):
+                del self._entries[key]
+        if self.aggregator is not None:
+            self.aggregator.invalidate(category, symbol)
+
+
+kline_cache = KlineCache(
+    async_bybit_client,
+    max_candles=settings.kline_cache_max_candles,
+    archive=candle_archive,
+    aggregator=CandleAggregator(
+        max_candles=settings.kline_cache_max_candles
+    ) if settings.kline_aggregate else None
+)
@@ -0,0 +1,182 @@
+"""
+Logging fora do event loop.
+
+Records go from the calling code into a bounded queue (``put_nowait``; when
+the writer falls behind, records are dropped and counted instead of blocking
+a request) and a background thread formats and writes them. Messages are
+formatted in that thread, so callers should pass ``%`` arguments instead of
+f-strings. Output is one JSON object per line (or the classic text format),
+INFO/DEBUG records can be sampled per logger and raw exchange payloads are
+only captured when payload debugging is switched on.
+"""
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+payload_logger = logging.getLogger("app.payloads")
+
+
+def _extras(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in record.__dict__.items() if key not in _RECORD_ATTRS and not key.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """TEXT_FORMAT com os campos de `extra=` anexados em JSON, que o formato clássico não mostra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        extras = _extras(record)
+        return f"{text} {json.dumps(extras, default=str)}" if extras else text
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a fraction of the records below WARNING per logger prefix
+    ("httpx=0.01" keeps 1% of httpx lines); warnings and errors always pass.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "app.kline_cache" wins over "app"
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que nunca bloqueia nem formata no thread de quem loga"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The listener runs in this process, so the record can cross as is and
+        # be formatted by the writer thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingState:
+    def __init__(self):
+        self.handler: Optional[NonBlockingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
+        self.sampler: Optional[SamplingFilter] = None
+
+    def stats(self) -> Dict[str, Any]:
+        if self.handler is None:
+            return {"configured": False}
+        return {
+            "configured": True,
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+            "payloads": payloads_enabled(),
+            "sample_rates": dict(self.sampler.rates) if self.sampler else {}
+        }
+
+
+_state = LoggingState()
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    """"httpx=0.01,app.main=0.5" -> {"httpx": 0.01, "app.main": 0.5}"""
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "json",
+    sample_rates: Optional[Dict[str, float]] = None,
+    payloads: bool = False,
+    queue_size: int = 10000
+) -> LoggingState:
+    """Troca os handlers do root logger por uma fila com writer em background (idempotente)"""
+    if _state.listener is not None:
+        return _state
+
+    writer = logging.StreamHandler(sys.stderr)
+    writer.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT))
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    if sample_rates:
+        _state.sampler = SamplingFilter(sample_rates)
+        handler.addFilter(_state.sampler)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    set_payload_logging(payloads)
+
+    _state.handler = handler
+    _state.listener = QueueListener(handler.queue, writer, respect_handler_level=True)
+    _state.listener.start()
+    atexit.register(stop_logging)
+    return _state
+
+
+def stop_logging() -> None:
+    """Escreve o que ainda está na fila e para o thread"""
+    if _state.listener is not None:
+        _state.listener.stop()
+        _state.listener = None
+
+
+def set_payload_logging(enabled: bool) -> None:
+    # Its own level, so payloads can be captured while the root stays at INFO
+    payload_logger.setLevel(logging.DEBUG if enabled else logging.WARNING)
+
+
+def payloads_enabled() -> bool:
+    return payload_logger.isEnabledFor(logging.DEBUG)
+
+
+def log_payload(name: str, payload: Any) -> None:
+    """Guarda a resposta bruta da exchange, só com o debug de payloads ligado"""
+    if payload_logger.isEnabledFor(logging.DEBUG):
+        payload_logger.debug("payload %s", name, extra={"payload_name": name, "payload": payload})
+
+
+def logging_stats() -> Dict[str, Any]:
+    return _state.stats()
@@ -1,33 +1,256 @@
-from fastapi import FastAPI, HTTPException
+import time
+
+# Measured from the first import so /ready can report the cold start
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from datetime import datetime
-from typing import List, Optional
-import uvicorn
+from typing import Dict, List, Optional
 import asyncio
 import logging
 
 from app.config import settings
-from app.bybit_client import bybit_client
+from app.logging_config import (
+    log_payload, logging_stats, parse_sample_rates, set_payload_logging, setup_logging
+)
+from app.async_bybit_client import async_bybit_client
+from app.single_flight import exchange_client
+from app.paper_trading import paper_exchange
+from app.order_pipeline import order_pipeline
+from app.rate_limiter import RateLimitExceeded
+from app.kline_cache import kline_cache
+from app.ticker_cache import ticker_cache
+from app.candle_archive import candle_archive
+from app.backtest import run_backtest
 from app.models import (
     OrderRequest, OrderResponse, Position, Balance,
-    PriceData, Kline, SignalResponse, AccountInfo
+    PriceData, Kline, SignalResponse, AccountInfo, SchedulerStartRequest,
+    BatchOrderRequest, BatchCancelRequest, BatchAmendRequest, Side
+)
+from app.strategy.base import Strategy, StrategyResult, get_strategy, list_strategies, load_strategies
+from app.scheduler import StrategyScheduler
+from app.market_data import market_data
+from app.order_book import OrderBook, order_books
+from app.account_stream import account_stream
+from app.stream import StreamHub
+from app.indicators import indicator_store
+from app.warmup import WarmUp
+from app.metrics import (
+    CONTENT_TYPE, MetricsMiddleware, loop_lag_monitor, metrics, strategy_evaluation_duration
 )
-from app.strategy.simple_sma import sma_strategy
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+setup_logging(
+    level=settings.log_level,
+    fmt=settings.log_format,
+    sample_rates=parse_sample_rates(settings.log_sample_rates),
+    payloads=settings.log_payloads
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = time.perf_counter()
+    await start_background_services()
+    if settings.warmup:
+        # Runs while the server already accepts requests; /ready turns 200 when it ends
+        warm_up.start()
+    else:
+        warm_up.skip()
+    startup_timings["startup_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(
+        "Started in %.3fs (imports %.3fs)", startup_timings["startup_seconds"], startup_timings["import_seconds"]
+    )
+    try:
+        yield
+    finally:
+        await warm_up.stop()
+        await stop_background_services()
+
+
 app = FastAPI(
     title="Bybit Trading Bot",
     description="Trading bot minimalista com estratégia SMA",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
+app.add_middleware(MetricsMiddleware)
+
+
+def _error_status(e: Exception) -> int:
+    """429 for requests shed by the local rate limiter, 500 for anything else"""
+    return 429 if isinstance(e, RateLimitExceeded) else 500
+
+
+def _book_or_error(symbol: str) -> OrderBook:
+    """404 for symbols without a book, 503 while a book waits for its snapshot"""
+    symbol = symbol.upper()
+    if not settings.market_data_ws or not settings.ws_orderbook_depth:
+        raise HTTPException(status_code=404, detail="Order book is disabled (MARKET_DATA_WS / WS_ORDERBOOK_DEPTH)")
+    if symbol not in order_books.books:
+        raise HTTPException(status_code=404, detail=f"No order book for {symbol}")
+    book = order_books.get(symbol)
+    if book is None:
+        raise HTTPException(status_code=503, detail=f"Order book for {symbol} is resyncing")
+    return book
+
+
+def _strategy_or_404(name: str) -> Strategy:
+    try:
+        return get_strategy(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+def _signal_result(symbol: str, strategy: Strategy, result: StrategyResult, current_price: float) -> dict:
+    signal, values = result
+    return {
+        "symbol": symbol,
+        "strategy": strategy.name,
+        "signal": signal.value,
+        **{name: round(value, 2) for name, value in values.items()},
+        "current_price": round(current_price, 2),
+        "timestamp": datetime.now().isoformat()
+    }
+
+
+async def evaluate_signals(strategy_name: str, symbols: List[str], interval: str, limit: int = 100) -> List[dict]:
+    """Avalia uma estratégia para vários símbolos com uma única computação em lote"""
+    strategy = get_strategy(strategy_name)
+    responses = await asyncio.gather(
+        *(kline_cache.get_klines(category="linear", symbol=s, interval=interval, limit=limit) for s in symbols),
+        return_exceptions=True
+    )
+    candles = {}
+    for symbol, response in zip(symbols, responses):
+        if isinstance(response, Exception):
+            logger.error("Klines for %s/%s unavailable: %s", symbol, interval, response)
+        elif len(response):
+            candles[symbol] = response
+    started = time.perf_counter()
+    results = strategy.evaluate_many(candles)
+    strategy_evaluation_duration.observe(time.perf_counter() - started, strategy.name, "batch")
+    return [
+        _signal_result(symbol, strategy, results[symbol], float(candles[symbol].close[-1]))
+        for symbol in symbols
+        if symbol in results
+    ]
+
+
+strategy_scheduler = StrategyScheduler(
+    evaluate_signals,
+    max_concurrency=settings.scheduler_max_concurrency
+)
+
+
+async def _stream_prices() -> dict:
+    return {p["symbol"]: p["price"] for p in (await get_prices())["prices"]}
+
+
+async def _stream_positions() -> list:
+    return (await get_positions())["positions"]
+
+
+async def _stream_orders() -> list:
+    return (await get_orders())["orders"]
+
+
+stream_hub = StreamHub(
+    sources={
+        "prices": _stream_prices,
+        "positions": _stream_positions,
+        "orders": _stream_orders,
+        "balance": lambda: get_balance()
+    },
+    intervals={
+        # Streamed prices are a memory read; over REST keep the old dashboard cadence
+        "prices": 1.0 if settings.market_data_ws else 10.0,
+        "positions": 1.0 if settings.account_ws else 10.0,
+        "orders": 1.0 if settings.account_ws else 10.0,
+        "balance": 1.0 if settings.account_ws else 10.0
+    }
+)
+strategy_scheduler.listeners.append(lambda event: stream_hub.publish("signal", event))
+
+
+def _ratio(hits: int, lookups: int) -> Optional[float]:
+    return hits / lookups if lookups else None
+
+
+def _cache_hit_ratios() -> Dict[tuple, Optional[float]]:
+    read = exchange_client.stats()
+    indicators = indicator_store.stats()
+    return {
+        ("klines",): _ratio(kline_cache.hits, kline_cache.lookups),
+        ("tickers",): _ratio(ticker_cache.lookups - ticker_cache.upstream_requests, ticker_cache.lookups),
+        ("read",): read["hit_ratio"] if read["hits"] + read["misses"] + read["coalesced"] else None,
+        ("indicators",): _ratio(indicators["reused"], indicators["computed"] + indicators["reused"])
+    }
+
+
+metrics.gauge("cache_hit_ratio", "Share of lookups served without an upstream request", ("cache",), collect=_cache_hit_ratios)
+metrics.gauge(
+    "cache_upstream_requests", "Requests caches sent to Bybit", ("cache",),
+    collect=lambda: {("klines",): kline_cache.upstream_requests, ("tickers",): ticker_cache.upstream_requests}
+)
+metrics.gauge("event_loop_lag_last_seconds", "Last measured event loop lag", collect=lambda: loop_lag_monitor.last_lag)
+metrics.gauge("log_records_dropped", "Log records dropped because the writer fell behind", collect=lambda: logging_stats().get("dropped"))
+metrics.gauge("stream_clients", "Connected SSE clients", collect=lambda: stream_hub.clients)
+
+
+def _warmup_steps() -> dict:
+    """Strategies, the ticker snapshot and recent klines of every symbol/interval, all in parallel"""
+    steps = {
+        "strategies": lambda: asyncio.to_thread(load_strategies),
+        "tickers": ticker_cache.snapshot
+    }
+    for symbol in settings.symbols_list:
+        for interval in settings.scheduler_intervals_list:
+            steps[f"klines:{symbol}:{interval}"] = (
+                lambda symbol=symbol, interval=interval: kline_cache.get_klines(
+                    category="linear", symbol=symbol, interval=interval, limit=settings.warmup_kline_limit
+                )
+            )
+    return steps
+
+
+warm_up = WarmUp(_warmup_steps(), timeout=settings.warmup_timeout)
+startup_timings: Dict[str, Optional[float]] = {"import_seconds": None, "startup_seconds": None}
+
+
+async def start_background_services():
+    loop_lag_monitor.start()
+    if settings.market_data_ws:
+        market_data.start()
+    if settings.paper_trading:
+        if settings.market_data_ws:
+            market_data.price_listeners.append(paper_exchange.on_price)
+        else:
+            paper_exchange.start_polling()
+        logger.info("Paper trading enabled: orders are matched locally")
+    elif settings.account_ws:
+        account_stream.order_listeners.append(order_pipeline.on_order_update)
+        account_stream.start()
+    if settings.scheduler_autostart:
+        strategy_scheduler.start(
+            settings.symbols_list, settings.scheduler_intervals_list, settings.scheduler_strategies_list
+        )
+
+
+async def stop_background_services():
+    await order_pipeline.drain()
+    await strategy_scheduler.stop()
+    await market_data.stop()
+    await account_stream.stop()
+    await paper_exchange.stop()
+    await stream_hub.stop()
+    await async_bybit_client.aclose()
+    await loop_lag_monitor.stop()
 
 
 @app.get("/")
@@ -35,16 +258,58 @@ async def read_root():
     return FileResponse("static/index.html")
 
 
+@app.get("/ready")
+async def readiness_check():
+    """Pronto para tráfego: startup concluído e caches pré-carregados"""
+    body = {**warm_up.status(), **startup_timings}
+    return JSONResponse(body, status_code=200 if warm_up.ready else 503)
+
+
 @app.get("/health")
 async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "testnet": settings.use_testnet,
-        "symbols": settings.symbols_list
+        "symbols": settings.symbols_list,
+        "market_data": market_data.status() if settings.market_data_ws else None,
+        "order_books": order_books.status() if settings.market_data_ws and settings.ws_orderbook_depth else None,
+        "account_stream": account_stream.status() if settings.account_ws and not settings.paper_trading else None,
+        "rate_limits": async_bybit_client.rate_limiter.status(),
+        "read_cache": exchange_client.stats(),
+        "paper_trading": paper_exchange.status() if settings.paper_trading else None
     }
 
 
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Métricas no formato de texto do Prometheus"""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/stream")
+async def stream(request: Request):
+    """Server-Sent Events com preços, posições, ordens, saldo e sinais"""
+    return StreamingResponse(
+        stream_hub.subscribe(is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/debug/logging")
+async def logging_status():
+    return logging_stats()
+
+
+@app.post("/api/debug/logging")
+async def configure_logging(payloads: bool):
+    """Liga/desliga a captura das respostas brutas da exchange nos logs"""
+    set_payload_logging(payloads)
+    logger.warning("Raw payload logging %s", "enabled" if payloads else "disabled")
+    return logging_stats()
+
+
 @app.get("/api/debug/raw")
 async def debug_raw_responses():
     """Debug endpoint to see raw API responses"""
@@ -52,7 +317,7 @@ async def debug_raw_responses():
         results = {}
 
         try:
-            balance = await asyncio.to_thread(bybit_client.get_wallet_balance)
+            balance = await exchange_client.get_wallet_balance()
             results['balance'] = {
                 'retCode': balance.get('retCode'),
                 'retMsg': balance.get('retMsg'),
@@ -63,7 +328,7 @@ async def debug_raw_responses():
             results['balance'] = {'error': str(e)}
 
         try:
-            positions = await asyncio.to_thread(bybit_client.get_positions, category="linear")
+            positions = await exchange_client.get_positions(category="linear")
             results['positions'] = {
                 'retCode': positions.get('retCode'),
                 'retMsg': positions.get('retMsg'),
@@ -74,7 +339,7 @@ async def debug_raw_responses():
             results['positions'] = {'error': str(e)}
 
         try:
-            orders = await asyncio.to_thread(bybit_client.get_open_orders, category="linear")
+            orders = await exchange_client.get_open_orders(category="linear")
             results['orders'] = {
                 'retCode': orders.get('retCode'),
                 'retMsg': orders.get('retMsg'),
@@ -92,64 +357,53 @@ async def debug_raw_responses():
 @app.get("/api/account")
 async def get_account():
     try:
-        logger.info("Getting account info...")
-        response = await asyncio.to_thread(bybit_client.get_account_info)
-        logger.info(f"Account response: {response}")
+        response = await exchange_client.get_account_info()
+        log_payload("account", response)
 
         if response.get("retCode") != 0:
             error_msg = response.get("retMsg", "Unknown error")
-            logger.error(f"Account error: {error_msg}")
+            logger.error("Account error: %s", error_msg)
             raise HTTPException(status_code=400, detail=error_msg)
         return response.get("result", {})
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Account exception: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Account exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 @app.get("/api/balance")
 async def get_balance():
     try:
-        logger.info("Getting wallet balance...")
-        response = await asyncio.to_thread(bybit_client.get_wallet_balance)
-        logger.info(f"Balance response retCode: {response.get('retCode')}")
-        
+        response = account_stream.get_wallet_balance() or await exchange_client.get_wallet_balance()
+        log_payload("wallet_balance", response)
+
         if response.get("retCode") != 0:
             error_msg = response.get("retMsg", "Unknown error")
-            logger.error(f"Balance error: {error_msg}")
+            logger.error("Balance error: %s", error_msg)
             raise HTTPException(status_code=400, detail=error_msg)
 
         result = response.get("result", {})
         balances = []
 
         accounts = result.get("list", [])
-        logger.info(f"Number of accounts: {len(accounts)}")
-        
+
         if not accounts:
-            logger.warning("No accounts found in balance response")
-            logger.warning(f"Full result structure: {result}")
+            logger.warning("No accounts found in balance response (result keys: %s)", list(result))
             return {"balances": [], "debug": "No accounts in response"}
 
         for account in accounts:
-            logger.info(f"Account type: {account.get('accountType')}")
-            logger.info(f"Full account data: {account}")
-            
             coins = account.get("coin", [])
-            logger.info(f"Number of coins in account: {len(coins)}")
-            
+
             if not coins:
-                logger.warning("No coins found in account!")
-                logger.warning(f"Account keys: {list(account.keys())}")
+                logger.warning("No coins found in %s account (keys: %s)", account.get("accountType"), list(account))
                 return {"balances": [], "debug": f"No coins in account. Account has keys: {list(account.keys())}"}
 
             for coin_data in coins:
                 wallet_balance = float(coin_data.get("walletBalance", 0))
                 equity = float(coin_data.get("equity", 0))
                 available = float(coin_data.get("availableToWithdraw", 0))
-                
-                logger.info(f"Coin: {coin_data.get('coin')}, Balance: {wallet_balance}, Equity: {equity}, Available: {available}")
-                
+
                 balances.append({
                     "coin": coin_data.get("coin"),
                     "wallet_balance": wallet_balance,
@@ -157,8 +411,8 @@ async def get_balance():
                     "equity": equity
                 })
 
-        logger.info(f"Returning {len(balances)} balances")
-        
+        logger.debug("Balance: %d accounts, %d coins", len(accounts), len(balances))
+
         if not balances:
             return {"balances": [], "debug": "All coins have 0 balance"}
             
@@ -166,30 +420,30 @@ async def get_balance():
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Balance exception: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Balance exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 @app.get("/api/positions")
 async def get_positions(symbol: Optional[str] = None):
     try:
-        logger.info(f"Getting positions for symbol: {symbol}")
-        response = await asyncio.to_thread(bybit_client.get_positions, category="linear", symbol=symbol)
-        logger.info(f"Positions response retCode: {response.get('retCode')}")
+        response = (
+            account_stream.get_positions(category="linear", symbol=symbol)
+            or await exchange_client.get_positions(category="linear", symbol=symbol)
+        )
+        log_payload("positions", response)
 
         if response.get("retCode") != 0:
             error_msg = response.get("retMsg", "Unknown error")
-            logger.error(f"Positions error: {error_msg}")
+            logger.error("Positions error: %s", error_msg)
             raise HTTPException(status_code=400, detail=error_msg)
 
         result = response.get("result", {})
         positions = []
 
         pos_list = result.get("list", [])
-        logger.info(f"Number of positions in response: {len(pos_list)}")
 
         for pos in pos_list:
             size = float(pos.get("size", 0))
-            logger.info(f"Position {pos.get('symbol')}: size={size}, side={pos.get('side')}")
 
             if size > 0:
                 positions.append({
@@ -202,158 +456,310 @@ async def get_positions(symbol: Optional[str] = None):
                     "leverage": float(pos.get("leverage", 1))
                 })
 
-        logger.info(f"Returning {len(positions)} active positions")
+        logger.debug("Positions: %d listed, %d open", len(pos_list), len(positions))
         return {"positions": positions}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Positions exception: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Positions exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.get("/api/prices")
+async def get_prices(symbols: Optional[str] = None):
+    """Preços de vários símbolos a partir de um único snapshot de tickers"""
+    try:
+        requested = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else settings.symbols_list
+
+        prices = {}
+        missing = []
+        for symbol in requested:
+            streamed = market_data.get_price(symbol)
+            if streamed is not None:
+                prices[symbol] = streamed
+            else:
+                missing.append(symbol)
+
+        if missing:
+            for price in await ticker_cache.get_prices(missing):
+                prices[price["symbol"]] = price
+
+        return {"prices": [prices[s] for s in requested if s in prices]}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Prices exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
 @app.get("/api/price/{symbol}")
 async def get_price(symbol: str):
     try:
-        logger.info(f"Getting price for {symbol}")
-        response = await asyncio.to_thread(bybit_client.get_tickers, category="linear", symbol=symbol)
+        streamed = market_data.get_price(symbol)
+        if streamed is not None:
+            return streamed
 
-        if response.get("retCode") != 0:
-            error_msg = response.get("retMsg", "Unknown error")
-            logger.error(f"Price error: {error_msg}")
-            raise HTTPException(status_code=400, detail=error_msg)
-
-        result = response.get("result", {})
-        ticker_list = result.get("list", [])
+        # Any number of symbols share one upstream request per TTL
+        price = await ticker_cache.get_price(symbol)
 
-        if not ticker_list:
-            logger.warning(f"No ticker found for {symbol}")
+        if price is None:
+            logger.warning("No ticker found for %s", symbol)
             raise HTTPException(status_code=404, detail="Symbol not found")
 
-        ticker = ticker_list[0]
-        return {
-            "symbol": ticker.get("symbol"),
-            "price": float(ticker.get("lastPrice", 0)),
-            "timestamp": int(ticker.get("time", 0))
-        }
+        return price
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Price exception: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Price exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.get("/api/orderbook/{symbol}")
+async def get_order_book(symbol: str, levels: int = 20):
+    """Livro L2 local: melhores níveis, mid e spread"""
+    return _book_or_error(symbol).snapshot(max(levels, 1))
+
+
+@app.get("/api/orderbook/{symbol}/depth")
+async def get_order_book_depth(symbol: str, price: float):
+    """Quantidade no nível `price` de cada lado"""
+    return {"symbol": symbol.upper(), "price": price, **_book_or_error(symbol).size_at(price)}
+
+
+@app.get("/api/orderbook/{symbol}/slippage")
+async def estimate_slippage(symbol: str, side: Side, qty: float):
+    """Preço médio e slippage estimados de uma ordem a mercado de `qty`"""
+    if qty <= 0:
+        raise HTTPException(status_code=400, detail="qty must be positive")
+    return _book_or_error(symbol).estimate(side.value, qty)
 
 
 @app.get("/api/klines/{symbol}")
 async def get_klines(symbol: str, interval: str = "60", limit: int = 100):
     try:
-        response = await asyncio.to_thread(
-            bybit_client.get_klines,
+        # Closed candles come from the local cache; only the missing tail is downloaded
+        klines = await kline_cache.get_klines(
+            category="linear",
             symbol=symbol,
             interval=interval,
             limit=limit
         )
 
-        if response.get("retCode") != 0:
-            raise HTTPException(status_code=400, detail=response.get("retMsg"))
-
-        result = response.get("result", {})
-        klines_data = result.get("list", [])
-
-        klines = []
-        for k in klines_data:
-            klines.append({
-                "timestamp": int(k[0]),
-                "open": float(k[1]),
-                "high": float(k[2]),
-                "low": float(k[3]),
-                "close": float(k[4]),
-                "volume": float(k[5])
-            })
-
-        klines.reverse()
-
-        return {"klines": klines}
+        return {"klines": klines.to_dicts()}
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
 
 
-@app.post("/api/signal/{symbol}")
-async def generate_signal(symbol: str, interval: str = "60", limit: int = 100):
-    try:
-        klines_response = await get_klines(symbol, interval, limit)
-        klines_data = klines_response["klines"]
+@app.get("/api/strategies")
+async def get_strategies():
+    return {"strategies": [strategy.info() for strategy in list_strategies()]}
 
-        klines = [Kline(**k) for k in klines_data]
 
-        # Run the potentially CPU-bound pandas analysis in a thread to avoid blocking the event loop
-        signal, sma_fast, sma_slow = await asyncio.to_thread(sma_strategy.analyze_with_pandas, klines)
+@app.post("/api/signal/{symbol}")
+async def generate_signal(
+    symbol: str,
+    interval: str = "60",
+    limit: int = 100,
+    mode: str = "incremental",
+    strategy: str = "sma"
+):
+    selected = _strategy_or_404(strategy)
+    try:
+        # Columns straight from the cache, no per-candle objects
+        klines = await kline_cache.get_klines(category="linear", symbol=symbol, interval=interval, limit=limit)
+
+        started = time.perf_counter()
+        if mode == "full":
+            # Run the potentially CPU-bound full recompute in a thread to avoid blocking the event loop
+            result = await asyncio.to_thread(selected.analyze, klines)
+        else:
+            # Only the candles closed since the last call are pushed, cheap enough for the event loop
+            result = selected.evaluate(symbol, interval, klines)
+        strategy_evaluation_duration.observe(
+            time.perf_counter() - started, selected.name, "full" if mode == "full" else "incremental"
+        )
 
-        current_price = klines[-1].close if klines else 0
+        current_price = float(klines.close[-1]) if len(klines) else 0
+        return _signal_result(symbol, selected, result, current_price)
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.get("/api/signals")
+async def generate_signals(
+    symbols: Optional[str] = None,
+    interval: str = "60",
+    limit: int = 100,
+    strategy: str = "sma"
+):
+    """Sinais de uma estratégia para vários símbolos de uma vez"""
+    _strategy_or_404(strategy)
+    symbol_list = [s.strip().upper() for s in symbols.split(",") if s.strip()] if symbols else settings.symbols_list
+    try:
+        return {"signals": await evaluate_signals(strategy, symbol_list, interval, limit)}
+    except Exception as e:
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.get("/api/backtest/{symbol}")
+async def backtest(
+    symbol: str,
+    interval: str = "60",
+    limit: int = 1000,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    fast_period: int = 9,
+    slow_period: int = 21,
+    fee_rate: float = 0.00055,
+    slippage: float = 0.0,
+    long_only: bool = False,
+    trades: int = 50
+):
+    try:
+        candles = None
+        if candle_archive is not None:
+            # The last `limit` archived candles inside start/end, like the cache path
+            candles = candle_archive.range(symbol, interval, start, end)[-limit:]
+            if len(candles) == 0:
+                candles = None
+
+        if candles is None:
+            if start is not None or end is not None:
+                # The kline cache only holds the most recent candles
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"start/end need archived candles for {symbol} {interval} (CANDLE_ARCHIVE_DIR)"
+                )
+            candles = await kline_cache.get_klines(category="linear", symbol=symbol, interval=interval, limit=limit)
+
+        result = await asyncio.to_thread(
+            run_backtest,
+            candles.timestamp,
+            candles.close,
+            fast_period=fast_period,
+            slow_period=slow_period,
+            fee_rate=fee_rate,
+            slippage=slippage,
+            allow_short=not long_only
+        )
 
         return {
             "symbol": symbol,
-            "signal": signal.value,
-            "sma_fast": round(sma_fast, 2),
-            "sma_slow": round(sma_slow, 2),
-            "current_price": round(current_price, 2),
-            "timestamp": datetime.now().isoformat()
+            "interval": interval,
+            "fast_period": fast_period,
+            "slow_period": slow_period,
+            "summary": result.summary(),
+            "trades": result.trade_list(trades)
         }
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Backtest exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.post("/api/scheduler/start")
+async def start_strategy_scheduler(request: Optional[SchedulerStartRequest] = None):
+    symbols = (request and request.symbols) or settings.symbols_list
+    intervals = (request and request.intervals) or settings.scheduler_intervals_list
+    strategies = (request and request.strategies) or settings.scheduler_strategies_list
+    try:
+        strategies = [get_strategy(name).name for name in strategies]
+        strategy_scheduler.start([s.upper() for s in symbols], intervals, strategies)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=str(e.args[0]))
+    return strategy_scheduler.status()
+
+
+@app.post("/api/scheduler/stop")
+async def stop_strategy_scheduler():
+    await strategy_scheduler.stop()
+    return strategy_scheduler.status()
+
+
+@app.get("/api/scheduler/status")
+async def strategy_scheduler_status():
+    return strategy_scheduler.status()
+
+
+def _pipeline_error(result: dict) -> None:
+    """400 when the exchange refused the order; a failed request maps like _error_status (429 when rate limited)"""
+    if result["error"]:
+        if result["error_type"] is None:
+            status = 400
+        else:
+            status = 429 if result["error_type"] == RateLimitExceeded.__name__ else 500
+        raise HTTPException(status_code=status, detail=result["error"])
 
 
 @app.post("/api/order")
 async def create_order(order: OrderRequest):
-    try:
-        response = await asyncio.to_thread(
-            bybit_client.place_order,
-            category="linear",
-            symbol=order.symbol,
-            side=order.side.value,
-            order_type=order.order_type.value,
-            qty=str(order.qty),
-            price=str(order.price) if order.price else None
-        )
+    (result,) = await order_pipeline.place([order.model_dump(mode="json")])
+    _pipeline_error(result)
+    return {
+        "order_id": result["order_id"],
+        "order_link_id": result["order_link_id"],
+        "symbol": order.symbol,
+        "side": order.side.value,
+        "order_type": order.order_type.value,
+        "qty": order.qty,
+        "price": order.price,
+        "status": "created",
+        "created_time": datetime.now().isoformat()
+    }
 
-        if response.get("retCode") != 0:
-            raise HTTPException(status_code=400, detail=response.get("retMsg"))
 
-        result = response.get("result", {})
+@app.delete("/api/order/{symbol}/{order_id}")
+async def cancel_order(symbol: str, order_id: str):
+    (result,) = await order_pipeline.cancel([{"symbol": symbol, "order_id": order_id}])
+    _pipeline_error(result)
+    return {"order_id": order_id, "symbol": symbol, "status": "cancelled"}
 
-        return {
-            "order_id": result.get("orderId"),
-            "symbol": order.symbol,
-            "side": order.side.value,
-            "order_type": order.order_type.value,
-            "qty": order.qty,
-            "price": order.price,
-            "status": "created",
-            "created_time": datetime.now().isoformat()
-        }
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/orders/batch")
+async def create_orders_batch(request: BatchOrderRequest):
+    """Cria várias ordens; a resposta traz o estado de cada uma, na ordem pedida"""
+    results = await order_pipeline.place([order.model_dump(mode="json") for order in request.orders])
+    return {"orders": results, "count": len(results)}
+
+
+@app.post("/api/orders/cancel")
+async def cancel_orders_batch(request: BatchCancelRequest):
+    results = await order_pipeline.cancel([order.model_dump() for order in request.orders])
+    return {"orders": results, "count": len(results)}
+
+
+@app.post("/api/orders/amend")
+async def amend_orders_batch(request: BatchAmendRequest):
+    results = await order_pipeline.amend([order.model_dump() for order in request.orders])
+    return {"orders": results, "count": len(results)}
+
+
+@app.get("/api/orders/pipeline")
+async def order_pipeline_status(recent: int = 50):
+    return order_pipeline.status(recent)
 
 
 @app.get("/api/orders")
 async def get_orders(symbol: Optional[str] = None):
     try:
-        logger.info(f"Getting open orders for symbol: {symbol}")
-        response = await asyncio.to_thread(bybit_client.get_open_orders, category="linear", symbol=symbol)
-        logger.info(f"Orders response retCode: {response.get('retCode')}")
+        response = (
+            account_stream.get_open_orders(category="linear", symbol=symbol)
+            or await exchange_client.get_open_orders(category="linear", symbol=symbol)
+        )
+        log_payload("open_orders", response)
 
         if response.get("retCode") != 0:
             error_msg = response.get("retMsg", "Unknown error")
-            logger.error(f"Orders error: {error_msg}")
+            logger.error("Orders error: %s", error_msg)
             raise HTTPException(status_code=400, detail=error_msg)
 
         result = response.get("result", {})
         orders = []
 
         order_list = result.get("list", [])
-        logger.info(f"Number of orders in response: {len(order_list)}")
 
         for order in order_list:
             orders.append({
@@ -367,16 +773,45 @@ async def get_orders(symbol: Optional[str] = None):
                 "created_time": order.get("createdTime")
             })
 
-        logger.info(f"Returning {len(orders)} orders")
+        logger.debug("Open orders: %d", len(orders))
         return {"orders": orders}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Orders exception: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Orders exception: %s", e, exc_info=True)
+        raise HTTPException(status_code=_error_status(e), detail=str(e))
+
+
+@app.get("/api/executions")
+async def get_executions(symbol: Optional[str] = None, limit: int = 50):
+    """Execuções recentes recebidas pelo WebSocket privado"""
+    if not settings.account_ws or settings.paper_trading:
+        raise HTTPException(status_code=404, detail="Account stream is disabled (ACCOUNT_WS=false)")
+    return {"executions": account_stream.recent_executions(symbol, limit), "stream": account_stream.status()}
+
+
+@app.get("/api/paper")
+async def paper_trading_status(executions: int = 50):
+    if not settings.paper_trading:
+        raise HTTPException(status_code=404, detail="Paper trading is disabled (PAPER_TRADING=false)")
+    return {**paper_exchange.status(), "executions": list(paper_exchange.executions)[-executions:]}
+
+
+@app.post("/api/paper/reset")
+async def reset_paper_trading():
+    if not settings.paper_trading:
+        raise HTTPException(status_code=404, detail="Paper trading is disabled (PAPER_TRADING=false)")
+    paper_exchange.reset()
+    exchange_client.invalidate()
+    return paper_exchange.status()
+
+
+startup_timings["import_seconds"] = round(time.perf_counter() - _import_started, 3)
 
 
 if __name__ == "__main__":
+    import uvicorn
+
     uvicorn.run(
         "app.main:app",
         host="127.0.0.1",
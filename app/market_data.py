@@ -0,0 +1,247 @@
+"""
+Market data pública via WebSocket da Bybit.
+
+Subscribes to ``tickers.{symbol}``, ``kline.{interval}.{symbol}`` and
+optionally ``orderbook.{depth}.{symbol}`` for the configured symbols and
+keeps the latest ticker, forming candle and L2 book in memory. Closed
+candles are handed to the kline cache so ``/api/klines`` no longer needs a
+tail request while the stream is healthy. The connection is
+re-established with exponential backoff and every topic is resubscribed.
+"""
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+import websockets
+
+from app.candles import CandleSeries
+from app.config import settings
+from app.kline_cache import KlineCache, kline_cache
+from app.order_book import OrderBookStore, order_books
+
+logger = logging.getLogger(__name__)
+
+# Bybit accepts at most 10 args per subscribe request
+SUBSCRIBE_BATCH = 10
+
+
+def public_ws_url() -> str:
+    if settings.ws_public_url:
+        return settings.ws_public_url
+    if settings.use_testnet:
+        return "wss://stream-testnet.bybit.com/v5/public/linear"
+    # Demo trading has no public stream of its own, it uses mainnet market data
+    return "wss://stream.bybit.com/v5/public/linear"
+
+
+class MarketDataService:
+    """Estado de mercado em memória alimentado pelo WebSocket público"""
+
+    def __init__(
+        self,
+        url: str,
+        symbols: List[str],
+        intervals: List[str],
+        kline_cache: Optional[KlineCache] = None,
+        order_books: Optional[OrderBookStore] = None,
+        book_depth: int = 0,
+        category: str = "linear",
+        ping_interval: float = 20.0,
+        max_backoff: float = 30.0,
+        stale_after: float = 30.0,
+        record_path: Optional[str] = None
+    ):
+        self.url = url
+        self.symbols = symbols
+        self.intervals = intervals
+        self.kline_cache = kline_cache
+        self.order_books = order_books if book_depth else None
+        self.book_depth = book_depth
+        self.category = category
+        self.ping_interval = ping_interval
+        self.max_backoff = max_backoff
+        self.stale_after = stale_after
+        self.record_path = record_path
+
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.candles: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Called with (symbol, last price) on every ticker update that carries one
+        self.price_listeners: List[Callable[[str, float], None]] = []
+        self._updated: Dict[str, float] = {}
+        self.connected = False
+        self.reconnects = 0
+        self.messages = 0
+        # Frames that could not be parsed or applied; they are skipped, not fatal
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+        self._record: Optional[TextIO] = None
+
+    @property
+    def topics(self) -> List[str]:
+        topics = [f"tickers.{s}" for s in self.symbols] + [
+            f"kline.{i}.{s}" for s in self.symbols for i in self.intervals
+        ]
+        if self.order_books is not None:
+            topics += [f"orderbook.{self.book_depth}.{s}" for s in self.symbols]
+        return topics
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            if self.record_path:
+                self._record = open(self.record_path, "a")
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._record is not None:
+            self._record.close()
+            self._record = None
+        self.connected = False
+
+    async def _run(self) -> None:
+        attempt = 0
+        while True:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    await self._subscribe(ws)
+                    self.connected = True
+                    attempt = 0
+                    logger.info("Market data stream connected to %s (%s topics)", self.url, len(self.topics))
+                    pinger = asyncio.create_task(self._ping(ws))
+                    try:
+                        async for raw in ws:
+                            self.handle_message(raw)
+                    finally:
+                        pinger.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Market data stream error: %s", e)
+            self.connected = False
+            if self.order_books is not None:
+                # Deltas missed while disconnected: wait for the snapshot sent on resubscribe
+                self.order_books.invalidate()
+            self.reconnects += 1
+            delay = min(2 ** attempt, self.max_backoff)
+            attempt += 1
+            logger.info("Reconnecting market data stream in %ss", delay)
+            await asyncio.sleep(delay)
+
+    async def _subscribe(self, ws) -> None:
+        topics = self.topics
+        for i in range(0, len(topics), SUBSCRIBE_BATCH):
+            await ws.send(json.dumps({"op": "subscribe", "args": topics[i:i + SUBSCRIBE_BATCH]}))
+
+    async def _ping(self, ws) -> None:
+        # Bybit drops connections without an application level ping every 20s
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send(json.dumps({"op": "ping"}))
+
+    def handle_message(self, raw: str) -> None:
+        """Aplica uma mensagem do stream ao estado em memória"""
+        if self._record is not None:
+            self._record.write(raw if raw.endswith("\n") else raw + "\n")
+        try:
+            self._dispatch(json.loads(raw))
+        except Exception:
+            # One bad frame must not drop the connection (and with it every order book)
+            self.errors += 1
+            logger.exception("Skipping market data message: %r", raw[:200])
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        topic = message.get("topic")
+        if not topic:
+            if message.get("op") == "subscribe" and not message.get("success", True):
+                logger.error("Market data subscribe failed: %s", message.get('ret_msg'))
+            return
+
+        self.messages += 1
+        if topic.startswith("tickers."):
+            self._on_ticker(message)
+        elif topic.startswith("kline."):
+            self._on_kline(topic, message)
+        elif topic.startswith("orderbook.") and self.order_books is not None:
+            self.order_books.handle(topic, message)
+
+    def _on_ticker(self, message: Dict[str, Any]) -> None:
+        data = message.get("data", {})
+        symbol = data.get("symbol")
+        if not symbol:
+            return
+        # Linear tickers arrive as a snapshot followed by deltas with only the changed fields
+        if message.get("type") == "snapshot" or symbol not in self.tickers:
+            self.tickers[symbol] = dict(data)
+        else:
+            self.tickers[symbol].update(data)
+        self.tickers[symbol]["ts"] = message.get("ts")
+        self._updated[symbol] = time.monotonic()
+        if "lastPrice" in data:
+            price = float(data["lastPrice"])
+            for listener in self.price_listeners:
+                try:
+                    listener(symbol, price)
+                except Exception:
+                    self.errors += 1
+                    logger.exception("Price listener failed for %s", symbol)
+
+    def _on_kline(self, topic: str, message: Dict[str, Any]) -> None:
+        _, interval, symbol = topic.split(".", 2)
+        for k in message.get("data", []):
+            kline = {
+                "timestamp": int(k["start"]),
+                "open": float(k["open"]),
+                "high": float(k["high"]),
+                "low": float(k["low"]),
+                "close": float(k["close"]),
+                "volume": float(k["volume"])
+            }
+            confirmed = bool(k.get("confirm"))
+            if not confirmed:
+                self.candles[(symbol, interval)] = kline
+            if self.kline_cache is not None:
+                self.kline_cache.apply_stream(
+                    self.category, symbol, interval, CandleSeries.from_dicts([kline]), confirmed
+                )
+
+    def is_fresh(self, symbol: str) -> bool:
+        updated = self._updated.get(symbol)
+        return self.connected and updated is not None and time.monotonic() - updated < self.stale_after
+
+    def get_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Último preço do stream, ou None se ausente/desatualizado"""
+        if not self.is_fresh(symbol):
+            return None
+        ticker = self.tickers[symbol]
+        return {
+            "symbol": symbol,
+            "price": float(ticker.get("lastPrice", 0)),
+            "timestamp": int(ticker.get("ts") or 0)
+        }
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self.connected,
+            "reconnects": self.reconnects,
+            "messages": self.messages,
+            "errors": self.errors,
+            "topics": len(self.topics),
+            "fresh_symbols": [s for s in self.symbols if self.is_fresh(s)]
+        }
+
+
+market_data = MarketDataService(
+    public_ws_url(),
+    settings.symbols_list,
+    settings.ws_intervals_list,
+    kline_cache=kline_cache,
+    order_books=order_books,
+    book_depth=settings.ws_orderbook_depth,
+    record_path=settings.ws_record_path or None
+)
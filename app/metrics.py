@@ -0,0 +1,282 @@
+"""
+Métricas no formato de texto do Prometheus, servidas em /metrics.
+
+Counters, gauges and histograms keep plain floats and per-bucket integer
+counts per label tuple, so recording is a dict lookup and an increment.
+Cumulative buckets, cache ratios and other derived values are computed
+only when /metrics is scraped. Gauges can take a ``collect`` callback to
+read a value owned by another component at scrape time.
+"""
+import asyncio
+import bisect
+import logging
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Labels, float]
+
+# Seconds; covers cache hits (sub-ms) up to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric(ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+
+    @abstractmethod
+    def samples(self) -> Iterator[Sample]:
+        """(nome, labels formatados, valor) de cada série"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        labels: Sequence[str] = (),
+        collect: Optional[Callable[[], Union[float, Dict[Labels, float]]]] = None
+    ):
+        super().__init__(name, description, labels)
+        self._values: Dict[Labels, float] = {}
+        # Read at scrape time: a number, or {label tuple: number} for labelled gauges
+        self.collect = collect
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[labels] = value
+
+    def samples(self) -> Iterator[Sample]:
+        values = dict(self._values)
+        if self.collect is not None:
+            try:
+                collected = self.collect()
+            except Exception as e:
+                logger.warning("Metric %s collection failed: %s", self.name, e)
+                collected = {}
+            values.update(collected if isinstance(collected, dict) else {(): collected})
+        for labels, value in values.items():
+            if value is not None:
+                yield self.name, _format_labels(self.labels, labels), value
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Labels, _HistogramChild] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = _HistogramChild(len(self.buckets) + 1)
+        # Per-bucket counts; the cumulative `le` series is built when scraped
+        child.counts[bisect.bisect_left(self.buckets, value)] += 1
+        child.sum += value
+        child.count += 1
+
+    def samples(self) -> Iterator[Sample]:
+        for labels, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket", _format_labels(self.labels, labels, le), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labels, labels), child.sum
+            yield f"{self.name}_count", _format_labels(self.labels, labels), child.count
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, description, labels))
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = (), collect=None) -> Gauge:
+        return self._add(Gauge(self.prefix + name, description, labels, collect))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(self.prefix + name, description, labels, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing each request by route template (``/api/signal/{symbol}``,
+    not the concrete path) so label cardinality stays bounded.
+    """
+
+    def __init__(self, app, latency: Optional[Histogram] = None, requests: Optional[Counter] = None):
+        self.app = app
+        self.latency = latency or http_request_duration
+        self.requests = requests or http_requests
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            self.latency.observe(time.perf_counter() - started, method, path)
+            self.requests.inc(method, path, str(status))
+
+
+class LoopLagMonitor:
+    """Mede o atraso do event loop: quanto um sleep de `interval` passa do previsto"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(self.last_lag)
+
+
+def _thread_pool_state() -> Dict[Labels, float]:
+    """Fila e threads do executor padrão usado por asyncio.to_thread"""
+    try:
+        executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    except RuntimeError:
+        return {}
+    if executor is None:
+        return {("queued",): 0, ("threads",): 0}
+    queue = getattr(executor, "_work_queue", None)
+    return {
+        ("queued",): queue.qsize() if queue is not None else 0,
+        ("threads",): len(getattr(executor, "_threads", ()))
+    }
+
+
+metrics = MetricsRegistry(prefix="bot_")
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_requests = metrics.counter(
+    "http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+)
+upstream_request_duration = metrics.histogram(
+    "upstream_request_duration_seconds", "Bybit REST latency by endpoint", ("endpoint",)
+)
+upstream_errors = metrics.counter(
+    "upstream_errors_total", "Failed Bybit REST calls by endpoint and reason", ("endpoint", "reason")
+)
+strategy_evaluation_duration = metrics.histogram(
+    "strategy_evaluation_duration_seconds", "Strategy evaluation time", ("strategy", "mode")
+)
+event_loop_lag = metrics.histogram(
+    "event_loop_lag_seconds", "Delay of the event loop waking up from a sleep",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+thread_pool = metrics.gauge(
+    "thread_pool", "Default executor queue depth and thread count", ("state",), collect=_thread_pool_state
+)
+loop_lag_monitor = LoopLagMonitor()
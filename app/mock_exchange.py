@@ -0,0 +1,486 @@
+"""
+Servidor local que imita a API v5 da Bybit para testes offline.
+
+Implements the endpoints the bot calls (market time, kline and tickers,
+position list, order create/amend/cancel (single and batch) and realtime,
+wallet balance and account info). Market data is synthetic but deterministic: prices are a smooth
+function of time per symbol, so klines for any range and interval are
+consistent across requests. Orders, positions and balances go through the
+paper trading matching engine, fed with the synthetic price. A private
+WebSocket (``/v5/private``: auth, subscribe, ping) pushes the engine's
+``order``, ``execution``, ``position`` and ``wallet`` updates.
+
+Latency (mean and jitter), random failures (HTTP 500 or a retCode) and
+per-group rate limits with Bybit's ``X-Bapi-Limit-*`` headers can be
+configured. Point the bot at it with ``MOCK_EXCHANGE_URL``:
+
+    python -m app.mock_exchange --port 8090 --latency 40 --jitter 15 --error-rate 0.01 --rate 20
+    MOCK_EXCHANGE_URL=http://127.0.0.1:8090 BYBIT_API_KEY=x BYBIT_API_SECRET=y python run.py
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import math
+import random
+import time
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+import numpy as np
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+
+from app.kline_cache import INTERVAL_MS
+from app.paper_trading import PaperExchange
+from app.rate_limiter import RATE_LIMIT_RET_CODE, RateLimiter, RateLimitExceeded
+
+logger = logging.getLogger(__name__)
+
+BASE_PRICES = {
+    "BTCUSDT": 60000.0,
+    "ETHUSDT": 3000.0,
+    "BNBUSDT": 550.0,
+    "SOLUSDT": 150.0,
+    "XRPUSDT": 0.6,
+}
+
+PRIVATE_PREFIXES = ("/v5/order", "/v5/position", "/v5/account")
+# Injected failures use Bybit's generic server error code
+SERVER_ERROR_RET_CODE = 10016
+INVALID_KEY_RET_CODE = 10003
+INVALID_SIGN_RET_CODE = 10004
+
+
+def _noise(x: np.ndarray) -> np.ndarray:
+    """Pseudo-random in [0, 1) that only depends on x"""
+    return np.modf(np.abs(np.sin(x * 12.9898) * 43758.5453))[0]
+
+
+class SyntheticMarket:
+    """Deterministic prices: a few sine waves of different periods around a base price"""
+
+    def __init__(self, symbols: List[str]):
+        self.symbols = list(dict.fromkeys(symbols + list(BASE_PRICES)))
+
+    @staticmethod
+    def _base(symbol: str) -> float:
+        return BASE_PRICES.get(symbol, 1.0 + zlib.crc32(symbol.encode()) % 1000)
+
+    def prices(self, symbol: str, timestamps: np.ndarray) -> np.ndarray:
+        phase = (zlib.crc32(symbol.encode()) % 1000) / 1000 * 2 * math.pi
+        hours = np.asarray(timestamps, dtype=np.float64) / 3_600_000
+        wave = (
+            0.04 * np.sin(hours * 2 * math.pi / 168 + phase)
+            + 0.01 * np.sin(hours * 2 * math.pi / 24 + 2 * phase)
+            + 0.003 * np.sin(hours * 2 * math.pi * 4 + 3 * phase)
+        )
+        return self._base(symbol) * (1 + wave)
+
+    def price(self, symbol: str, now_ms: Optional[int] = None) -> float:
+        now_ms = int(time.time() * 1000) if now_ms is None else now_ms
+        return float(self.prices(symbol, np.array([now_ms]))[0])
+
+    def klines(self, symbol: str, interval: str, start: Optional[int], end: Optional[int], limit: int) -> List[List[str]]:
+        """Lista no formato da Bybit: mais recente primeiro, campos como strings"""
+        step = INTERVAL_MS.get(interval, 30 * 86_400_000)
+        now = int(time.time() * 1000)
+        last = min(end if end is not None else now, now) // step * step
+        first = last - (limit - 1) * step
+        if start is not None:
+            first = max(first, -(-start // step) * step)
+        if first > last:
+            return []
+        opens_at = np.arange(last, first - 1, -step, dtype=np.int64)
+        closes_at = np.minimum(opens_at + step, now)
+        open_ = self.prices(symbol, opens_at)
+        close = self.prices(symbol, closes_at)
+        wiggle = 0.002 * _noise(opens_at / step + len(symbol))
+        high = np.maximum(open_, close) * (1 + wiggle)
+        low = np.minimum(open_, close) * (1 - wiggle)
+        volume = 10 + 1000 * _noise(opens_at / step + 7.0) * (step / 60_000) ** 0.5
+        columns = [opens_at.astype(str)] + [np.char.mod("%.10g", c) for c in (open_, high, low, close, volume, volume * close)]
+        return np.stack(columns, axis=1).tolist()
+
+    def ticker(self, symbol: str) -> Dict[str, str]:
+        now = int(time.time() * 1000)
+        price = self.price(symbol, now)
+        day_ago = self.price(symbol, now - 86_400_000)
+        return {
+            "symbol": symbol,
+            "lastPrice": f"{price:.6g}",
+            "markPrice": f"{price:.6g}",
+            "indexPrice": f"{price:.6g}",
+            "bid1Price": f"{price * 0.9999:.6g}",
+            "ask1Price": f"{price * 1.0001:.6g}",
+            "prevPrice24h": f"{day_ago:.6g}",
+            "price24hPcnt": f"{price / day_ago - 1:.6f}",
+            "volume24h": "100000",
+        }
+
+    def orderbook_messages(
+        self,
+        symbol: str,
+        updates: int,
+        depth: int = 50,
+        snapshot_every: int = 0,
+        start_ms: int = 1_700_000_000_000,
+        seed: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Feed ``orderbook.{depth}.{symbol}`` como o do WebSocket público: um snapshot
+        e `updates` deltas de 1 a 4 níveis, 10ms entre eles. With `snapshot_every`
+        a full snapshot of the true book is repeated every N deltas, so a
+        replay can check the book it rebuilt.
+        """
+        rng = random.Random(zlib.crc32(symbol.encode()) if seed is None else seed)
+        base = self.price(symbol, start_ms)
+        decimals = max(1, 5 - int(math.log10(base)))
+        tick = 10.0 ** -decimals
+        center = int(base / tick)
+        topic = f"orderbook.{depth}.{symbol}"
+
+        def size() -> str:
+            return f"{rng.uniform(0.001, 5):.3f}"
+
+        def levels(side: Dict[int, str], bid: bool) -> List[List[str]]:
+            return [[f"{i * tick:.{decimals}f}", side[i]] for i in sorted(side, reverse=bid)]
+
+        def message(kind: str, ts: int, update_id: int, bids: List[List[str]], asks: List[List[str]]) -> Dict[str, Any]:
+            data = {"s": symbol, "b": bids, "a": asks, "u": update_id, "seq": update_id * 3}
+            return {"topic": topic, "type": kind, "ts": ts, "data": data, "cts": ts - 2}
+
+        # Tick index -> size string, the truth the messages describe
+        book = {True: {center - 1 - i: size() for i in range(depth)}, False: {center + 1 + i: size() for i in range(depth)}}
+        yield message("snapshot", start_ms, 1, levels(book[True], True), levels(book[False], False))
+        for n in range(1, updates + 1):
+            changes: Dict[bool, List[List[str]]] = {True: [], False: []}
+            for _ in range(rng.randint(1, 4)):
+                bid = rng.random() < 0.5
+                side = book[bid]
+                action = rng.random()
+                if action < 0.6:
+                    index = rng.choice(list(side))
+                elif action < 0.7 and len(side) > 1:
+                    index = rng.choice(list(side))
+                    del side[index]
+                    changes[bid].append([f"{index * tick:.{decimals}f}", "0"])
+                    continue
+                else:
+                    # New level near the touch, never crossing the other side
+                    offset = 1 + int(rng.expovariate(4.0 / depth))
+                    index = min(book[False]) - offset if bid else max(book[True]) + offset
+                side[index] = size()
+                changes[bid].append([f"{index * tick:.{decimals}f}", side[index]])
+                if len(side) > depth:
+                    worst = min(side) if bid else max(side)
+                    del side[worst]
+                    changes[bid].append([f"{worst * tick:.{decimals}f}", "0"])
+            ts = start_ms + n * 10
+            yield message("delta", ts, n + 1, changes[True], changes[False])
+            if snapshot_every and n % snapshot_every == 0:
+                yield message("snapshot", ts, n + 1, levels(book[True], True), levels(book[False], False))
+
+
+class MockConfig:
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        http_error_share: float = 0.5,
+        rate_limits: Optional[Dict[str, float]] = None,
+        api_secret: Optional[str] = None,
+        symbols: Optional[List[str]] = None,
+        initial_balance: float = 10000.0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Share of requests that fail; of those, `http_error_share` are HTTP 500, the rest a retCode
+        self.error_rate = error_rate
+        self.http_error_share = http_error_share
+        self.rate_limits = rate_limits
+        # When set, private requests must carry a valid HMAC signature for any key
+        self.api_secret = api_secret
+        self.symbols = symbols or list(BASE_PRICES)
+        self.initial_balance = initial_balance
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI(title="Mock Bybit v5")
+    market = SyntheticMarket(config.symbols)
+    engine = PaperExchange(None, initial_balance=config.initial_balance)
+    limiter = RateLimiter(config.rate_limits, max_wait=0.0) if config.rate_limits else None
+    stats = {"requests": 0, "rate_limited": 0, "errors_injected": 0}
+    app.state.engine = engine
+    app.state.stats = stats
+
+    def reply(result: Dict[str, Any], ret_code: int = 0, ret_msg: str = "OK", headers=None, status: int = 200):
+        body = {"retCode": ret_code, "retMsg": ret_msg, "result": result, "retExtInfo": {}, "time": int(time.time() * 1000)}
+        return JSONResponse(body, status_code=status, headers=headers)
+
+    def refresh_prices(symbol: Optional[str] = None) -> None:
+        now = int(time.time() * 1000)
+        for name in set(engine.prices) | ({symbol} if symbol else set()):
+            engine.on_price(name, market.price(name, now))
+
+    def check_signature(request: Request, payload: str) -> Optional[JSONResponse]:
+        key = request.headers.get("X-BAPI-API-KEY")
+        sign = request.headers.get("X-BAPI-SIGN")
+        if not key or not sign:
+            return reply({}, INVALID_KEY_RET_CODE, "API key is invalid.")
+        if config.api_secret is not None:
+            prehash = (
+                request.headers.get("X-BAPI-TIMESTAMP", "") + key
+                + request.headers.get("X-BAPI-RECV-WINDOW", "") + payload
+            )
+            expected = hmac.new(config.api_secret.encode(), prehash.encode(), hashlib.sha256).hexdigest()
+            if not hmac.compare_digest(expected, sign):
+                return reply({}, INVALID_SIGN_RET_CODE, "error sign! origin_string[...]")
+        return None
+
+    @app.middleware("http")
+    async def exchange_behaviour(request: Request, call_next):
+        stats["requests"] += 1
+        path = request.url.path
+        if config.latency_ms or config.jitter_ms:
+            await asyncio.sleep(max(0.0, random.gauss(config.latency_ms, config.jitter_ms)) / 1000)
+
+        headers = {}
+        if limiter is not None:
+            bucket = limiter.buckets[RateLimiter.group_for(path)]
+            try:
+                bucket.reserve(0.0)
+            except RateLimitExceeded:
+                stats["rate_limited"] += 1
+                reset = int(time.time() * 1000 + 1000 / bucket.rate)
+                return reply({}, RATE_LIMIT_RET_CODE, "Too many visits!", headers={
+                    "X-Bapi-Limit": str(int(bucket.rate)),
+                    "X-Bapi-Limit-Status": "0",
+                    "X-Bapi-Limit-Reset-Timestamp": str(reset)
+                })
+            headers = {
+                "X-Bapi-Limit": str(int(bucket.rate)),
+                "X-Bapi-Limit-Status": str(max(0, int(bucket.tokens))),
+                "X-Bapi-Limit-Reset-Timestamp": str(int(time.time() * 1000 + 1000))
+            }
+
+        if config.error_rate and random.random() < config.error_rate:
+            stats["errors_injected"] += 1
+            if random.random() < config.http_error_share:
+                return JSONResponse({"error": "injected failure"}, status_code=500)
+            return reply({}, SERVER_ERROR_RET_CODE, "Server error (injected)")
+
+        if path.startswith(PRIVATE_PREFIXES):
+            payload = request.url.query if request.method == "GET" else (await request.body()).decode()
+            rejected = check_signature(request, payload)
+            if rejected is not None:
+                return rejected
+
+        response = await call_next(request)
+        response.headers.update(headers)
+        return response
+
+    @app.get("/v5/market/time")
+    async def server_time():
+        now = time.time()
+        return reply({"timeSecond": str(int(now)), "timeNano": str(int(now * 1e9))})
+
+    @app.get("/v5/market/kline")
+    async def kline(
+        symbol: str,
+        interval: str,
+        category: str = "linear",
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: int = 200
+    ):
+        rows = market.klines(symbol, interval, start, end, max(1, min(limit, 1000)))
+        return reply({"category": category, "symbol": symbol, "list": rows})
+
+    @app.get("/v5/market/tickers")
+    async def tickers(category: str = "linear", symbol: Optional[str] = None):
+        symbols = [symbol] if symbol else market.symbols
+        return reply({"category": category, "list": [market.ticker(s) for s in symbols]})
+
+    @app.get("/v5/position/list")
+    async def position_list(category: str = "linear", symbol: Optional[str] = None):
+        refresh_prices(symbol)
+        return await engine.get_positions(category, symbol)
+
+    @app.get("/v5/order/realtime")
+    async def open_orders(
+        category: str = "linear", symbol: Optional[str] = None, limit: Optional[int] = None, cursor: Optional[str] = None
+    ):
+        refresh_prices(symbol)
+        return await engine.get_open_orders(category, symbol, limit=limit, cursor=cursor)
+
+    @app.post("/v5/order/create")
+    async def create_order(request: Request):
+        params = json.loads(await request.body() or b"{}")
+        symbol = params.get("symbol", "")
+        refresh_prices(symbol)
+        return await engine.place_order(
+            params.get("category", "linear"),
+            symbol,
+            params.get("side", ""),
+            params.get("orderType", ""),
+            params.get("qty", "0"),
+            price=params.get("price"),
+            time_in_force=params.get("timeInForce", "GTC"),
+            order_link_id=params.get("orderLinkId")
+        )
+
+    @app.post("/v5/order/amend")
+    async def amend_order(request: Request):
+        params = json.loads(await request.body() or b"{}")
+        symbol = params.get("symbol", "")
+        refresh_prices(symbol)
+        return await engine.amend_order(
+            params.get("category", "linear"), symbol, params.get("orderId", ""),
+            qty=params.get("qty"), price=params.get("price")
+        )
+
+    async def batch(request: Request, call, limit: int = 20):
+        params = json.loads(await request.body() or b"{}")
+        orders = params.get("request", [])
+        if not orders or len(orders) > limit:
+            return reply({}, 10001, f"batch size must be between 1 and {limit}")
+        for symbol in {o.get("symbol") for o in orders if o.get("symbol")}:
+            refresh_prices(symbol)
+        return await call(params.get("category", "linear"), orders)
+
+    @app.post("/v5/order/create-batch")
+    async def create_batch(request: Request):
+        return await batch(request, engine.place_orders_batch)
+
+    @app.post("/v5/order/amend-batch")
+    async def amend_batch(request: Request):
+        return await batch(request, engine.amend_orders_batch)
+
+    @app.post("/v5/order/cancel-batch")
+    async def cancel_batch(request: Request):
+        return await batch(request, engine.cancel_orders_batch)
+
+    @app.post("/v5/order/cancel")
+    async def cancel_order(request: Request):
+        params = json.loads(await request.body() or b"{}")
+        return await engine.cancel_order(params.get("category", "linear"), params.get("symbol", ""), params.get("orderId", ""))
+
+    @app.get("/v5/account/wallet-balance")
+    async def wallet_balance(accountType: str = "UNIFIED", coin: Optional[str] = None):
+        refresh_prices()
+        return await engine.get_wallet_balance(accountType, coin)
+
+    @app.get("/v5/account/info")
+    async def account_info():
+        return await engine.get_account_info()
+
+    # Private stream: one event queue per authenticated connection
+    streams: Set[asyncio.Queue] = set()
+
+    def on_engine_event(topic: str, data: Dict[str, Any]) -> None:
+        for events in streams:
+            events.put_nowait((topic, data))
+
+    engine.listeners.append(on_engine_event)
+
+    def check_ws_auth(args: List[Any]) -> bool:
+        if len(args) != 3 or not args[0]:
+            return False
+        key, expires, sign = args
+        if int(expires) < time.time() * 1000:
+            return False
+        if config.api_secret is None:
+            return True
+        expected = hmac.new(config.api_secret.encode(), f"GET/realtime{expires}".encode(), hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, str(sign))
+
+    async def push(ws: WebSocket, events: asyncio.Queue, topics: Set[str]) -> None:
+        # All sends go through here so acks and updates never interleave mid-frame
+        while True:
+            topic, data = await events.get()
+            if topic == "reply":
+                await ws.send_text(json.dumps(data))
+                continue
+            now = int(time.time() * 1000)
+            updates = []
+            if topic in topics:
+                updates.append((topic, [{"category": "linear", **data}]))
+            if topic == "execution" and "position" in topics:
+                positions = (await engine.get_positions("linear", data["symbol"]))["result"]["list"]
+                # The stream names the average price entryPrice
+                updates.append(("position", [{"category": "linear", "entryPrice": p["avgPrice"], **p} for p in positions]))
+            if topic == "order" and "wallet" in topics:
+                updates.append(("wallet", (await engine.get_wallet_balance())["result"]["list"]))
+            for name, items in updates:
+                message = {"id": f"{name}-{now}", "topic": name, "creationTime": now, "data": items}
+                await ws.send_text(json.dumps(message))
+
+    @app.websocket("/v5/private")
+    async def private_stream(ws: WebSocket):
+        await ws.accept()
+        events: asyncio.Queue = asyncio.Queue()
+        topics: Set[str] = set()
+        sender = asyncio.create_task(push(ws, events, topics))
+        try:
+            while True:
+                request = json.loads(await ws.receive_text())
+                op = request.get("op")
+                if op == "auth":
+                    ok = check_ws_auth(request.get("args", []))
+                    if ok:
+                        streams.add(events)
+                    events.put_nowait(("reply", {"success": ok, "ret_msg": "" if ok else "Params Error", "op": "auth"}))
+                elif op == "subscribe":
+                    ok = events in streams
+                    if ok:
+                        topics.update(request.get("args", []))
+                    events.put_nowait(("reply", {"success": ok, "ret_msg": "" if ok else "Request not authorized", "op": "subscribe"}))
+                elif op == "ping":
+                    events.put_nowait(("reply", {"success": True, "ret_msg": "pong", "op": "ping"}))
+        except WebSocketDisconnect:
+            pass
+        finally:
+            streams.discard(events)
+            sender.cancel()
+
+    @app.get("/mock/stats")
+    async def mock_stats():
+        return {**stats, "streams": len(streams), "engine": engine.status()}
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Servidor mock da API v5 da Bybit")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", type=float, default=0.0, help="Latência média em ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Desvio padrão da latência em ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de requisições que falham")
+    parser.add_argument("--rate", type=float, help="Requisições/s por grupo (market, order, account)")
+    parser.add_argument("--api-secret", help="Valida assinaturas HMAC com este secret")
+    parser.add_argument("--symbols", default=",".join(BASE_PRICES))
+    parser.add_argument("--balance", type=float, default=10000.0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    config = MockConfig(
+        latency_ms=args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        rate_limits={group: args.rate for group in ("market", "order", "account")} if args.rate else None,
+        api_secret=args.api_secret,
+        symbols=[s.strip().upper() for s in args.symbols.split(",") if s.strip()],
+        initial_balance=args.balance
+    )
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
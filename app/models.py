@@ -28,6 +28,30 @@ class OrderRequest(BaseModel):
     price: Optional[float] = Field(None, description="Price for limit orders", gt=0)
     
 
+class BatchOrderRequest(BaseModel):
+    orders: List[OrderRequest] = Field(..., description="Orders to place, sent in batches", min_length=1)
+
+
+class OrderCancel(BaseModel):
+    symbol: str = Field(..., description="Trading symbol (e.g., BTCUSDT)")
+    order_id: str = Field(..., description="Exchange order id")
+
+
+class BatchCancelRequest(BaseModel):
+    orders: List[OrderCancel] = Field(..., description="Orders to cancel, sent in batches", min_length=1)
+
+
+class OrderAmend(BaseModel):
+    symbol: str = Field(..., description="Trading symbol (e.g., BTCUSDT)")
+    order_id: str = Field(..., description="Exchange order id")
+    qty: Optional[float] = Field(None, description="New quantity", gt=0)
+    price: Optional[float] = Field(None, description="New limit price", gt=0)
+
+
+class BatchAmendRequest(BaseModel):
+    orders: List[OrderAmend] = Field(..., description="Orders to amend, sent in batches", min_length=1)
+
+
 class OrderResponse(BaseModel):
     order_id: str
     symbol: str
@@ -80,6 +104,12 @@ class SignalResponse(BaseModel):
     timestamp: str
 
 
+class SchedulerStartRequest(BaseModel):
+    symbols: Optional[List[str]] = Field(None, description="Symbols to run (default: configured symbols)")
+    intervals: Optional[List[str]] = Field(None, description="Kline intervals to run (default: SCHEDULER_INTERVALS)")
+    strategies: Optional[List[str]] = Field(None, description="Strategies to run (default: SCHEDULER_STRATEGIES)")
+
+
 class AccountInfo(BaseModel):
     uid: str
     account_type: str
@@ -0,0 +1,315 @@
+"""
+Livro de ofertas L2 local a partir do WebSocket público.
+
+Bybit's ``orderbook.{depth}.{symbol}`` topic sends a snapshot followed by
+deltas carrying only the changed levels (size "0" removes a level). Each
+side keeps a sorted list of price keys next to a price -> size dict:
+finding a level is a binary search, the best price and the top N levels are
+a slice away, and memory only moves when a level appears or disappears.
+Books are invalidated when the stream drops and become ready again with the
+next snapshot.
+
+A recording (``WS_RECORD_PATH``) or a synthetic feed can be replayed and
+checked against its own snapshots, which also reports the update rate:
+
+    python -m app.order_book recording.jsonl --symbol BTCUSDT
+    python -m app.order_book --synthetic 200000 --snapshot-every 5000
+"""
+import argparse
+import json
+import sys
+import time
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Level = Tuple[float, float]
+
+
+class BookSide:
+    """Um lado do livro: chaves ordenadas a partir do melhor preço"""
+
+    __slots__ = ("bid", "_keys", "sizes")
+
+    def __init__(self, bid: bool):
+        self.bid = bid
+        # Ascending from the best level: bids are stored as -price
+        self._keys: List[float] = []
+        self.sizes: Dict[float, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def clear(self) -> None:
+        self._keys.clear()
+        self.sizes.clear()
+
+    def update(self, levels: Iterable[List[str]]) -> None:
+        keys, sizes = self._keys, self.sizes
+        sign = -1.0 if self.bid else 1.0
+        for raw_price, raw_size in levels:
+            price = float(raw_price)
+            size = float(raw_size)
+            if size > 0:
+                if price not in sizes:
+                    insort(keys, sign * price)
+                sizes[price] = size
+            elif sizes.pop(price, None) is not None:
+                del keys[bisect_left(keys, sign * price)]
+
+    def trim(self, max_levels: int) -> None:
+        """Descarta os níveis piores que os `max_levels` melhores"""
+        sign = -1.0 if self.bid else 1.0
+        while len(self._keys) > max_levels:
+            del self.sizes[sign * self._keys.pop()]
+
+    def best(self) -> Optional[Level]:
+        if not self._keys:
+            return None
+        price = -self._keys[0] if self.bid else self._keys[0]
+        return price, self.sizes[price]
+
+    def levels(self, n: Optional[int] = None) -> List[Level]:
+        sign = -1.0 if self.bid else 1.0
+        return [(sign * key, self.sizes[sign * key]) for key in self._keys[:n]]
+
+    def walk(self, qty: float) -> Tuple[float, float, Optional[float], int]:
+        """Consome `qty` a partir do melhor nível: (executado, custo, pior preço, níveis usados)"""
+        sign = -1.0 if self.bid else 1.0
+        filled = cost = 0.0
+        worst = None
+        used = 0
+        for key in self._keys:
+            if filled >= qty:
+                break
+            price = sign * key
+            take = min(self.sizes[price], qty - filled)
+            filled += take
+            cost += take * price
+            worst = price
+            used += 1
+        return filled, cost, worst, used
+
+
+class OrderBook:
+    def __init__(self, symbol: str, max_levels: Optional[int] = None):
+        self.symbol = symbol
+        self.max_levels = max_levels
+        self.bids = BookSide(bid=True)
+        self.asks = BookSide(bid=False)
+        self.ready = False
+        self.update_id: Optional[int] = None
+        self.seq: Optional[int] = None
+        self.ts: Optional[int] = None
+        self.updates = 0
+        # Deltas whose update id did not follow the previous one
+        self.gaps = 0
+
+    def apply(self, message: Dict[str, Any]) -> bool:
+        """Aplica um snapshot ou delta; False quando a mensagem foi ignorada"""
+        data = message.get("data", {})
+        update_id = data.get("u")
+        # u == 1 is a snapshot sent after a restart on Bybit's side, whatever the type says
+        if message.get("type") == "snapshot" or update_id == 1:
+            self.bids.clear()
+            self.asks.clear()
+            self.ready = True
+        elif not self.ready:
+            return False
+        elif update_id is not None and self.update_id is not None:
+            if update_id <= self.update_id:
+                return False
+            if update_id != self.update_id + 1:
+                self.gaps += 1
+
+        self.bids.update(data.get("b", ()))
+        self.asks.update(data.get("a", ()))
+        if self.max_levels:
+            self.bids.trim(self.max_levels)
+            self.asks.trim(self.max_levels)
+        self.update_id = update_id
+        self.seq = data.get("seq", self.seq)
+        self.ts = message.get("ts", self.ts)
+        self.updates += 1
+        return True
+
+    def best_bid(self) -> Optional[Level]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[Level]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        return (bid[0] + ask[0]) / 2 if bid and ask else None
+
+    def spread(self) -> Optional[float]:
+        bid, ask = self.bids.best(), self.asks.best()
+        return ask[0] - bid[0] if bid and ask else None
+
+    def crossed(self) -> bool:
+        spread = self.spread()
+        return spread is not None and spread <= 0
+
+    def size_at(self, price: float) -> Dict[str, float]:
+        return {"bid": self.bids.sizes.get(price, 0.0), "ask": self.asks.sizes.get(price, 0.0)}
+
+    def estimate(self, side: str, qty: float) -> Dict[str, Any]:
+        """
+        Preço médio de uma ordem a mercado de `qty` varrendo o lado oposto
+        do livro, e o slippage em relação ao mid.
+        """
+        book_side = self.asks if side == "Buy" else self.bids
+        filled, cost, worst, used = book_side.walk(qty)
+        mid = self.mid()
+        average = cost / filled if filled else None
+        slippage = None
+        if average is not None and mid:
+            # Positive = paid worse than mid
+            slippage = (average - mid) / mid * 1e4 * (1 if side == "Buy" else -1)
+        return {
+            "symbol": self.symbol,
+            "side": side,
+            "qty": qty,
+            "filled": filled,
+            "complete": filled >= qty,
+            "avg_price": average,
+            "worst_price": worst,
+            "mid": mid,
+            "slippage_bps": slippage,
+            "levels": used
+        }
+
+    def snapshot(self, levels: Optional[int] = 20) -> Dict[str, Any]:
+        bid, ask = self.bids.best(), self.asks.best()
+        mid, spread = self.mid(), self.spread()
+        return {
+            "symbol": self.symbol,
+            "bids": self.bids.levels(levels),
+            "asks": self.asks.levels(levels),
+            "best_bid": bid[0] if bid else None,
+            "best_ask": ask[0] if ask else None,
+            "mid": mid,
+            "spread": spread,
+            "spread_bps": spread / mid * 1e4 if mid else None,
+            "update_id": self.update_id,
+            "ts": self.ts
+        }
+
+
+class OrderBookStore:
+    """Livros por símbolo alimentados pelas mensagens `orderbook.*` do stream"""
+
+    def __init__(self, max_levels: Optional[int] = None):
+        self.max_levels = max_levels
+        self.books: Dict[str, OrderBook] = {}
+        self.messages = 0
+        self.ignored = 0
+
+    def handle(self, topic: str, message: Dict[str, Any]) -> None:
+        symbol = topic.rsplit(".", 1)[-1]
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol, self.max_levels)
+        self.messages += 1
+        if not book.apply(message):
+            self.ignored += 1
+
+    def invalidate(self) -> None:
+        """Stream caiu: os livros só valem de novo após o próximo snapshot"""
+        for book in self.books.values():
+            book.ready = False
+
+    def get(self, symbol: str) -> Optional[OrderBook]:
+        book = self.books.get(symbol)
+        return book if book is not None and book.ready else None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "messages": self.messages,
+            "ignored": self.ignored,
+            "books": {
+                symbol: {"ready": book.ready, "updates": book.updates, "gaps": book.gaps, "levels": [len(book.bids), len(book.asks)]}
+                for symbol, book in self.books.items()
+            }
+        }
+
+
+order_books = OrderBookStore()
+
+
+def _matches(side: BookSide, levels: List[List[str]]) -> bool:
+    expected = {float(price): float(size) for price, size in levels if float(size) > 0}
+    return side.sizes == expected
+
+
+def replay(messages: Iterable[Dict[str, Any]], symbol: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Reconstrói os livros a partir de mensagens gravadas. Every snapshot after
+    the first is compared with the book built from the deltas before it is
+    applied, and the book is checked for crossing after every update.
+    """
+    store = OrderBookStore()
+    checked = mismatches = crossed = 0
+    applied = 0
+    elapsed = 0.0
+    for message in messages:
+        topic = message.get("topic", "")
+        if not topic.startswith("orderbook.") or (symbol and not topic.endswith("." + symbol)):
+            continue
+        book = store.books.get(topic.rsplit(".", 1)[-1])
+        if book is not None and book.ready and message.get("type") == "snapshot":
+            checked += 1
+            data = message["data"]
+            if not (_matches(book.bids, data.get("b", [])) and _matches(book.asks, data.get("a", []))):
+                mismatches += 1
+        started = time.perf_counter()
+        store.handle(topic, message)
+        elapsed += time.perf_counter() - started
+        applied += 1
+        if store.books[topic.rsplit(".", 1)[-1]].crossed():
+            crossed += 1
+    return {
+        "messages": applied,
+        "seconds": round(elapsed, 4),
+        "updates_per_second": round(applied / elapsed) if elapsed else None,
+        "snapshots_checked": checked,
+        "mismatches": mismatches,
+        "crossed": crossed,
+        "books": {s: {**book.snapshot(5), "gaps": book.gaps} for s, book in store.books.items()}
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay e verificação do livro de ofertas")
+    parser.add_argument("recording", nargs="?", help="Arquivo JSON lines gravado com WS_RECORD_PATH")
+    parser.add_argument("--symbol", help="Só este símbolo")
+    parser.add_argument("--synthetic", type=int, help="Gera N deltas sintéticos em vez de ler um arquivo")
+    parser.add_argument("--depth", type=int, default=50)
+    parser.add_argument("--snapshot-every", type=int, default=1000, help="Snapshot de conferência a cada N deltas")
+    parser.add_argument("--write", help="Grava o feed sintético (para python -m app.ws_replay)")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        from app.mock_exchange import SyntheticMarket
+
+        symbol = args.symbol or "BTCUSDT"
+        messages = list(SyntheticMarket([symbol]).orderbook_messages(
+            symbol, args.synthetic, depth=args.depth, snapshot_every=args.snapshot_every
+        ))
+        if args.write:
+            with open(args.write, "w") as f:
+                f.writelines(json.dumps(message) + "\n" for message in messages)
+    elif args.recording:
+        from app.ws_replay import load_recording
+
+        messages = load_recording(args.recording)
+    else:
+        parser.error("pass a recording or --synthetic N")
+
+    report = replay(messages, args.symbol)
+    print(json.dumps(report, indent=2))
+    return 1 if report["mismatches"] or report["crossed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
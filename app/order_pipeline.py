@@ -0,0 +1,403 @@
+"""
+Pipeline de ordens: fila, lotes e máquina de estados.
+
+Orders, amends and cancels from the API or from strategies are queued per
+(action, category) and sent with Bybit's batch endpoints
+(``/v5/order/create-batch``, ``amend-batch``, ``cancel-batch``): a queue is
+flushed after ``linger`` seconds or as soon as it holds a full batch, so a
+rebalance over many symbols costs one request per batch limit instead of
+one per order. A lone order still uses the single-order endpoint.
+
+Every order is tracked in memory through an explicit state machine and each
+caller gets its own per-order result, including the exchange's per-order
+error when a batch is only partially accepted.
+"""
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.async_bybit_client import BybitAPIError
+from app.single_flight import exchange_client
+
+logger = logging.getLogger(__name__)
+
+# Orders per batch request allowed by Bybit v5
+BATCH_LIMITS = {"linear": 20, "inverse": 20, "option": 20, "spot": 10}
+
+CREATE = "create"
+AMEND = "amend"
+CANCEL = "cancel"
+
+
+class OrderState(str, Enum):
+    PENDING = "pending"                  # queued locally
+    SUBMITTED = "submitted"              # in a request in flight
+    OPEN = "open"                        # accepted by the exchange
+    AMEND_PENDING = "amend_pending"
+    CANCEL_PENDING = "cancel_pending"
+    FILLED = "filled"
+    CANCELLED = "cancelled"
+    REJECTED = "rejected"                # refused by the exchange
+    FAILED = "failed"                    # request failed; the order was not confirmed
+
+
+TRANSITIONS = {
+    OrderState.PENDING: {OrderState.SUBMITTED, OrderState.FAILED},
+    OrderState.SUBMITTED: {OrderState.OPEN, OrderState.FILLED, OrderState.REJECTED, OrderState.FAILED},
+    OrderState.OPEN: {OrderState.AMEND_PENDING, OrderState.CANCEL_PENDING, OrderState.FILLED, OrderState.CANCELLED},
+    # An amend or cancel the exchange refuses leaves the order open
+    OrderState.AMEND_PENDING: {OrderState.OPEN, OrderState.FILLED, OrderState.CANCELLED},
+    OrderState.CANCEL_PENDING: {OrderState.CANCELLED, OrderState.OPEN, OrderState.FILLED},
+    OrderState.FILLED: set(),
+    OrderState.CANCELLED: set(),
+    OrderState.REJECTED: set(),
+    OrderState.FAILED: set(),
+}
+
+TERMINAL = {state for state, targets in TRANSITIONS.items() if not targets}
+
+# v5 orderStatus -> pipeline state, for updates reported by the exchange
+EXCHANGE_STATUS = {
+    "New": OrderState.OPEN,
+    "PartiallyFilled": OrderState.OPEN,
+    "Untriggered": OrderState.OPEN,
+    "Filled": OrderState.FILLED,
+    "Cancelled": OrderState.CANCELLED,
+    "PartiallyFilledCanceled": OrderState.CANCELLED,
+    "Deactivated": OrderState.CANCELLED,
+    "Rejected": OrderState.REJECTED,
+}
+
+
+class TrackedOrder:
+    __slots__ = (
+        "order_link_id", "order_id", "category", "symbol", "side", "order_type",
+        "qty", "price", "time_in_force", "state", "error", "error_type", "history"
+    )
+
+    def __init__(
+        self,
+        category: str,
+        symbol: str,
+        side: str = "",
+        order_type: str = "",
+        qty: Optional[str] = None,
+        price: Optional[str] = None,
+        time_in_force: str = "GTC",
+        order_id: Optional[str] = None,
+        order_link_id: Optional[str] = None,
+        state: OrderState = OrderState.PENDING
+    ):
+        # Client id (max 36 chars on Bybit) that ties batch results back to the order
+        self.order_link_id = order_link_id or f"bot-{uuid.uuid4().hex[:28]}"
+        self.order_id = order_id
+        self.category = category
+        self.symbol = symbol
+        self.side = side
+        self.order_type = order_type
+        self.qty = qty
+        self.price = price
+        self.time_in_force = time_in_force
+        self.state = state
+        self.error: Optional[str] = None
+        # Exception class name when the request failed, so callers can tell a shed request from a crash
+        self.error_type: Optional[str] = None
+        self.history: List[Tuple[str, int]] = [(state.value, int(time.time() * 1000))]
+
+    def transition(self, state: OrderState, error: Optional[str] = None) -> bool:
+        if state == self.state:
+            self.error = error
+            return True
+        if state not in TRANSITIONS[self.state]:
+            logger.warning(
+                "Order %s: ignoring transition %s -> %s", self.order_link_id, self.state.value, state.value
+            )
+            return False
+        self.state = state
+        self.error = error
+        self.history.append((state.value, int(time.time() * 1000)))
+        return True
+
+    def create_params(self) -> Dict[str, Any]:
+        params = {
+            "symbol": self.symbol,
+            "side": self.side,
+            "orderType": self.order_type,
+            "qty": self.qty,
+            "timeInForce": self.time_in_force,
+            "orderLinkId": self.order_link_id
+        }
+        if self.price and self.order_type == "Limit":
+            params["price"] = self.price
+        return params
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "order_link_id": self.order_link_id,
+            "order_id": self.order_id,
+            "symbol": self.symbol,
+            "side": self.side,
+            "order_type": self.order_type,
+            "qty": float(self.qty) if self.qty else None,
+            "price": float(self.price) if self.price else None,
+            "state": self.state.value,
+            "error": self.error,
+            "error_type": self.error_type,
+            "history": self.history
+        }
+
+
+class OrderPipeline:
+    def __init__(self, client: Any, linger: float = 0.02, history_size: int = 1000):
+        self.client = client
+        self.linger = linger
+        self.history_size = history_size
+        self.orders: "OrderedDict[str, TrackedOrder]" = OrderedDict()
+        self._by_order_id: Dict[str, TrackedOrder] = {}
+        # (action, category) -> [(order, extra params, future)]
+        self._queues: Dict[Tuple[str, str], List[Tuple[TrackedOrder, Dict[str, Any], asyncio.Future]]] = {}
+        self._timers: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._inflight: set = set()
+        self._batch_ids = itertools.count(1)
+        self.requests = 0
+        self.batched_orders = 0
+
+    # Entry points
+
+    async def place(self, orders: List[Dict[str, Any]], category: str = "linear") -> List[Dict[str, Any]]:
+        """
+        Cria ordens (``symbol``, ``side``, ``order_type``, ``qty`` e opcionalmente
+        ``price``, ``time_in_force``) e devolve um resultado por ordem, na mesma ordem.
+        """
+        tracked = [
+            TrackedOrder(
+                category,
+                o["symbol"],
+                side=o["side"],
+                order_type=o["order_type"],
+                qty=str(o["qty"]),
+                price=str(o["price"]) if o.get("price") else None,
+                time_in_force=o.get("time_in_force", "GTC")
+            )
+            for o in orders
+        ]
+        for order in tracked:
+            self._track(order)
+        return await asyncio.gather(*(self._submit(CREATE, order, {}) for order in tracked))
+
+    async def amend(self, amends: List[Dict[str, Any]], category: str = "linear") -> List[Dict[str, Any]]:
+        """Altera ordens abertas: ``symbol``, ``order_id`` e ``qty`` e/ou ``price``"""
+        futures = []
+        for amend in amends:
+            order = self._known(category, amend["symbol"], amend["order_id"])
+            extra = {
+                key: str(amend[field]) for key, field in (("qty", "qty"), ("price", "price")) if amend.get(field)
+            }
+            futures.append(self._submit(AMEND, order, extra))
+        return await asyncio.gather(*futures)
+
+    async def cancel(self, cancels: List[Dict[str, Any]], category: str = "linear") -> List[Dict[str, Any]]:
+        """Cancela ordens: ``symbol`` e ``order_id``"""
+        return await asyncio.gather(*(
+            self._submit(CANCEL, self._known(category, c["symbol"], c["order_id"]), {}) for c in cancels
+        ))
+
+    def on_order_update(self, update: Dict[str, Any]) -> None:
+        """Aplica um status reportado pela exchange (orderStatus v5) a uma ordem rastreada"""
+        order = self._by_order_id.get(update.get("orderId", "")) or self.orders.get(update.get("orderLinkId", ""))
+        state = EXCHANGE_STATUS.get(update.get("orderStatus", ""))
+        if order is not None and state is not None:
+            if order.order_id is None and update.get("orderId"):
+                order.order_id = update["orderId"]
+                self._by_order_id[order.order_id] = order
+            order.transition(state, update.get("rejectReason") if state == OrderState.REJECTED else None)
+            self._prune()
+
+    # Queueing
+
+    def _track(self, order: TrackedOrder) -> None:
+        self.orders[order.order_link_id] = order
+        if order.order_id:
+            self._by_order_id[order.order_id] = order
+        self._prune()
+
+    def _known(self, category: str, symbol: str, order_id: str) -> TrackedOrder:
+        """Ordem rastreada pelo orderId, ou uma entrada nova para ordens criadas fora do pipeline"""
+        order = self._by_order_id.get(order_id)
+        if order is None:
+            order = TrackedOrder(category, symbol, order_id=order_id, state=OrderState.OPEN)
+        return order
+
+    def _submit(self, action: str, order: TrackedOrder, extra: Dict[str, Any]) -> "asyncio.Future":
+        pending = {CREATE: OrderState.PENDING, AMEND: OrderState.AMEND_PENDING, CANCEL: OrderState.CANCEL_PENDING}[action]
+        future = asyncio.get_running_loop().create_future()
+        if not order.transition(pending):
+            future.set_result({
+                **order.to_dict(), "error": f"Cannot {action} an order in state {order.state.value}", "error_type": None
+            })
+            return future
+
+        key = (action, order.category)
+        queue = self._queues.setdefault(key, [])
+        queue.append((order, extra, future))
+        if len(queue) >= BATCH_LIMITS.get(order.category, 10):
+            self._flush(key)
+        elif key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().call_later(self.linger, self._flush, key)
+        return future
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        queue = self._queues.get(key)
+        limit = BATCH_LIMITS.get(key[1], 10)
+        while queue:
+            batch, queue[:] = queue[:limit], queue[limit:]
+            task = asyncio.create_task(self._send(key[0], key[1], batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    # Sending
+
+    async def _send(self, action: str, category: str, batch: List[Tuple[TrackedOrder, Dict[str, Any], asyncio.Future]]) -> None:
+        self.requests += 1
+        self.batched_orders += len(batch)
+        if action == CREATE:
+            for order, _, _ in batch:
+                order.transition(OrderState.SUBMITTED)
+        failure: Optional[Exception] = None
+        try:
+            outcomes = await (self._send_one(action, category, *batch[0][:2]) if len(batch) == 1
+                              else self._send_batch(action, category, batch))
+        except BybitAPIError as e:
+            # The whole request was refused: every order in it is rejected
+            outcomes = [(None, e.ret_msg)] * len(batch)
+        except Exception as e:
+            logger.error("Order %s request for %d orders failed: %s", action, len(batch), e)
+            outcomes = [(None, str(e) or type(e).__name__)] * len(batch)
+            failure = e
+
+        for (order, extra, future), (result, error) in zip(batch, outcomes):
+            self._apply(action, order, extra, result, error, failure)
+            if not future.done():
+                future.set_result(order.to_dict())
+        self._prune()
+
+    async def _send_one(self, action: str, category: str, order: TrackedOrder, extra: Dict[str, Any]):
+        if action == CREATE:
+            response = await self.client.place_order(
+                category=category,
+                symbol=order.symbol,
+                side=order.side,
+                order_type=order.order_type,
+                qty=order.qty,
+                price=order.price,
+                time_in_force=order.time_in_force,
+                order_link_id=order.order_link_id
+            )
+        elif action == AMEND:
+            response = await self.client.amend_order(category, order.symbol, order.order_id, **extra)
+        else:
+            response = await self.client.cancel_order(category, order.symbol, order.order_id)
+        if response.get("retCode") != 0:
+            return [(None, response.get("retMsg", "Unknown error"))]
+        return [(response.get("result", {}), None)]
+
+    async def _send_batch(self, action: str, category: str, batch) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        if action == CREATE:
+            response = await self.client.place_orders_batch(category, [order.create_params() for order, _, _ in batch])
+        else:
+            requests = [{"symbol": order.symbol, "orderId": order.order_id, **extra} for order, extra, _ in batch]
+            call = self.client.amend_orders_batch if action == AMEND else self.client.cancel_orders_batch
+            response = await call(category, requests)
+        if response.get("retCode") != 0:
+            return [(None, response.get("retMsg", "Unknown error"))] * len(batch)
+
+        results = response.get("result", {}).get("list", [])
+        infos = (response.get("retExtInfo") or {}).get("list", [])
+        outcomes = []
+        for i in range(len(batch)):
+            info = infos[i] if i < len(infos) else {"code": 0}
+            result = results[i] if i < len(results) else None
+            if info.get("code", 0) != 0 or result is None:
+                outcomes.append((None, info.get("msg") or "No result for order"))
+            else:
+                outcomes.append((result, None))
+        return outcomes
+
+    def _apply(
+        self,
+        action: str,
+        order: TrackedOrder,
+        extra: Dict[str, Any],
+        result: Optional[Dict[str, Any]],
+        error: Optional[str],
+        failure: Optional[Exception]
+    ) -> None:
+        if order.state in TERMINAL:
+            # The account stream already reported the outcome (a fill can beat the response)
+            return
+        order.error_type = type(failure).__name__ if failure is not None else None
+        if action == CREATE:
+            if error is not None:
+                # A refusal comes with the exchange's message; a failed request leaves the order unconfirmed
+                order.transition(OrderState.FAILED if failure is not None else OrderState.REJECTED, error)
+                return
+            order.order_id = result.get("orderId") or order.order_id
+            self._by_order_id[order.order_id] = order
+            if order.state == OrderState.SUBMITTED:
+                order.transition(OrderState.OPEN)
+        elif action == AMEND:
+            if error is None:
+                order.qty = extra.get("qty", order.qty)
+                order.price = extra.get("price", order.price)
+            order.transition(OrderState.OPEN, error)
+        else:
+            order.transition(OrderState.OPEN if error is not None else OrderState.CANCELLED, error)
+        if error is None and order.order_link_id not in self.orders:
+            # Orders placed outside the pipeline are tracked once the exchange knows them
+            self._track(order)
+
+    def _prune(self) -> None:
+        """Esquece as ordens finalizadas mais antigas além de `history_size`"""
+        excess = len(self.orders) - self.history_size
+        if excess <= 0:
+            return
+        for link_id in list(self.orders):
+            if excess <= 0:
+                break
+            order = self.orders[link_id]
+            if order.state in TERMINAL:
+                del self.orders[link_id]
+                self._by_order_id.pop(order.order_id or "", None)
+                excess -= 1
+
+    async def drain(self) -> None:
+        """Envia o que está na fila e espera as requisições em voo"""
+        for key in list(self._queues):
+            self._flush(key)
+        if self._inflight:
+            await asyncio.gather(*list(self._inflight), return_exceptions=True)
+
+    def status(self, recent: int = 50) -> Dict[str, Any]:
+        states: Dict[str, int] = {}
+        for order in self.orders.values():
+            states[order.state.value] = states.get(order.state.value, 0) + 1
+        return {
+            "requests": self.requests,
+            "orders_sent": self.batched_orders,
+            "orders_per_request": round(self.batched_orders / self.requests, 2) if self.requests else 0.0,
+            "queued": sum(len(queue) for queue in self._queues.values()),
+            "inflight_requests": len(self._inflight),
+            "states": states,
+            "recent": [order.to_dict() for order in list(self.orders.values())[-recent:]] if recent > 0 else []
+        }
+
+
+order_pipeline = OrderPipeline(exchange_client)
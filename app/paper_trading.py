@@ -0,0 +1,532 @@
+"""
+Paper trading: motor de execução local com a mesma interface do cliente Bybit.
+
+``PaperExchange`` answers ``place_order``, ``cancel_order``, ``amend_order``,
+their batch variants, ``get_open_orders``, ``get_positions``, ``get_wallet_balance`` and
+``get_account_info`` with v5-shaped responses computed in memory, so the API
+endpoints work unchanged; every other method (klines, tickers, ...) is
+forwarded to the real client. Prices come from ``on_price`` (public
+WebSocket, replay or ticker polling). Market orders fill at the last price
+plus slippage as taker; resting limit orders live in per-symbol heaps and
+fill at their limit price as maker when the price trades through them.
+Positions are one-way (like ``positionIdx=0``) with average entry price,
+realised PnL and fees booked on the USDT wallet.
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.async_bybit_client import async_bybit_client
+from app.config import settings
+from app.ticker_cache import ticker_cache
+
+logger = logging.getLogger(__name__)
+
+# v5 retCodes reused for local rejections
+ORDER_NOT_FOUND = 110001
+INSUFFICIENT_BALANCE = 110007
+INVALID_PARAMS = 10001
+
+PriceSource = Callable[[str], Awaitable[Optional[float]]]
+PriceFeed = Callable[[], Awaitable[Dict[str, float]]]
+
+
+def _ok(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {"retCode": 0, "retMsg": "OK", "result": result, "time": int(time.time() * 1000)}
+
+
+def _error(code: int, message: str) -> Dict[str, Any]:
+    return {"retCode": code, "retMsg": message, "result": {}, "time": int(time.time() * 1000)}
+
+
+class _Position:
+    __slots__ = ("size", "entry_price", "realised_pnl")
+
+    def __init__(self):
+        # Signed: positive long, negative short
+        self.size = 0.0
+        self.entry_price = 0.0
+        self.realised_pnl = 0.0
+
+
+class PaperExchange:
+    def __init__(
+        self,
+        client: Any,
+        initial_balance: float = 10000.0,
+        taker_fee: float = 0.00055,
+        maker_fee: float = 0.0002,
+        slippage: float = 0.0005,
+        leverage: float = 10.0,
+        price_source: Optional[PriceSource] = None,
+        price_feed: Optional[PriceFeed] = None,
+        poll_interval: float = 2.0,
+        history_size: int = 1000
+    ):
+        self.client = client
+        self.initial_balance = initial_balance
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.slippage = slippage
+        self.leverage = leverage
+        # Used for market orders on symbols without a streamed price yet
+        self.price_source = price_source
+        # Polled for every price when no stream calls on_price
+        self.price_feed = price_feed
+        self.poll_interval = poll_interval
+        self.history_size = history_size
+        # Called with ("order" | "execution", v5-shaped dict) on every order status change and fill
+        self.listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._task: Optional[asyncio.Task] = None
+        self.reset()
+
+    def reset(self) -> None:
+        """Volta ao saldo inicial sem ordens nem posições"""
+        self.wallet = self.initial_balance
+        self.fees_paid = 0.0
+        self.prices: Dict[str, float] = {}
+        self.positions: Dict[str, _Position] = {}
+        self.orders: Dict[str, Dict[str, Any]] = {}
+        # Notional of resting orders, kept as a running sum so margin checks stay O(1)
+        self._resting_notional = 0.0
+        # Per symbol heaps of (key, seq, order_id); bids keyed by -price
+        self._bids: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._asks: Dict[str, List[Tuple[float, int, str]]] = {}
+        self._seq = itertools.count()
+        self._stale = 0
+        self.executions: Deque[Dict[str, Any]] = deque(maxlen=self.history_size)
+        self.orders_placed = 0
+        self.orders_filled = 0
+        self.orders_cancelled = 0
+        self.orders_rejected = 0
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def start_polling(self) -> None:
+        if self.price_feed is not None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                for symbol, price in (await self.price_feed()).items():
+                    self.on_price(symbol, price)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Paper trading price poll failed: %s", e)
+            await asyncio.sleep(self.poll_interval)
+
+    # Matching
+
+    def on_price(self, symbol: str, price: float) -> None:
+        """Novo preço de `symbol`; executa as ordens limite atravessadas"""
+        self.prices[symbol] = price
+        bids = self._bids.get(symbol)
+        while bids and -bids[0][0] >= price:
+            _, seq, order_id = heapq.heappop(bids)
+            self._fill_resting(order_id, seq)
+        asks = self._asks.get(symbol)
+        while asks and asks[0][0] <= price:
+            _, seq, order_id = heapq.heappop(asks)
+            self._fill_resting(order_id, seq)
+
+    def _compact(self) -> None:
+        """Drops cancelled orders from the heaps once they outnumber the live ones"""
+        for books in (self._bids, self._asks):
+            for symbol, heap in books.items():
+                books[symbol] = [
+                    entry for entry in heap
+                    if entry[2] in self.orders and self.orders[entry[2]]["_seq"] == entry[1]
+                ]
+                heapq.heapify(books[symbol])
+        self._stale = 0
+
+    def _fill_resting(self, order_id: str, seq: int) -> None:
+        # Cancelled orders, and the old entries of amended ones, stay in the heap
+        # until they surface here or a compaction
+        order = self.orders.get(order_id)
+        if order is None or order["_seq"] != seq:
+            self._stale = max(0, self._stale - 1)
+        else:
+            del self.orders[order_id]
+            self._resting_notional -= order["_qty"] * order["_price"]
+            self._execute(order, order["_price"], maker=True)
+
+    def _emit(self, topic: str, data: Dict[str, Any]) -> None:
+        for listener in self.listeners:
+            listener(topic, data)
+
+    def _emit_order(self, order: Dict[str, Any]) -> None:
+        if self.listeners:
+            self._emit("order", {k: v for k, v in order.items() if not k.startswith("_")})
+
+    def _rest(self, order: Dict[str, Any]) -> None:
+        """Coloca (ou recoloca, após um amend) uma ordem limite no livro"""
+        buy = order["side"] == "Buy"
+        order["_seq"] = next(self._seq)
+        self.orders[order["orderId"]] = order
+        self._resting_notional += order["_qty"] * order["_price"]
+        entry = (-order["_price"] if buy else order["_price"], order["_seq"], order["orderId"])
+        heapq.heappush((self._bids if buy else self._asks).setdefault(order["symbol"], []), entry)
+        self._emit_order(order)
+
+    def _execute(self, order: Dict[str, Any], price: float, maker: bool) -> None:
+        symbol = order["symbol"]
+        qty = order["_qty"]
+        signed = qty if order["side"] == "Buy" else -qty
+        position = self.positions.setdefault(symbol, _Position())
+
+        realised = 0.0
+        if position.size == 0 or (position.size > 0) == (signed > 0):
+            total = position.size + signed
+            position.entry_price = (position.entry_price * abs(position.size) + price * qty) / abs(total)
+            position.size = total
+        else:
+            closing = min(abs(position.size), qty)
+            direction = 1.0 if position.size > 0 else -1.0
+            realised = closing * (price - position.entry_price) * direction
+            position.size += signed
+            if abs(position.size) < 1e-12:
+                position.size = 0.0
+                position.entry_price = 0.0
+            elif (position.size > 0) != (direction > 0):
+                # Flipped: the remainder opened at this fill
+                position.entry_price = price
+
+        fee = qty * price * (self.maker_fee if maker else self.taker_fee)
+        position.realised_pnl += realised - fee
+        self.wallet += realised - fee
+        self.fees_paid += fee
+        self.orders_filled += 1
+
+        order["orderStatus"] = "Filled"
+        order["avgPrice"] = str(price)
+        order["cumExecQty"] = order["qty"]
+        order["cumExecFee"] = str(fee)
+        order["updatedTime"] = str(int(time.time() * 1000))
+        self.executions.append({
+            "orderId": order["orderId"],
+            "symbol": symbol,
+            "side": order["side"],
+            "execPrice": price,
+            "execQty": qty,
+            "execFee": fee,
+            "closedPnl": realised,
+            "isMaker": maker,
+            "execTime": order["updatedTime"]
+        })
+        if self.listeners:
+            self._emit("execution", {
+                "execId": uuid.uuid4().hex,
+                "orderId": order["orderId"],
+                "orderLinkId": order["orderLinkId"],
+                "symbol": symbol,
+                "side": order["side"],
+                "orderType": order["orderType"],
+                "execPrice": str(price),
+                "execQty": order["qty"],
+                "execFee": str(fee),
+                "closedPnl": str(realised),
+                "isMaker": maker,
+                "execTime": order["updatedTime"]
+            })
+        self._emit_order(order)
+
+    # Accounting
+
+    def _unrealised(self, symbol: str, position: _Position) -> float:
+        mark = self.prices.get(symbol, position.entry_price)
+        return position.size * (mark - position.entry_price)
+
+    def _used_margin(self) -> float:
+        positions = sum(abs(p.size) * p.entry_price for p in self.positions.values())
+        return (positions + self._resting_notional) / self.leverage
+
+    def equity(self) -> float:
+        return self.wallet + sum(self._unrealised(s, p) for s, p in self.positions.items())
+
+    def available(self) -> float:
+        return self.equity() - self._used_margin()
+
+    def _opens_exposure(self, symbol: str, side: str, qty: float) -> float:
+        """Quantity of the order that increases the position (the rest only reduces it)"""
+        size = self.positions[symbol].size if symbol in self.positions else 0.0
+        if size == 0 or (size > 0) == (side == "Buy"):
+            return qty
+        return max(0.0, qty - abs(size))
+
+    # Bybit client surface
+
+    async def place_order(
+        self,
+        category: str,
+        symbol: str,
+        side: str,
+        order_type: str,
+        qty: str,
+        price: Optional[str] = None,
+        time_in_force: str = "GTC",
+        position_idx: int = 0,
+        order_link_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        try:
+            quantity = float(qty)
+            limit = float(price) if price and order_type == "Limit" else None
+        except (TypeError, ValueError):
+            self.orders_rejected += 1
+            return _error(INVALID_PARAMS, "Invalid qty or price")
+        if side not in ("Buy", "Sell") or quantity <= 0 or (order_type == "Limit" and not limit):
+            self.orders_rejected += 1
+            return _error(INVALID_PARAMS, "Invalid side, qty or price")
+
+        last = self.prices.get(symbol)
+        if last is None and self.price_source is not None:
+            last = await self.price_source(symbol)
+            if last:
+                self.on_price(symbol, last)
+        if last is None and order_type != "Limit":
+            self.orders_rejected += 1
+            return _error(INVALID_PARAMS, f"No price for {symbol} yet")
+
+        buy = side == "Buy"
+        marketable = order_type != "Limit" or (last is not None and (limit >= last if buy else limit <= last))
+        if marketable:
+            if time_in_force == "PostOnly":
+                self.orders_rejected += 1
+                return _error(INVALID_PARAMS, "PostOnly order would take liquidity")
+            fill_price = last * (1 + self.slippage) if buy else last * (1 - self.slippage)
+            if limit is not None:
+                # Slippage never crosses the limit
+                fill_price = min(fill_price, limit) if buy else max(fill_price, limit)
+        elif time_in_force in ("IOC", "FOK"):
+            self.orders_rejected += 1
+            return _error(INVALID_PARAMS, f"{time_in_force} order could not be filled")
+        reference = fill_price if marketable else limit
+
+        opening = self._opens_exposure(symbol, side, quantity)
+        if opening > 0 and opening * reference * (1 / self.leverage + self.taker_fee) > self.available():
+            self.orders_rejected += 1
+            return _error(INSUFFICIENT_BALANCE, "ab not enough for new order")
+
+        now = str(int(time.time() * 1000))
+        order_id = uuid.uuid4().hex
+        order = {
+            "orderId": order_id,
+            "orderLinkId": order_link_id or "",
+            "symbol": symbol,
+            "side": side,
+            "orderType": order_type,
+            "price": price if limit is not None else "0",
+            "qty": qty,
+            "timeInForce": time_in_force,
+            "orderStatus": "New",
+            "avgPrice": "0",
+            "cumExecQty": "0",
+            "cumExecFee": "0",
+            "createdTime": now,
+            "updatedTime": now,
+            "_qty": quantity,
+            "_price": reference,
+        }
+        self.orders_placed += 1
+        if marketable:
+            self._execute(order, fill_price, maker=False)
+        else:
+            self._rest(order)
+        return _ok({"orderId": order_id, "orderLinkId": order["orderLinkId"]})
+
+    async def cancel_order(self, category: str, symbol: str, order_id: str) -> Dict[str, Any]:
+        order = self.orders.get(order_id)
+        if order is None or order["symbol"] != symbol:
+            return _error(ORDER_NOT_FOUND, "order not exists or too late to cancel")
+        del self.orders[order_id]
+        self._resting_notional -= order["_qty"] * order["_price"]
+        order["orderStatus"] = "Cancelled"
+        order["updatedTime"] = str(int(time.time() * 1000))
+        self.orders_cancelled += 1
+        self._emit_order(order)
+        self._stale += 1
+        if self._stale > max(1024, len(self.orders)):
+            self._compact()
+        return _ok({"orderId": order_id, "orderLinkId": order["orderLinkId"]})
+
+    async def amend_order(
+        self,
+        category: str,
+        symbol: str,
+        order_id: str,
+        qty: Optional[str] = None,
+        price: Optional[str] = None
+    ) -> Dict[str, Any]:
+        order = self.orders.get(order_id)
+        if order is None or order["symbol"] != symbol:
+            return _error(ORDER_NOT_FOUND, "order not exists or too late to amend")
+        try:
+            quantity = float(qty) if qty else order["_qty"]
+            limit = float(price) if price else order["_price"]
+        except (TypeError, ValueError):
+            return _error(INVALID_PARAMS, "Invalid qty or price")
+        if quantity <= 0 or limit <= 0:
+            return _error(INVALID_PARAMS, "Invalid qty or price")
+
+        extra = quantity * limit - order["_qty"] * order["_price"]
+        if extra > 0 and extra * (1 / self.leverage + self.taker_fee) > self.available():
+            return _error(INSUFFICIENT_BALANCE, "ab not enough for new order")
+
+        self._resting_notional -= order["_qty"] * order["_price"]
+        del self.orders[order_id]
+        # The previous heap entry goes stale; _rest pushes one at the new price
+        self._stale += 1
+        order.update({
+            "_qty": quantity,
+            "_price": limit,
+            "qty": qty or order["qty"],
+            "price": price or order["price"],
+            "updatedTime": str(int(time.time() * 1000))
+        })
+        last = self.prices.get(symbol)
+        buy = order["side"] == "Buy"
+        if last is not None and (limit >= last if buy else limit <= last):
+            # Amended through the market: fills now as taker, like a new marketable limit
+            fill_price = min(last * (1 + self.slippage), limit) if buy else max(last * (1 - self.slippage), limit)
+            self._execute(order, fill_price, maker=False)
+        else:
+            self._rest(order)
+        return _ok({"orderId": order_id, "orderLinkId": order["orderLinkId"]})
+
+    async def _batch(self, category: str, requests: List[Dict[str, Any]], call) -> Dict[str, Any]:
+        results, infos = [], []
+        for request in requests:
+            response = await call(request)
+            results.append({"category": category, "symbol": request.get("symbol", ""), **response["result"]})
+            infos.append({"code": response["retCode"], "msg": response["retMsg"]})
+        body = _ok({"list": results})
+        body["retExtInfo"] = {"list": infos}
+        return body
+
+    async def place_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._batch(category, orders, lambda o: self.place_order(
+            category, o.get("symbol", ""), o.get("side", ""), o.get("orderType", ""), o.get("qty", "0"),
+            price=o.get("price"), time_in_force=o.get("timeInForce", "GTC"), order_link_id=o.get("orderLinkId")
+        ))
+
+    async def amend_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._batch(category, orders, lambda o: self.amend_order(
+            category, o.get("symbol", ""), o.get("orderId", ""), qty=o.get("qty"), price=o.get("price")
+        ))
+
+    async def cancel_orders_batch(self, category: str, orders: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return await self._batch(category, orders, lambda o: self.cancel_order(
+            category, o.get("symbol", ""), o.get("orderId", "")
+        ))
+
+    async def get_open_orders(
+        self,
+        category: str = "linear",
+        symbol: Optional[str] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        orders = [
+            {k: v for k, v in order.items() if not k.startswith("_")}
+            for order in self.orders.values()
+            if symbol is None or order["symbol"] == symbol
+        ]
+        # Pages like Bybit (20 by default, at most 50); the cursor is an offset here
+        start = int(cursor) if cursor else 0
+        end = start + min(limit or 20, 50)
+        next_cursor = str(end) if end < len(orders) else ""
+        return _ok({"list": orders[start:end], "category": category, "nextPageCursor": next_cursor})
+
+    async def get_positions(
+        self, category: str = "linear", symbol: Optional[str] = None, settle_coin: str = "USDT"
+    ) -> Dict[str, Any]:
+        positions = []
+        for name, position in self.positions.items():
+            if symbol is not None and name != symbol:
+                continue
+            positions.append({
+                "symbol": name,
+                "side": "Buy" if position.size > 0 else "Sell" if position.size < 0 else "",
+                "size": str(abs(position.size)),
+                "avgPrice": str(position.entry_price),
+                "markPrice": str(self.prices.get(name, position.entry_price)),
+                "unrealisedPnl": str(self._unrealised(name, position)),
+                "cumRealisedPnl": str(position.realised_pnl),
+                "leverage": str(self.leverage),
+                "positionIdx": 0
+            })
+        return _ok({"list": positions, "category": category})
+
+    async def get_wallet_balance(self, account_type: str = "UNIFIED", coin: Optional[str] = None) -> Dict[str, Any]:
+        equity = self.equity()
+        available = self.available()
+        unrealised = equity - self.wallet
+        return _ok({"list": [{
+            "accountType": account_type,
+            "totalEquity": str(equity),
+            "totalWalletBalance": str(self.wallet),
+            "totalAvailableBalance": str(available),
+            "coin": [{
+                "coin": "USDT",
+                "walletBalance": str(self.wallet),
+                "equity": str(equity),
+                "availableToWithdraw": str(max(available, 0.0)),
+                "unrealisedPnl": str(unrealised),
+                "cumRealisedPnl": str(sum(p.realised_pnl for p in self.positions.values()))
+            }]
+        }]})
+
+    async def get_account_info(self) -> Dict[str, Any]:
+        return _ok({"unifiedMarginStatus": 4, "marginMode": "REGULAR_MARGIN", "paperTrading": True})
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "polling": self._task is not None and not self._task.done(),
+            "equity": round(self.equity(), 4),
+            "wallet": round(self.wallet, 4),
+            "fees_paid": round(self.fees_paid, 4),
+            "open_orders": len(self.orders),
+            "positions": sum(1 for p in self.positions.values() if p.size != 0),
+            "orders_placed": self.orders_placed,
+            "orders_filled": self.orders_filled,
+            "orders_cancelled": self.orders_cancelled,
+            "orders_rejected": self.orders_rejected,
+            "prices": len(self.prices)
+        }
+
+
+async def _ticker_price(symbol: str) -> Optional[float]:
+    price = await ticker_cache.get_price(symbol)
+    return price["price"] if price else None
+
+
+async def _ticker_prices() -> Dict[str, float]:
+    tickers = await ticker_cache.snapshot()
+    return {symbol: float(t["lastPrice"]) for symbol, t in tickers.items() if t.get("lastPrice")}
+
+
+paper_exchange = PaperExchange(
+    async_bybit_client,
+    initial_balance=settings.paper_initial_balance,
+    taker_fee=settings.paper_taker_fee,
+    maker_fee=settings.paper_maker_fee,
+    slippage=settings.paper_slippage,
+    leverage=settings.paper_leverage,
+    price_source=_ticker_price,
+    price_feed=_ticker_prices,
+    poll_interval=settings.ticker_cache_ttl
+)
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# retCode Bybit returns when a limit was hit anyway
+RATE_LIMIT_RET_CODE = 10006
+
+
+class RateLimitExceeded(Exception):
+    """
+    Request shed locally because it would wait longer than allowed for a
+    token, or refused by Bybit (retCode 10006, or HTTP 403/429 at IP level)
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket with reservations: ``reserve`` takes a token immediately
+    (the balance may go negative, which is the queue) and returns how long the
+    caller must wait for it. Limits learned from response headers can lower
+    the balance or block the bucket until the exchange window resets.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.exchange_limit: Optional[int] = None
+        self.exchange_remaining: Optional[int] = None
+        self.shed = 0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, max_wait: float) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, (1 - self.tokens) / self.rate, self.blocked_until - now)
+        if wait > max_wait:
+            self.shed += 1
+            raise RateLimitExceeded(f"Rate limit budget exhausted, retry in {wait:.2f}s")
+        self.tokens -= 1
+        return wait
+
+    def observe(self, limit: Optional[int], remaining: Optional[int], reset_at: Optional[float]) -> None:
+        """Aplica os headers X-Bapi-Limit-* da última resposta"""
+        now = time.monotonic()
+        self._refill(now)
+        self.exchange_limit = limit
+        self.exchange_remaining = remaining
+        if remaining is None:
+            return
+        # Never believe we have more budget than the exchange says is left
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_at is not None:
+            self.blocked_until = max(self.blocked_until, now + max(0.0, reset_at - time.time()))
+
+    def block(self, seconds: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        self._refill(now)
+        return {
+            "rate": self.rate,
+            "tokens": round(self.tokens, 2),
+            "blocked_for": round(max(0.0, self.blocked_until - now), 2),
+            "exchange_limit": self.exchange_limit,
+            "exchange_remaining": self.exchange_remaining,
+            "shed": self.shed
+        }
+
+
+class RateLimiter:
+    """Buckets por grupo de endpoints da Bybit (market, order, account)"""
+
+    def __init__(self, rates: Dict[str, float], max_wait: float = 2.0):
+        self.buckets = {group: TokenBucket(rate) for group, rate in rates.items()}
+        self.max_wait = max_wait
+
+    @staticmethod
+    def group_for(path: str) -> str:
+        if path.startswith("/v5/market"):
+            return "market"
+        if path.startswith("/v5/order"):
+            return "order"
+        return "account"
+
+    async def acquire(self, group: str) -> None:
+        """Espera por um token do grupo ou lança RateLimitExceeded"""
+        wait = self.buckets[group].reserve(self.max_wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def observe(self, group: str, headers: Mapping[str, str], ret_code: Optional[int] = None) -> None:
+        bucket = self.buckets[group]
+        limit = headers.get("X-Bapi-Limit")
+        remaining = headers.get("X-Bapi-Limit-Status")
+        reset = headers.get("X-Bapi-Limit-Reset-Timestamp")
+        bucket.observe(
+            int(limit) if limit else None,
+            int(remaining) if remaining else None,
+            int(reset) / 1000 if reset else None
+        )
+        if ret_code == RATE_LIMIT_RET_CODE:
+            logger.warning("Bybit rate limit hit for %s, backing off", group)
+            bucket.block(1.0)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {group: bucket.status() for group, bucket in self.buckets.items()}
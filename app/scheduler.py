@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.candle_aggregator import interval_offset
+from app.kline_cache import INTERVAL_MS
+
+logger = logging.getLogger(__name__)
+
+# (strategy, symbols, interval) -> one signal event per symbol
+Evaluator = Callable[[str, List[str], str], Awaitable[List[Dict[str, Any]]]]
+Listener = Callable[[Dict[str, Any]], None]
+
+
+def next_candle_close(interval: str, now_ms: int) -> int:
+    """Timestamp (ms) em que o candle atual de `interval` fecha"""
+    if interval == "M":
+        now = datetime.fromtimestamp(now_ms / 1000, tz=timezone.utc)
+        year, month = (now.year + 1, 1) if now.month == 12 else (now.year, now.month + 1)
+        return int(datetime(year, month, 1, tzinfo=timezone.utc).timestamp() * 1000)
+    step = INTERVAL_MS[interval]
+    offset = interval_offset(interval)
+    return ((now_ms - offset) // step + 1) * step + offset
+
+
+class StrategyScheduler:
+    """
+    Runs every enabled strategy for each interval right after its candles
+    close. A job is one (strategy, interval) pair covering all its symbols,
+    so the evaluator can batch them in one computation. One task per job
+    sleeps until its next boundary plus a small delay and random jitter (so
+    jobs don't hit the exchange in the same millisecond); a semaphore bounds
+    how many evaluations run at once.
+    """
+
+    def __init__(
+        self,
+        evaluate: Evaluator,
+        max_concurrency: int = 4,
+        close_delay: float = 2.0,
+        jitter: float = 1.5,
+        history_size: int = 200
+    ):
+        self.evaluate = evaluate
+        self.max_concurrency = max_concurrency
+        self.close_delay = close_delay
+        self.jitter = jitter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._jobs: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.listeners: List[Listener] = []
+        self.started_at: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return any(not t.done() for t in self._tasks.values())
+
+    def start(self, symbols: List[str], intervals: List[str], strategies: List[str]) -> None:
+        """Inicia um job por (strategy, interval); jobs já ativos ganham os novos símbolos"""
+        for interval in intervals:
+            if interval not in INTERVAL_MS and interval != "M":
+                raise ValueError(f"Unsupported interval: {interval}")
+        for strategy in strategies:
+            for interval in intervals:
+                key = (strategy, interval)
+                task = self._tasks.get(key)
+                if task is not None and not task.done():
+                    job = self._jobs[key]
+                    job["symbols"] = job["symbols"] + [s for s in symbols if s not in job["symbols"]]
+                    continue
+                self._jobs[key] = {
+                    "strategy": strategy,
+                    "interval": interval,
+                    "symbols": list(symbols),
+                    "runs": 0,
+                    "errors": 0,
+                    "last_run": None,
+                    "next_run": None,
+                    "last_signals": {},
+                    "last_error": None
+                }
+                self._tasks[key] = asyncio.create_task(self._run_job(strategy, interval))
+        if self.started_at is None:
+            self.started_at = datetime.now().isoformat()
+        logger.info("Scheduler running %s jobs", len(self._tasks))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self.started_at = None
+        logger.info("Scheduler stopped")
+
+    async def _run_job(self, strategy: str, interval: str) -> None:
+        job = self._jobs[(strategy, interval)]
+        # Evaluate once right away so a fresh start reports a signal without waiting a full candle
+        await self._evaluate(job)
+        while True:
+            now_ms = int(time.time() * 1000)
+            delay = (next_candle_close(interval, now_ms) - now_ms) / 1000
+            delay += self.close_delay + random.uniform(0, self.jitter)
+            job["next_run"] = datetime.fromtimestamp(time.time() + delay).isoformat()
+            await asyncio.sleep(delay)
+            await self._evaluate(job)
+
+    async def _evaluate(self, job: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                events = await self.evaluate(job["strategy"], job["symbols"], job["interval"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job["errors"] += 1
+                job["last_error"] = str(e)
+                logger.error("Scheduled evaluation failed for %s/%s: %s", job['strategy'], job['interval'], e)
+                return
+            finally:
+                job["runs"] += 1
+                job["last_run"] = datetime.now().isoformat()
+                job["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+
+        for result in events:
+            event = {**result, "interval": job["interval"]}
+            job["last_signals"][event["symbol"]] = event
+            if event.get("signal") != "HOLD":
+                self.history.append(event)
+            for listener in self.listeners:
+                try:
+                    listener(event)
+                except Exception as e:
+                    logger.error("Scheduler listener failed: %s", e)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "started_at": self.started_at,
+            "max_concurrency": self.max_concurrency,
+            "jobs": list(self._jobs.values()) if self.running else [],
+            "signals": list(self.history)
+        }
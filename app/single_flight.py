@@ -0,0 +1,165 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.async_bybit_client import async_bybit_client
+from app.config import settings
+from app.paper_trading import paper_exchange
+
+# Writes that make cached account reads stale
+INVALIDATES = {
+    "place_order": ("get_open_orders", "get_positions", "get_wallet_balance"),
+    "cancel_order": ("get_open_orders",),
+    "amend_order": ("get_open_orders", "get_positions", "get_wallet_balance"),
+    "place_orders_batch": ("get_open_orders", "get_positions", "get_wallet_balance"),
+    "amend_orders_batch": ("get_open_orders", "get_positions", "get_wallet_balance"),
+    "cancel_orders_batch": ("get_open_orders",),
+}
+
+
+class TTLCache:
+    """LRU limitado por tamanho com expiração por entrada"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+        for key in [k for k in self._data if predicate(k)]:
+            del self._data[key]
+
+
+class SingleFlight:
+    """
+    Deduplicates identical in-flight calls: the first caller starts the
+    request and everyone asking for the same key meanwhile awaits that same
+    task. The task is shielded so one caller going away (client disconnect)
+    does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Retorna (resultado, compartilhado)"""
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task), shared
+
+
+class CoalescingClient:
+    """
+    Wraps ``AsyncBybitClient``: read methods listed in ``ttls`` go through a
+    single-flight layer and a TTL/LRU cache (a TTL of 0 only coalesces),
+    writes pass through and invalidate the reads they affect. Everything else
+    is forwarded untouched.
+    """
+
+    def __init__(self, client: Any, ttls: Dict[str, float], max_entries: int = 512):
+        self.client = client
+        self.ttls = ttls
+        self.cache = TTLCache(max_entries)
+        self.flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._generation = 0
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self.client, name)
+        if name in self.ttls:
+            async def cached(*args, **kwargs):
+                return await self._call(name, attr, args, kwargs)
+            return cached
+        if name in INVALIDATES:
+            async def write(*args, **kwargs):
+                try:
+                    return await attr(*args, **kwargs)
+                finally:
+                    self.invalidate(*INVALIDATES[name])
+            return write
+        return attr
+
+    async def _call(self, name: str, method: Callable, args: tuple, kwargs: dict) -> Any:
+        key = (name, args, tuple(sorted(kwargs.items())))
+        hit, value = self.cache.get(key)
+        if hit:
+            self.hits += 1
+            return value
+
+        generation = self._generation
+        value, shared = await self.flight.do(key, lambda: method(*args, **kwargs))
+        if shared:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            ttl = self.ttls[name]
+            # A write that landed while this read was in flight makes the result stale
+            if ttl > 0 and generation == self._generation:
+                self.cache.set(key, value, ttl)
+        return value
+
+    def invalidate(self, *methods: str) -> None:
+        """Remove do cache as leituras dos métodos indicados (todas se vazio)"""
+        self._generation += 1
+        self.cache.invalidate(lambda key: not methods or key[0] in methods)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            "entries": len(self.cache),
+            "inflight": len(self.flight)
+        }
+
+
+def parse_ttls(value: str) -> Dict[str, float]:
+    """"get_positions=1,get_wallet_balance=0.5" -> {"get_positions": 1.0, ...}"""
+    ttls = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, ttl = item.split("=", 1)
+            ttls[name.strip()] = float(ttl)
+    return ttls
+
+
+def _exchange_client() -> CoalescingClient:
+    ttls = parse_ttls(settings.read_cache_ttls)
+    if not settings.paper_trading:
+        return CoalescingClient(async_bybit_client, ttls, max_entries=settings.read_cache_max_entries)
+    # Paper account reads are in-memory and change on every price tick; nothing to cache
+    return CoalescingClient(paper_exchange, {}, max_entries=settings.read_cache_max_entries)
+
+
+exchange_client = _exchange_client()
@@ -0,0 +1,141 @@
+import importlib
+import logging
+import pkgutil
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from app.candles import COLUMNS, CandleSeries
+from app.models import Signal
+
+logger = logging.getLogger(__name__)
+
+# Batched evaluation encodes signals as +1 (BUY), -1 (SELL) and 0 (HOLD)
+SIGNAL_CODES = {1: Signal.BUY, -1: Signal.SELL, 0: Signal.HOLD}
+
+StrategyResult = Tuple[Signal, Dict[str, float]]
+
+
+def stack_candles(candles: List[CandleSeries], bars: int) -> Dict[str, np.ndarray]:
+    """Últimos ``bars`` candles de cada série como matrizes (séries x bars) por coluna"""
+    return {
+        column: np.stack([getattr(series, column)[-bars:] for series in candles])
+        for column in COLUMNS
+    }
+
+
+class Strategy(ABC):
+    """
+    Base interface of a trading strategy.
+
+    ``batch`` is the one method a strategy must implement: it receives the
+    candle columns of many symbols as (symbols x bars) matrices, oldest bar
+    first with the last column being the forming candle, and returns one
+    signal code per row plus named per-row values. ``evaluate`` (one symbol,
+    live) and ``analyze`` (one symbol, full recompute) default to a one-row
+    batch; strategies with incremental state override ``evaluate``.
+    """
+
+    name = ""
+    description = ""
+    # Names of the per-row values returned next to the signal
+    outputs: Tuple[str, ...] = ()
+
+    @property
+    @abstractmethod
+    def min_bars(self) -> int:
+        """Candles needed (forming one included) before a signal can be produced"""
+
+    @property
+    def params(self) -> Dict[str, Any]:
+        return {}
+
+    @abstractmethod
+    def batch(self, columns: Mapping[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Códigos de sinal (+1/-1/0) e valores nomeados por linha"""
+
+    def hold(self) -> StrategyResult:
+        """Resultado para quando ainda não há candles suficientes"""
+        return Signal.HOLD, {name: 0.0 for name in self.outputs}
+
+    def analyze(self, candles: CandleSeries) -> StrategyResult:
+        if len(candles) < self.min_bars:
+            return self.hold()
+        codes, values = self.batch(stack_candles([candles], len(candles)))
+        return SIGNAL_CODES[int(codes[0])], {name: float(v[0]) for name, v in values.items()}
+
+    def evaluate(self, symbol: str, interval: str, candles: CandleSeries) -> StrategyResult:
+        return self.analyze(candles)
+
+    def evaluate_many(self, candles: Mapping[str, CandleSeries]) -> Dict[str, StrategyResult]:
+        """
+        Evaluates the symbols with one ``batch`` call per series length, so
+        every row sees its full history and path-dependent indicators (EMA,
+        Wilder RSI) match ``analyze``; symbols without ``min_bars`` candles
+        get HOLD.
+        """
+        results = {symbol: self.hold() for symbol, series in candles.items() if len(series) < self.min_bars}
+        groups: Dict[int, List[str]] = {}
+        for symbol, series in candles.items():
+            if symbol not in results:
+                groups.setdefault(len(series), []).append(symbol)
+
+        for bars, symbols in groups.items():
+            codes, values = self.batch(stack_candles([candles[s] for s in symbols], bars))
+            codes = codes.tolist()
+            values = {name: v.tolist() for name, v in values.items()}
+            for i, symbol in enumerate(symbols):
+                results[symbol] = SIGNAL_CODES[codes[i]], {name: v[i] for name, v in values.items()}
+        return results
+
+    def reset(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """Descarta estado incremental; estratégias sem estado não fazem nada"""
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "description": self.description,
+            "params": self.params,
+            "min_bars": self.min_bars
+        }
+
+
+_registry: Dict[str, Strategy] = {}
+_loaded = False
+
+
+def register(strategy: Strategy) -> Strategy:
+    """Registers a strategy instance under its ``name``; returns it so modules can keep a reference"""
+    if not strategy.name:
+        raise ValueError(f"{type(strategy).__name__} has no name")
+    if strategy.name in _registry and _registry[strategy.name] is not strategy:
+        raise ValueError(f"Strategy {strategy.name!r} is already registered")
+    _registry[strategy.name] = strategy
+    return strategy
+
+
+def load_strategies() -> None:
+    """Imports every module of ``app.strategy`` once, so dropping a file in the package registers it"""
+    global _loaded
+    if _loaded:
+        return
+    import app.strategy as package
+    for module in pkgutil.iter_modules(package.__path__):
+        if module.name != "base":
+            importlib.import_module(f"{package.__name__}.{module.name}")
+    _loaded = True
+    logger.info("Strategies available: %s", ', '.join(sorted(_registry)))
+
+
+def get_strategy(name: str) -> Strategy:
+    load_strategies()
+    strategy = _registry.get(name.lower())
+    if strategy is None:
+        raise KeyError(f"Unknown strategy {name!r}, expected one of {sorted(_registry)}")
+    return strategy
+
+
+def list_strategies() -> List[Strategy]:
+    load_strategies()
+    return [_registry[name] for name in sorted(_registry)]
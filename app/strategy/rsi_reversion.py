@@ -0,0 +1,53 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from app.candles import CandleSeries
+from app.indicators import RSI, indicator_store, rsi
+from app.strategy.base import SIGNAL_CODES, Strategy, StrategyResult, register
+
+
+class RSIReversion(Strategy):
+    """BUY when the RSI leaves the oversold zone, SELL when it leaves the overbought zone"""
+
+    name = "rsi"
+    description = "Reversão à média pelo RSI (saída das zonas de sobrecompra/sobrevenda)"
+    outputs = ("rsi", "prev_rsi")
+
+    def __init__(self, period: int = 14, oversold: float = 30.0, overbought: float = 70.0):
+        self.period = period
+        self.oversold = oversold
+        self.overbought = overbought
+        self._indicator = RSI(period)
+
+    @property
+    def min_bars(self) -> int:
+        return self.period + 2
+
+    @property
+    def params(self) -> Dict[str, float]:
+        return {"period": self.period, "oversold": self.oversold, "overbought": self.overbought}
+
+    def _codes(self, prev: np.ndarray, current: np.ndarray) -> np.ndarray:
+        codes = np.zeros(len(current), dtype=np.int8)
+        codes[(prev < self.oversold) & (current >= self.oversold)] = 1
+        codes[(prev > self.overbought) & (current <= self.overbought)] = -1
+        return codes
+
+    def batch(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        # Only the tail matters, but Wilder smoothing needs the whole history to converge
+        values = rsi(columns["close"], self.period)
+        prev, current = values[:, -2], values[:, -1]
+        return self._codes(prev, current), {"rsi": current, "prev_rsi": prev}
+
+    def evaluate(self, symbol: str, interval: str, candles: CandleSeries) -> StrategyResult:
+        if len(candles) < self.min_bars:
+            return self.hold()
+        # Shared with any other strategy reading the same RSI over the same window
+        values = indicator_store.series(symbol, interval, self._indicator, candles)["rsi"]
+        prev, current = values[-2:]
+        code = int(self._codes(np.array([prev]), np.array([current]))[0])
+        return SIGNAL_CODES[code], {"rsi": float(current), "prev_rsi": float(prev)}
+
+
+rsi_strategy = register(RSIReversion())
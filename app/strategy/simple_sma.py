@@ -1,14 +1,103 @@
-import pandas as pd
+import threading
 import numpy as np
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
+from app.candles import CandleSeries
 from app.models import Signal, Kline
+from app.strategy.base import Strategy, StrategyResult, register
 
 
-class SimpleSMA:
+class SMAState:
+    """Rolling state of the closed candles of one (symbol, interval).
+
+    Closes live in a fixed-size ring buffer of ``slow_period`` slots and both
+    SMAs are kept as running sums, so pushing a new closed candle and reading
+    the crossover for the forming candle are O(1).
+    """
+
+    # Running sums drift with floating point error; re-add the buffer now and then.
+    RESYNC_EVERY = 1000
+
+    def __init__(self, fast_period: int, slow_period: int):
+        self.fast_period = fast_period
+        self.slow_period = slow_period
+        self._buf = [0.0] * slow_period
+        self._pos = 0
+        self._count = 0
+        self._fast_sum = 0.0
+        self._slow_sum = 0.0
+        self._pushes = 0
+        self.last_timestamp: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._count >= self.slow_period
+
+    def push(self, timestamp: int, close: float) -> None:
+        """Adds a closed candle to the window"""
+        n = self.slow_period
+        if self._count >= self.fast_period:
+            self._fast_sum -= self._buf[(self._pos - self.fast_period) % n]
+        if self._count >= n:
+            self._slow_sum -= self._buf[self._pos]
+        else:
+            self._count += 1
+        self._buf[self._pos] = close
+        self._pos = (self._pos + 1) % n
+        self._fast_sum += close
+        self._slow_sum += close
+        self.last_timestamp = timestamp
+
+        self._pushes += 1
+        if self._pushes % self.RESYNC_EVERY == 0:
+            self._resync()
+
+    def _resync(self) -> None:
+        n = self.slow_period
+        fast = min(self._count, self.fast_period)
+        self._fast_sum = sum(self._buf[(self._pos - i) % n] for i in range(1, fast + 1))
+        self._slow_sum = sum(self._buf[(self._pos - i) % n] for i in range(1, self._count + 1))
+
+    def evaluate(self, forming_close: float) -> Tuple[Signal, float, float]:
+        """Crossover between the closed window and the window ending at the forming candle"""
+        if not self.ready:
+            return Signal.HOLD, 0.0, 0.0
+
+        n = self.slow_period
+        prev_sma_fast = self._fast_sum / self.fast_period
+        prev_sma_slow = self._slow_sum / n
+
+        leaving_fast = self._buf[(self._pos - self.fast_period) % n]
+        leaving_slow = self._buf[self._pos]
+        sma_fast = (self._fast_sum - leaving_fast + forming_close) / self.fast_period
+        sma_slow = (self._slow_sum - leaving_slow + forming_close) / n
+
+        if prev_sma_fast <= prev_sma_slow and sma_fast > sma_slow:
+            return Signal.BUY, sma_fast, sma_slow
+        elif prev_sma_fast >= prev_sma_slow and sma_fast < sma_slow:
+            return Signal.SELL, sma_fast, sma_slow
+
+        return Signal.HOLD, sma_fast, sma_slow
+
+
+class SimpleSMA(Strategy):
+    name = "sma"
+    description = "Cruzamento de médias móveis simples (rápida x lenta)"
+    outputs = ("sma_fast", "sma_slow")
+
     def __init__(self, fast_period: int = 9, slow_period: int = 21):
         self.fast_period = fast_period
         self.slow_period = slow_period
+        self._states: Dict[Tuple[str, str], SMAState] = {}
+        self._lock = threading.Lock()
     
+    @property
+    def min_bars(self) -> int:
+        return self.slow_period + 1
+
+    @property
+    def params(self) -> Dict[str, int]:
+        return {"fast_period": self.fast_period, "slow_period": self.slow_period}
+
     def calculate_sma(self, prices: List[float], period: int) -> float:
         if len(prices) < period:
             return 0.0
@@ -35,16 +124,17 @@ class SimpleSMA:
         
         return Signal.HOLD, sma_fast, sma_slow
     
-    def analyze_with_pandas(self, klines: List[Kline]) -> Tuple[Signal, float, float]:
+    def analyze_with_pandas(self, klines: CandleSeries) -> Tuple[Signal, float, float]:
         if len(klines) < self.slow_period:
             return Signal.HOLD, 0.0, 0.0
-        
-        df = pd.DataFrame([
-            {
-                'timestamp': k.timestamp,
-                'close': k.close
-            } for k in klines
-        ])
+
+        # Only this reference path needs pandas; importing it lazily keeps it off startup
+        import pandas as pd
+
+        df = pd.DataFrame({
+            'timestamp': klines.timestamp,
+            'close': klines.close
+        })
         
         df[f'sma_{self.fast_period}'] = df['close'].rolling(window=self.fast_period).mean()
         df[f'sma_{self.slow_period}'] = df['close'].rolling(window=self.slow_period).mean()
@@ -69,5 +159,89 @@ class SimpleSMA:
         
         return Signal.HOLD, float(sma_fast), float(sma_slow)
 
+    def batch(self, columns: Dict[str, np.ndarray]) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Crossover on the last bar of every row; only the two trailing windows are averaged"""
+        closes = columns["close"]
+        fast, slow = self.fast_period, self.slow_period
+        sma_fast = closes[:, -fast:].mean(axis=1)
+        sma_slow = closes[:, -slow:].mean(axis=1)
+        prev_fast = closes[:, -fast - 1:-1].mean(axis=1)
+        prev_slow = closes[:, -slow - 1:-1].mean(axis=1)
+
+        codes = np.zeros(len(closes), dtype=np.int8)
+        codes[(prev_fast <= prev_slow) & (sma_fast > sma_slow)] = 1
+        codes[(prev_fast >= prev_slow) & (sma_fast < sma_slow)] = -1
+        return codes, {"sma_fast": sma_fast, "sma_slow": sma_slow}
+
+    def evaluate(self, symbol: str, interval: str, candles: CandleSeries) -> StrategyResult:
+        signal, sma_fast, sma_slow = self.update(symbol, interval, candles)
+        return signal, {"sma_fast": sma_fast, "sma_slow": sma_slow}
+
+    def analyze(self, candles: CandleSeries) -> StrategyResult:
+        signal, sma_fast, sma_slow = self.analyze_with_pandas(candles)
+        return signal, {"sma_fast": sma_fast, "sma_slow": sma_slow}
+
+    def update(self, symbol: str, interval: str, klines: CandleSeries) -> Tuple[Signal, float, float]:
+        """
+        Incremental signal for (symbol, interval).
+
+        ``klines`` is ordered oldest first and its last element is the forming
+        candle, as returned by Bybit. Only closed candles newer than the stored
+        state are pushed; the state is rebuilt from ``klines`` on cold start or
+        when a newer window no longer overlaps it (gap, restart). A window
+        older than the state (a late caller) is answered from a throwaway
+        state and never replaces the stored one.
+        """
+        if len(klines) < 2:
+            return Signal.HOLD, 0.0, 0.0
+
+        closed_ts = klines.timestamp[:-1]
+        closed_close = klines.close[:-1]
+        key = (symbol, interval)
+
+        with self._lock:
+            state = self._states.get(key)
+            start = self._resume_index(state, closed_ts)
+            if start is None:
+                stale = state is not None and state.last_timestamp is not None and closed_ts[-1] <= state.last_timestamp
+                state = SMAState(self.fast_period, self.slow_period)
+                if not stale:
+                    self._states[key] = state
+                start = max(0, len(closed_ts) - self.slow_period)
+
+            for ts, close in zip(closed_ts[start:].tolist(), closed_close[start:].tolist()):
+                state.push(ts, close)
+
+            return state.evaluate(float(klines.close[-1]))
+
+    @staticmethod
+    def _resume_index(state: Optional[SMAState], closed_ts: np.ndarray) -> Optional[int]:
+        """Index of the first closed candle after the state, or None if it must be rebuilt"""
+        if state is None or state.last_timestamp is None:
+            return None
+        i = int(np.searchsorted(closed_ts, state.last_timestamp, side="left"))
+        if i < len(closed_ts) and closed_ts[i] == state.last_timestamp:
+            return i + 1
+        return None
+
+    def verify(self, symbol: str, interval: str, klines: CandleSeries, tolerance: float = 1e-6) -> bool:
+        """Checks the incremental state against a full pandas recompute"""
+        signal, sma_fast, sma_slow = self.update(symbol, interval, klines)
+        ref_signal, ref_fast, ref_slow = self.analyze_with_pandas(klines)
+        return (
+            signal == ref_signal
+            and abs(sma_fast - ref_fast) <= tolerance * max(1.0, abs(ref_fast))
+            and abs(sma_slow - ref_slow) <= tolerance * max(1.0, abs(ref_slow))
+        )
+
+    def reset(self, symbol: Optional[str] = None, interval: Optional[str] = None) -> None:
+        """Drops incremental state, optionally only for one symbol/interval"""
+        with self._lock:
+            if symbol is None:
+                self._states.clear()
+                return
+            for key in [k for k in self._states if k[0] == symbol and (interval is None or k[1] == interval)]:
+                del self._states[key]
+
 
-sma_strategy = SimpleSMA()
+sma_strategy = register(SimpleSMA())
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+Source = Callable[[], Awaitable[Any]]
+
+
+class StreamHub:
+    """
+    Fan-out of dashboard updates to every connected client.
+
+    One producer task per channel polls its source while at least one client
+    is connected and publishes only when the value changed, so upstream load
+    does not depend on the number of viewers. Dict channels (prices) publish
+    just the keys that changed. New clients first receive the last value of
+    every channel.
+    """
+
+    def __init__(self, sources: Dict[str, Source], intervals: Dict[str, float], queue_size: int = 100):
+        self.sources = sources
+        self.intervals = intervals
+        self.queue_size = queue_size
+        self._clients: Set[asyncio.Queue] = set()
+        self._last: Dict[str, Any] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def clients(self) -> int:
+        return len(self._clients)
+
+    def publish(self, channel: str, data: Any) -> None:
+        """Envia um evento a todos os clientes conectados"""
+        event = (channel, data)
+        for queue in self._clients:
+            if queue.full():
+                # A slow client loses its oldest update instead of stalling everyone
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def _publish_changes(self, channel: str, value: Any) -> None:
+        previous = self._last.get(channel)
+        if value == previous:
+            return
+        self._last[channel] = value
+        if isinstance(value, dict) and isinstance(previous, dict) and channel == "prices":
+            value = {k: v for k, v in value.items() if previous.get(k) != v}
+        self.publish(channel, value)
+
+    async def _produce(self, channel: str) -> None:
+        source = self.sources[channel]
+        interval = self.intervals.get(channel, 10.0)
+        while True:
+            try:
+                self._publish_changes(channel, await source())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Stream source %s failed: %s", channel, e)
+            await asyncio.sleep(interval)
+
+    def _start(self) -> None:
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._produce(channel)) for channel in self.sources]
+
+    def _cancel(self) -> List[asyncio.Task]:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    async def stop(self) -> None:
+        await asyncio.gather(*self._cancel(), return_exceptions=True)
+
+    async def subscribe(
+        self,
+        keepalive: float = 15.0,
+        is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> AsyncIterator[str]:
+        """Gera eventos no formato Server-Sent Events para um cliente"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        for channel, value in self._last.items():
+            queue.put_nowait((channel, value))
+        self._clients.add(queue)
+        self._start()
+        try:
+            while True:
+                try:
+                    channel, data = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {channel}\ndata: {json.dumps(data, default=str)}\n\n"
+        finally:
+            self._clients.discard(queue)
+            if not self._clients:
+                # No viewers left: stop polling upstream until someone reconnects
+                self._cancel()
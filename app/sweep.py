@@ -0,0 +1,243 @@
+"""
+Busca de parâmetros fast/slow da SMA em paralelo.
+
+Candle arrays are copied once into ``multiprocessing.shared_memory`` blocks;
+pool workers attach to them in their initializer, so tasks only carry
+(symbol, interval, fast, slow). Results are appended to the output CSV as
+they arrive and that file doubles as the checkpoint: rerunning the same
+command skips every combination already present. The backtest options and
+data window are kept next to it (``<out>.options.json``); resuming with
+different ones is refused, since their rows would be ranked together.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+from multiprocessing import Pool, shared_memory
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.backtest import load_csv, run_backtest
+from app.candles import CandleSeries
+
+Key = Tuple[str, str]
+# (shm name, rows) per dataset; timestamps and closes share one block
+Spec = Dict[Key, Tuple[str, int]]
+
+RESULT_FIELDS = ["symbol", "interval", "fast", "slow"]
+
+_data: Dict[Key, Tuple[np.ndarray, np.ndarray]] = {}
+_blocks: List[shared_memory.SharedMemory] = []
+_options: Dict = {}
+
+
+def _share(datasets: Dict[Key, CandleSeries]) -> Tuple[Spec, List[shared_memory.SharedMemory]]:
+    spec: Spec = {}
+    blocks = []
+    for key, candles in datasets.items():
+        n = len(candles)
+        shm = shared_memory.SharedMemory(create=True, size=max(16 * n, 1))
+        ts = np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0)
+        closes = np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * n)
+        ts[:] = candles.timestamp
+        closes[:] = candles.close
+        spec[key] = (shm.name, n)
+        blocks.append(shm)
+    return spec, blocks
+
+
+def _init_worker(spec: Spec, options: Dict) -> None:
+    _options.update(options)
+    for key, (name, n) in spec.items():
+        shm = shared_memory.SharedMemory(name=name)
+        _blocks.append(shm)
+        _data[key] = (
+            np.ndarray((n,), dtype=np.int64, buffer=shm.buf, offset=0),
+            np.ndarray((n,), dtype=np.float64, buffer=shm.buf, offset=8 * n),
+        )
+
+
+def _evaluate(task: Tuple[str, str, int, int]) -> Dict:
+    symbol, interval, fast, slow = task
+    ts, closes = _data[(symbol, interval)]
+    summary = run_backtest(ts, closes, fast_period=fast, slow_period=slow, **_options).summary()
+    return {"symbol": symbol, "interval": interval, "fast": fast, "slow": slow, **summary}
+
+
+def _parse_range(value: str) -> List[int]:
+    """"5:50:5" -> range(5, 51, 5); "9,12,21" -> lista"""
+    if ":" in value:
+        parts = [int(p) for p in value.split(":")]
+        start, stop = parts[0], parts[1]
+        step = parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(p) for p in value.split(",") if p]
+
+
+def build_tasks(
+    keys: Iterable[Key],
+    fast_values: List[int],
+    slow_values: List[int],
+    samples: Optional[int] = None,
+    seed: int = 0
+) -> List[Tuple[str, str, int, int]]:
+    tasks = [
+        (symbol, interval, fast, slow)
+        for symbol, interval in keys
+        for fast in fast_values
+        for slow in slow_values
+        if fast < slow
+    ]
+    if samples is not None and samples < len(tasks):
+        tasks = random.Random(seed).sample(tasks, samples)
+    return tasks
+
+
+def _completed(path: str) -> set:
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as f:
+        return {(r["symbol"], r["interval"], int(r["fast"]), int(r["slow"])) for r in csv.DictReader(f)}
+
+
+def _options_path(output: str) -> str:
+    return output + ".options.json"
+
+
+def _check_options(output: str, recorded: Dict) -> None:
+    """Grava as opções de um checkpoint novo; recusa retomar um feito com outras"""
+    path = _options_path(output)
+    has_rows = os.path.exists(output) and os.path.getsize(output) > 0
+    if has_rows:
+        previous = None
+        if os.path.exists(path):
+            with open(path) as f:
+                previous = json.load(f)
+        if previous != recorded:
+            raise ValueError(
+                f"{output} was computed with options {previous}, not {recorded}; "
+                "use another --out or delete it to start fresh"
+            )
+        return
+    with open(path, "w") as f:
+        json.dump(recorded, f, sort_keys=True)
+
+
+def run_sweep(
+    datasets: Dict[Key, CandleSeries],
+    tasks: List[Tuple[str, str, int, int]],
+    output: str,
+    workers: Optional[int] = None,
+    window: Optional[Dict] = None,
+    **options
+) -> int:
+    """
+    Avalia as combinações pendentes e grava cada resultado em `output`. Retorna quantas rodaram.
+    ``window`` describes where the candles came from (start/end, source) and
+    is part of the checkpoint identity together with the backtest options.
+    """
+    # Round-trip through JSON so tuples and the like compare like the recorded file
+    _check_options(output, json.loads(json.dumps({"options": options, "window": window or {}}, sort_keys=True)))
+    done = _completed(output)
+    pending = [t for t in tasks if t not in done]
+    if not pending:
+        return 0
+
+    spec, blocks = _share(datasets)
+    try:
+        new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+        with open(output, "a", newline="") as f:
+            writer = None
+            workers = workers or os.cpu_count() or 1
+            chunksize = max(1, len(pending) // (workers * 16))
+            with Pool(workers, initializer=_init_worker, initargs=(spec, options)) as pool:
+                for row in pool.imap_unordered(_evaluate, pending, chunksize=chunksize):
+                    if writer is None:
+                        writer = csv.DictWriter(f, fieldnames=list(row))
+                        if new_file:
+                            writer.writeheader()
+                    writer.writerow(row)
+                    f.flush()
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+    return len(pending)
+
+
+def rank(path: str, metric: str, ascending: bool = False) -> List[Dict]:
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    rows.sort(key=lambda r: float(r[metric]), reverse=not ascending)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Busca de parâmetros da estratégia SMA")
+    parser.add_argument("--symbols", help="Padrão: settings.symbols_list")
+    parser.add_argument("--intervals", default="60")
+    parser.add_argument("--fast", default="3:50:1", help="start:stop[:step] ou lista separada por vírgulas")
+    parser.add_argument("--slow", default="10:200:2")
+    parser.add_argument("--random", type=int, help="Amostra N combinações em vez da grade completa")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="CSV de candles (um único symbol/interval)")
+    parser.add_argument("--archive-dir")
+    parser.add_argument("--start", type=int)
+    parser.add_argument("--end", type=int)
+    parser.add_argument("--fee", type=float, default=0.00055)
+    parser.add_argument("--slippage", type=float, default=0.0)
+    parser.add_argument("--long-only", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="sweep.csv", help="Resultados e checkpoint")
+    parser.add_argument("--metric", default="total_return")
+    parser.add_argument("--ascending", action="store_true", help="Ordena do menor para o maior (ex: max_drawdown)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    from app.config import settings
+    symbols = [s.strip().upper() for s in args.symbols.split(",")] if args.symbols else settings.symbols_list
+    intervals = [i.strip() for i in args.intervals.split(",") if i.strip()]
+
+    datasets: Dict[Key, CandleSeries] = {}
+    if args.csv:
+        datasets[(symbols[0], intervals[0])] = load_csv(args.csv)
+    else:
+        from app.candle_archive import CandleArchive
+        archive = CandleArchive(args.archive_dir or settings.candle_archive_dir or "data/candles")
+        for symbol in symbols:
+            for interval in intervals:
+                candles = archive.range(symbol, interval, args.start, args.end)
+                if len(candles):
+                    datasets[(symbol, interval)] = candles
+
+    tasks = build_tasks(datasets, _parse_range(args.fast), _parse_range(args.slow), args.random, args.seed)
+    try:
+        ran = run_sweep(
+            datasets,
+            tasks,
+            args.out,
+            workers=args.workers,
+            window={"start": args.start, "end": args.end, "csv": args.csv},
+            fee_rate=args.fee,
+            slippage=args.slippage,
+            allow_short=not args.long_only
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"{ran} combinações avaliadas, {len(tasks) - ran} já estavam em {args.out}")
+
+    if os.path.exists(args.out):
+        ranked = rank(args.out, args.metric, args.ascending)
+        ranked_path = os.path.splitext(args.out)[0] + f".ranked_{args.metric}.csv"
+        with open(ranked_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(ranked[0]) if ranked else RESULT_FIELDS)
+            writer.writeheader()
+            writer.writerows(ranked)
+        for row in ranked[:args.top]:
+            print(f"{row['symbol']} {row['interval']} fast={row['fast']} slow={row['slow']} {args.metric}={row[args.metric]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from app.async_bybit_client import AsyncBybitClient, async_bybit_client
+from app.config import settings
+
+
+class TickerCache:
+    """
+    Snapshot of every ticker of a category, refreshed with a single
+    ``get_tickers`` call (no symbol) at most once per ``ttl`` seconds.
+    Concurrent lookups during a refresh wait for the same request.
+    """
+
+    def __init__(self, client: AsyncBybitClient, ttl: float = 2.0, category: str = "linear"):
+        self.client = client
+        self.ttl = ttl
+        self.category = category
+        self._tickers: Dict[str, Dict[str, Any]] = {}
+        self._timestamp = 0
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+        self.upstream_requests = 0
+        self.lookups = 0
+
+    def _fresh(self) -> bool:
+        return bool(self._tickers) and time.monotonic() - self._fetched_at < self.ttl
+
+    async def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Tickers indexados por symbol"""
+        self.lookups += 1
+        if self._fresh():
+            return self._tickers
+        async with self._lock:
+            if self._fresh():
+                return self._tickers
+            self.upstream_requests += 1
+            response = await self.client.get_tickers(category=self.category)
+            if response.get("retCode") != 0:
+                raise Exception(f"Bybit API Error: {response.get('retMsg', 'Unknown error')}")
+            self._tickers = {t["symbol"]: t for t in response.get("result", {}).get("list", [])}
+            # Items of the full list carry no time of their own; use the response time
+            self._timestamp = int(response.get("time", 0))
+            self._fetched_at = time.monotonic()
+            return self._tickers
+
+    async def get_prices(self, symbols: List[str]) -> List[Dict[str, Any]]:
+        """Preços dos símbolos pedidos; desconhecidos são omitidos"""
+        tickers = await self.snapshot()
+        return [
+            {
+                "symbol": symbol,
+                "price": float(tickers[symbol].get("lastPrice", 0)),
+                "timestamp": self._timestamp
+            }
+            for symbol in symbols
+            if symbol in tickers
+        ]
+
+    async def get_price(self, symbol: str) -> Optional[Dict[str, Any]]:
+        prices = await self.get_prices([symbol])
+        return prices[0] if prices else None
+
+
+ticker_cache = TickerCache(async_bybit_client, ttl=settings.ticker_cache_ttl)
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Step = Callable[[], Awaitable[Any]]
+
+
+class WarmUp:
+    """
+    Pre-fills caches in the background after startup: every step runs
+    concurrently, bounded by ``timeout``, and the service reports ready once
+    all of them finished. Failed steps are recorded but do not block
+    readiness; the caches simply fill on first use.
+    """
+
+    def __init__(self, steps: Dict[str, Step], timeout: float = 15.0):
+        self.steps = steps
+        self.timeout = timeout
+        self.ready = False
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self.started_at = time.perf_counter()
+            self._task = asyncio.create_task(self._run())
+
+    def skip(self) -> None:
+        self.ready = True
+
+    async def stop(self) -> None:
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _step(self, name: str, step: Step) -> None:
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(step(), self.timeout)
+            self.results[name] = {"ok": True}
+        except Exception as e:
+            self.results[name] = {"ok": False, "error": str(e) or type(e).__name__}
+        self.results[name]["seconds"] = round(time.perf_counter() - started, 3)
+
+    async def _run(self) -> None:
+        await asyncio.gather(*(self._step(name, step) for name, step in self.steps.items()))
+        self.duration = time.perf_counter() - self.started_at
+        self.ready = True
+        failed = [name for name, result in self.results.items() if not result["ok"]]
+        if failed:
+            logger.warning("Warm-up finished in %.2fs, failed: %s", self.duration, ", ".join(failed))
+        else:
+            logger.info("Warm-up finished in %.2fs (%d steps)", self.duration, len(self.steps))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "seconds": round(self.duration, 3) if self.duration is not None else None,
+            "steps": self.results
+        }
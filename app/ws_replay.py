@@ -0,0 +1,117 @@
+"""
+Servidor WebSocket local que reproduz mensagens gravadas da Bybit.
+
+Stands in for the public stream when testing ``MarketDataService``: every
+client gets subscribe acks and pongs like the real endpoint, then the
+recorded messages for the topics it subscribed to, paced by their ``ts``.
+Record a session with ``WS_RECORD_PATH`` and point ``WS_PUBLIC_URL`` at
+``ws://127.0.0.1:<port>``.
+
+    python -m app.ws_replay recording.jsonl --port 8765 --speed 10 --drop-after 500
+"""
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    """Mensagens com `topic` de um arquivo JSON lines"""
+    messages = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            message = json.loads(line)
+            if message.get("topic"):
+                messages.append(message)
+    return messages
+
+
+class ReplayServer:
+    def __init__(
+        self,
+        messages: List[Dict[str, Any]],
+        speed: float = 1.0,
+        loop: bool = False,
+        drop_after: Optional[int] = None
+    ):
+        self.messages = messages
+        self.speed = speed
+        self.loop = loop
+        self.drop_after = drop_after
+        self.connections = 0
+
+    async def handler(self, ws) -> None:
+        self.connections += 1
+        topics: Set[str] = set()
+        subscribed = asyncio.Event()
+        replay = asyncio.create_task(self._replay(ws, topics, subscribed))
+        try:
+            async for raw in ws:
+                request = json.loads(raw)
+                op = request.get("op")
+                if op == "ping":
+                    await ws.send(json.dumps({"success": True, "ret_msg": "pong", "op": "ping"}))
+                elif op == "subscribe":
+                    topics.update(request.get("args", []))
+                    await ws.send(json.dumps({"success": True, "ret_msg": "", "op": "subscribe"}))
+                    subscribed.set()
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            replay.cancel()
+
+    async def _replay(self, ws, topics: Set[str], subscribed: asyncio.Event) -> None:
+        await subscribed.wait()
+        # Give batched subscribe requests a moment to arrive before filtering
+        await asyncio.sleep(0.05)
+        sent = 0
+        while True:
+            prev_ts = None
+            for message in self.messages:
+                if message["topic"] not in topics:
+                    continue
+                ts = message.get("ts")
+                if prev_ts is not None and ts is not None and self.speed > 0:
+                    await asyncio.sleep(max(0, ts - prev_ts) / 1000 / self.speed)
+                prev_ts = ts
+                await ws.send(json.dumps(message))
+                sent += 1
+                if self.drop_after is not None and sent >= self.drop_after:
+                    # Simulates an exchange side disconnect to exercise reconnect/resubscribe
+                    await ws.close()
+                    return
+            if not self.loop:
+                return
+
+
+async def serve(server: ReplayServer, host: str, port: int) -> None:
+    async with websockets.serve(server.handler, host, port):
+        logger.info("Replaying %s messages on ws://%s:%s", len(server.messages), host, port)
+        await asyncio.Future()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Replay de mensagens WebSocket gravadas")
+    parser.add_argument("recording")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--speed", type=float, default=1.0, help="Multiplicador de velocidade; 0 = sem pausas")
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--drop-after", type=int, help="Fecha a conexão após N mensagens")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    server = ReplayServer(load_recording(args.recording), args.speed, args.loop, args.drop_after)
+    asyncio.run(serve(server, args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
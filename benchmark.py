@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Benchmarks reproduzíveis dos caminhos quentes do bot.
+
+Covers the SMA strategy code paths across window sizes, parsing of kline
+responses, cold start (import, startup and time until /ready), end-to-end latency/throughput of the API against the local mock
+exchange (app.mock_exchange) and cache memory per symbol. Results are
+written as JSON; pass a previous run as ``--baseline`` to fail (exit 1)
+when any metric regressed by more than ``--threshold``.
+
+    python benchmark.py --output bench-main.json
+    python benchmark.py --baseline bench-main.json --threshold 0.25
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+# The app reads its settings on import: point it at the mock and lift the
+# client side limits, so the numbers measure the bot and not the throttle
+os.environ.setdefault("BYBIT_API_KEY", "bench")
+os.environ.setdefault("BYBIT_API_SECRET", "bench")
+os.environ.setdefault("RATE_LIMIT_MARKET", "100000")
+os.environ.setdefault("RATE_LIMIT_ORDER", "100000")
+os.environ.setdefault("RATE_LIMIT_ACCOUNT", "100000")
+os.environ.setdefault("SCHEDULER_AUTOSTART", "false")
+os.environ.setdefault("MARKET_DATA_WS", "false")
+os.environ.setdefault("PAPER_TRADING", "false")
+
+Metrics = Dict[str, Dict[str, Any]]
+
+
+def _metric(value: float, unit: str, better: str = "lower") -> Dict[str, Any]:
+    return {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def _time_us(func: Callable[[], Any], repeat: int, number: Optional[int] = None) -> float:
+    """Mediana em µs por chamada"""
+    timer = timeit.Timer(func)
+    if number is None:
+        number, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat=repeat, number=number)) / number * 1e6
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _synthetic_closes(n: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 30000 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+
+def bench_strategy(sizes: List[int], repeat: int) -> Metrics:
+    from app.candles import CandleSeries
+    from app.models import Kline
+    from app.strategy.simple_sma import SimpleSMA
+
+    metrics: Metrics = {}
+    strategy = SimpleSMA()
+    for n in sizes:
+        closes = _synthetic_closes(n)
+        timestamps = np.arange(n, dtype=np.int64) * 60_000
+        series = CandleSeries(timestamps, closes, closes * 1.001, closes * 0.999, closes, np.ones(n))
+        klines = [Kline(timestamp=int(t), open=c, high=c, low=c, close=c, volume=1.0) for t, c in zip(timestamps, closes)]
+        metrics[f"sma.generate_signal.{n}"] = _metric(_time_us(lambda: strategy.generate_signal(klines), repeat), "us")
+        metrics[f"sma.analyze_with_pandas.{n}"] = _metric(_time_us(lambda: strategy.analyze_with_pandas(series), repeat), "us")
+        metrics[f"sma.analyze.{n}"] = _metric(_time_us(lambda: strategy.analyze(series), repeat), "us")
+
+        # Incremental path: one new closed candle per call, as a live feed would deliver
+        strategy.reset()
+        warm = series[: n // 2]
+        strategy.evaluate("BENCH", "1", warm)
+        windows = [series[: n // 2 + i] for i in range(1, n // 2)]
+        cursor = iter(windows)
+        number = len(windows) - 1
+        metrics[f"sma.evaluate_incremental.{n}"] = _metric(
+            timeit.timeit(lambda: strategy.evaluate("BENCH", "1", next(cursor)), number=number) / number * 1e6, "us"
+        )
+        strategy.reset()
+    return metrics
+
+
+def bench_parsing(sizes: List[int], repeat: int) -> Metrics:
+    from app.candles import CandleSeries
+    from app.mock_exchange import SyntheticMarket
+
+    metrics: Metrics = {}
+    market = SyntheticMarket(["BTCUSDT"])
+    for n in sizes:
+        raw = market.klines("BTCUSDT", "1", None, None, n)
+        # What get_klines hands over: the decoded JSON body
+        body = json.dumps({"retCode": 0, "result": {"list": raw}})
+        metrics[f"klines.from_bybit.{n}"] = _metric(_time_us(lambda: CandleSeries.from_bybit(raw), repeat), "us")
+        metrics[f"klines.decode_and_parse.{n}"] = _metric(
+            _time_us(lambda: CandleSeries.from_bybit(json.loads(body)["result"]["list"]), repeat), "us"
+        )
+    return metrics
+
+
+def bench_orderbook(updates: int, repeat: int) -> Metrics:
+    from app.mock_exchange import SyntheticMarket
+    from app.order_book import OrderBookStore
+
+    metrics: Metrics = {}
+    for depth in (50, 200):
+        messages = list(SyntheticMarket(["BTCUSDT"]).orderbook_messages("BTCUSDT", updates, depth=depth))
+        topic = messages[0]["topic"]
+
+        def apply_all() -> OrderBookStore:
+            store = OrderBookStore()
+            for message in messages:
+                store.handle(topic, message)
+            return store
+
+        per_message = _time_us(apply_all, repeat, number=1) / len(messages)
+        metrics[f"orderbook.apply.{depth}"] = _metric(per_message, "us")
+        metrics[f"orderbook.updates_per_second.{depth}"] = _metric(1e6 / per_message, "msg/s", better="higher")
+        book = apply_all().get("BTCUSDT")
+        metrics[f"orderbook.estimate.{depth}"] = _metric(_time_us(lambda: book.estimate("Buy", 5.0), repeat), "us")
+    return metrics
+
+
+def _serve(app: Any, port: int) -> Any:
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} did not start")
+        time.sleep(0.05)
+    return server
+
+
+async def _load(url: str, method: str, requests: int, concurrency: int) -> Dict[str, float]:
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    queue = iter(range(requests))
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        for _ in queue:
+            started = time.perf_counter()
+            response = await client.request(method, url)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        # Warm the caches and the connection pool before measuring
+        for _ in range(3):
+            await client.request(method, url)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "p50": latencies[len(latencies) // 2] * 1000,
+        "p95": latencies[int(len(latencies) * 0.95)] * 1000,
+        "p99": latencies[int(len(latencies) * 0.99)] * 1000,
+        "rps": len(latencies) / elapsed,
+        "errors": errors
+    }
+
+
+def bench_api(mock_port: int, requests: int, concurrency: int, latency_ms: float) -> Metrics:
+    from app.main import app
+    from app.mock_exchange import MockConfig, create_app
+
+    # One log line per request would dominate the timings
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    mock = _serve(create_app(MockConfig(latency_ms=latency_ms)), mock_port)
+
+    app_port = _free_port()
+    server = _serve(app, app_port)
+    base = f"http://127.0.0.1:{app_port}"
+    endpoints = {
+        "signal": ("POST", f"{base}/api/signal/BTCUSDT?interval=60&limit=100"),
+        "klines": ("GET", f"{base}/api/klines/BTCUSDT?interval=60&limit=100"),
+        "prices": ("GET", f"{base}/api/prices"),
+    }
+    metrics: Metrics = {}
+    try:
+        for name, (method, url) in endpoints.items():
+            result = asyncio.run(_load(url, method, requests, concurrency))
+            metrics[f"api.{name}.p50"] = _metric(result["p50"], "ms")
+            metrics[f"api.{name}.p95"] = _metric(result["p95"], "ms")
+            metrics[f"api.{name}.p99"] = _metric(result["p99"], "ms")
+            metrics[f"api.{name}.throughput"] = _metric(result["rps"], "req/s", better="higher")
+            metrics[f"api.{name}.errors"] = _metric(result["errors"], "count")
+    finally:
+        server.should_exit = True
+        mock.should_exit = True
+    return metrics
+
+
+def bench_memory(symbols: int, candles: int) -> Metrics:
+    from app.async_bybit_client import AsyncBybitClient
+    from app.kline_cache import KlineCache
+    from app.mock_exchange import MockConfig, create_app
+    from app.strategy.simple_sma import SimpleSMA
+
+    port = _free_port()
+    mock = _serve(create_app(MockConfig()), port)
+    names = [f"SYM{i}USDT" for i in range(symbols)]
+
+    async def fill() -> int:
+        client = AsyncBybitClient(base_url=f"http://127.0.0.1:{port}", api_key="bench", api_secret="bench")
+        cache = KlineCache(client, max_candles=candles)
+        strategy = SimpleSMA()
+        # Connection pool and lazy imports are allocated once, not per symbol
+        await cache.get_klines("linear", "WARMUPUSDT", "1", candles)
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        for name in names:
+            klines = await cache.get_klines("linear", name, "1", candles)
+            strategy.evaluate(name, "1", klines)
+        after, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        await client.aclose()
+        return after - before
+
+    try:
+        used = asyncio.run(fill())
+    finally:
+        mock.should_exit = True
+    return {f"memory.per_symbol.{candles}": _metric(used / symbols / 1024, "KiB")}
+
+
+_STARTUP_PROBE = """
+import json, time
+started = time.perf_counter()
+import app.main
+from fastapi.testclient import TestClient
+imported = time.perf_counter()
+with TestClient(app.main.app) as client:
+    serving = time.perf_counter()
+    while client.get("/ready").status_code != 200:
+        time.sleep(0.005)
+    ready = time.perf_counter()
+print(json.dumps({"import": imported - started, "startup": serving - imported, "ready": ready - started}))
+"""
+
+
+def bench_startup(runs: int) -> Metrics:
+    """Cold start em processos novos: import, lifespan e tempo até /ready responder 200"""
+    from app.mock_exchange import MockConfig, create_app
+
+    port = _free_port()
+    mock = _serve(create_app(MockConfig()), port)
+    env = {**os.environ, "MOCK_EXCHANGE_URL": f"http://127.0.0.1:{port}"}
+    samples: Dict[str, List[float]] = {"import": [], "startup": [], "ready": []}
+    try:
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, "-c", _STARTUP_PROBE], env=env, capture_output=True, text=True, check=True
+            ).stdout
+            for key, value in json.loads(output.strip().splitlines()[-1]).items():
+                samples[key].append(value)
+    finally:
+        mock.should_exit = True
+    return {f"startup.{key}": _metric(statistics.median(values) * 1000, "ms") for key, values in samples.items()}
+
+
+def compare(current: Metrics, baseline: Metrics, threshold: float) -> List[str]:
+    """Métricas que pioraram mais que `threshold` (fração) em relação ao baseline"""
+    regressions = []
+    for name, metric in current.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if not old["value"]:
+            # Counters such as errors: anything above a clean baseline is a regression
+            if metric["better"] == "lower" and metric["value"] > 0:
+                regressions.append(f"{name}: 0 -> {metric['value']} {metric['unit']}")
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        if metric["better"] == "higher":
+            change = -change
+        if change > threshold:
+            regressions.append(f"{name}: {old['value']} -> {metric['value']} {metric['unit']} ({change:+.0%})")
+    return regressions
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do bot")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Piora relativa tolerada (0.2 = 20%%)")
+    parser.add_argument("--only", default="strategy,parsing,orderbook,startup,api,memory", help="Grupos a executar")
+    parser.add_argument("--sizes", default="100,1000,10000", help="Tamanhos de janela da estratégia")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--mock-latency", type=float, default=0.0, help="Latência do mock em ms")
+    parser.add_argument("--symbols", type=int, default=50, help="Símbolos no teste de memória")
+    parser.add_argument("--startup-runs", type=int, default=5, help="Processos medidos no cold start")
+    args = parser.parse_args(argv)
+
+    groups = {g.strip() for g in args.only.split(",") if g.strip()}
+    # The settings singleton is built on the first app import, so the mock URL must be set before it
+    mock_port = _free_port()
+    os.environ["MOCK_EXCHANGE_URL"] = f"http://127.0.0.1:{mock_port}"
+    sizes = [int(s) for s in args.sizes.split(",")]
+    metrics: Metrics = {}
+    if "strategy" in groups:
+        metrics.update(bench_strategy(sizes, args.repeat))
+    if "parsing" in groups:
+        metrics.update(bench_parsing([200, 1000], args.repeat))
+    if "orderbook" in groups:
+        metrics.update(bench_orderbook(20000, args.repeat))
+    if "startup" in groups:
+        metrics.update(bench_startup(args.startup_runs))
+    if "memory" in groups:
+        metrics.update(bench_memory(args.symbols, 1000))
+    if "api" in groups:
+        metrics.update(bench_api(mock_port, args.requests, args.concurrency, args.mock_latency))
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": int(time.time()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "metrics": metrics
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+        regressions = compare(metrics, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions above {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
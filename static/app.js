@@ -37,10 +37,68 @@ function setupNavigation() {
 
 function initializeApp() {
     checkHealth();
+    pollSchedulerStatus();
+    
+    if (window.EventSource) {
+        connectStream();
+    } else {
+        startPolling();
+    }
+}
+
+// Server push: one shared upstream subscription on the server, whatever the number of tabs
+let dashboardStream = null;
+let pollingInterval = null;
+let priceState = {};
+
+function describeSignal(data) {
+    if (data.strategy === 'sma') {
+        return `${data.interval} - Fast SMA: $${data.sma_fast}, Slow SMA: $${data.sma_slow}`;
+    }
+    if (data.strategy === 'rsi') {
+        return `${data.interval} - RSI: ${data.rsi}`;
+    }
+    return `${data.interval} - ${data.strategy}`;
+}
+
+function connectStream() {
+    dashboardStream = new EventSource('/api/stream');
+    
+    dashboardStream.addEventListener('balance', event => renderBalance(JSON.parse(event.data)));
+    dashboardStream.addEventListener('positions', event => renderPositions({ positions: JSON.parse(event.data) }));
+    dashboardStream.addEventListener('orders', event => renderOrders({ orders: JSON.parse(event.data) }));
+    dashboardStream.addEventListener('prices', event => {
+        // Price events only carry the symbols that changed
+        Object.assign(priceState, JSON.parse(event.data));
+        renderPrices(Object.entries(priceState).map(([symbol, price]) => ({ symbol, price })));
+    });
+    dashboardStream.addEventListener('signal', event => {
+        const data = JSON.parse(event.data);
+        const key = `${data.strategy}|${data.symbol}|${data.interval}|${data.timestamp}`;
+        if (seenSignals.has(key)) return;
+        seenSignals.add(key);
+        if (data.signal !== 'HOLD') {
+            addTradeLogEntry('SIGNAL', data.signal, data.symbol, data.current_price, describeSignal(data));
+            stats.totalTrades++;
+            updateStats();
+        }
+    });
+    
+    dashboardStream.onerror = () => {
+        // EventSource retries on its own; fall back to polling only if it gives up
+        if (dashboardStream.readyState === EventSource.CLOSED) {
+            console.error('Stream closed, falling back to polling');
+            startPolling();
+        }
+    };
+}
+
+function startPolling() {
+    if (pollingInterval) return;
     loadDashboardData();
     
     // Refresh data every 10 seconds
-    setInterval(() => {
+    pollingInterval = setInterval(() => {
         if (document.getElementById('dashboard').classList.contains('active')) {
             loadDashboardData();
         }
@@ -104,32 +162,7 @@ async function loadDashboardData() {
 async function loadBalance() {
     try {
         const response = await fetch('/api/balance');
-        const data = await response.json();
-        
-        const container = document.getElementById('balance-container');
-        
-        if (!data.balances || data.balances.length === 0) {
-            container.innerHTML = '<div class="empty-state">Nenhum saldo disponível</div>';
-            return;
-        }
-        
-        container.innerHTML = data.balances.map(balance => `
-            <div class="balance-item">
-                <h3>${balance.coin}</h3>
-                <div class="info-row">
-                    <span class="info-label">Saldo Total:</span>
-                    <span class="info-value">${balance.wallet_balance.toFixed(4)}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Disponível:</span>
-                    <span class="info-value">${balance.available_balance.toFixed(4)}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Equity:</span>
-                    <span class="info-value">${balance.equity.toFixed(4)}</span>
-                </div>
-            </div>
-        `).join('');
+        renderBalance(await response.json());
     } catch (error) {
         console.error('Error loading balance:', error);
         document.getElementById('balance-container').innerHTML = 
@@ -137,49 +170,37 @@ async function loadBalance() {
     }
 }
 
+function renderBalance(data) {
+    const container = document.getElementById('balance-container');
+    
+    if (!data.balances || data.balances.length === 0) {
+        container.innerHTML = '<div class="empty-state">Nenhum saldo disponível</div>';
+        return;
+    }
+    
+    container.innerHTML = data.balances.map(balance => `
+        <div class="balance-item">
+            <h3>${balance.coin}</h3>
+            <div class="info-row">
+                <span class="info-label">Saldo Total:</span>
+                <span class="info-value">${balance.wallet_balance.toFixed(4)}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Disponível:</span>
+                <span class="info-value">${balance.available_balance.toFixed(4)}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Equity:</span>
+                <span class="info-value">${balance.equity.toFixed(4)}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
 async function loadPositions() {
     try {
         const response = await fetch('/api/positions');
-        const data = await response.json();
-        
-        const container = document.getElementById('positions-container');
-        
-        if (!data.positions || data.positions.length === 0) {
-            container.innerHTML = '<div class="empty-state">Nenhuma posição aberta</div>';
-            return;
-        }
-        
-        container.innerHTML = data.positions.map(pos => `
-            <div class="position-item">
-                <h3>${pos.symbol}</h3>
-                <div class="info-row">
-                    <span class="info-label">Lado:</span>
-                    <span class="info-value">${pos.side}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Tamanho:</span>
-                    <span class="info-value">${pos.size}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Preço de Entrada:</span>
-                    <span class="info-value">$${pos.entry_price.toFixed(2)}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Preço Atual:</span>
-                    <span class="info-value">$${pos.mark_price.toFixed(2)}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">PnL:</span>
-                    <span class="info-value ${pos.unrealised_pnl >= 0 ? 'positive' : 'negative'}">
-                        $${pos.unrealised_pnl.toFixed(2)}
-                    </span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Alavancagem:</span>
-                    <span class="info-value">${pos.leverage}x</span>
-                </div>
-            </div>
-        `).join('');
+        renderPositions(await response.json());
     } catch (error) {
         console.error('Error loading positions:', error);
         document.getElementById('positions-container').innerHTML = 
@@ -187,23 +208,53 @@ async function loadPositions() {
     }
 }
 
+function renderPositions(data) {
+    const container = document.getElementById('positions-container');
+    
+    if (!data.positions || data.positions.length === 0) {
+        container.innerHTML = '<div class="empty-state">Nenhuma posição aberta</div>';
+        return;
+    }
+    
+    container.innerHTML = data.positions.map(pos => `
+        <div class="position-item">
+            <h3>${pos.symbol}</h3>
+            <div class="info-row">
+                <span class="info-label">Lado:</span>
+                <span class="info-value">${pos.side}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Tamanho:</span>
+                <span class="info-value">${pos.size}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Preço de Entrada:</span>
+                <span class="info-value">$${pos.entry_price.toFixed(2)}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Preço Atual:</span>
+                <span class="info-value">$${pos.mark_price.toFixed(2)}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">PnL:</span>
+                <span class="info-value ${pos.unrealised_pnl >= 0 ? 'positive' : 'negative'}">
+                    $${pos.unrealised_pnl.toFixed(2)}
+                </span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Alavancagem:</span>
+                <span class="info-value">${pos.leverage}x</span>
+            </div>
+        </div>
+    `).join('');
+}
+
 async function loadPrices() {
     try {
-        const symbols = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT'];
-        const prices = await Promise.all(
-            symbols.map(symbol => fetch(`/api/price/${symbol}`).then(r => r.json()))
-        );
-        
-        const container = document.getElementById('prices-container');
-        container.innerHTML = prices.map(price => `
-            <div class="price-item">
-                <h3>${price.symbol}</h3>
-                <div class="info-row">
-                    <span class="info-label">Preço:</span>
-                    <span class="info-value">$${price.price.toFixed(2)}</span>
-                </div>
-            </div>
-        `).join('');
+        // One request for every configured symbol
+        const response = await fetch('/api/prices');
+        const data = await response.json();
+        renderPrices(data.prices);
     } catch (error) {
         console.error('Error loading prices:', error);
         document.getElementById('prices-container').innerHTML = 
@@ -211,46 +262,23 @@ async function loadPrices() {
     }
 }
 
+function renderPrices(prices) {
+    const container = document.getElementById('prices-container');
+    container.innerHTML = prices.map(price => `
+        <div class="price-item">
+            <h3>${price.symbol}</h3>
+            <div class="info-row">
+                <span class="info-label">Preço:</span>
+                <span class="info-value">$${price.price.toFixed(2)}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
 async function loadOrders() {
     try {
         const response = await fetch('/api/orders');
-        const data = await response.json();
-        
-        const container = document.getElementById('orders-container');
-        
-        if (!data.orders || data.orders.length === 0) {
-            container.innerHTML = '<div class="empty-state">Nenhuma ordem aberta</div>';
-            return;
-        }
-        
-        container.innerHTML = data.orders.map(order => `
-            <div class="order-item">
-                <div class="info-row">
-                    <span class="info-label">Símbolo:</span>
-                    <span class="info-value">${order.symbol}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Lado:</span>
-                    <span class="info-value">${order.side}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Tipo:</span>
-                    <span class="info-value">${order.order_type}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Quantidade:</span>
-                    <span class="info-value">${order.qty}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Preço:</span>
-                    <span class="info-value">$${order.price.toFixed(2)}</span>
-                </div>
-                <div class="info-row">
-                    <span class="info-label">Status:</span>
-                    <span class="info-value">${order.status}</span>
-                </div>
-            </div>
-        `).join('');
+        renderOrders(await response.json());
     } catch (error) {
         console.error('Error loading orders:', error);
         document.getElementById('orders-container').innerHTML = 
@@ -258,6 +286,44 @@ async function loadOrders() {
     }
 }
 
+function renderOrders(data) {
+    const container = document.getElementById('orders-container');
+    
+    if (!data.orders || data.orders.length === 0) {
+        container.innerHTML = '<div class="empty-state">Nenhuma ordem aberta</div>';
+        return;
+    }
+    
+    container.innerHTML = data.orders.map(order => `
+        <div class="order-item">
+            <div class="info-row">
+                <span class="info-label">Símbolo:</span>
+                <span class="info-value">${order.symbol}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Lado:</span>
+                <span class="info-value">${order.side}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Tipo:</span>
+                <span class="info-value">${order.order_type}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Quantidade:</span>
+                <span class="info-value">${order.qty}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Preço:</span>
+                <span class="info-value">$${order.price.toFixed(2)}</span>
+            </div>
+            <div class="info-row">
+                <span class="info-label">Status:</span>
+                <span class="info-value">${order.status}</span>
+            </div>
+        </div>
+    `).join('');
+}
+
 // Manual Trading Functions
 async function generateSignal() {
     const symbol = document.getElementById('signal-symbol').value;
@@ -439,77 +505,81 @@ async function startAutoTrading() {
     if (autoTradingActive) return;
     
     const symbol = document.getElementById('auto-trade-symbol').value;
-    autoTradingActive = true;
     
-    // Update UI
-    document.getElementById('strategy-status').textContent = 'ACTIVE';
-    document.getElementById('strategy-status').classList.remove('inactive');
-    document.getElementById('strategy-status').classList.add('active');
-    document.getElementById('start-auto-trading-btn').disabled = true;
-    document.getElementById('stop-auto-trading-btn').disabled = false;
-    
-    addTradeLogEntry('SYSTEM', 'START', symbol, 0, 'Automated trading started');
+    try {
+        // The strategy runs server-side for every configured symbol, aligned to candle closes
+        const response = await fetch('/api/scheduler/start', { method: 'POST' });
+        if (!response.ok) {
+            const error = await response.json();
+            throw new Error(error.detail || 'Erro ao iniciar scheduler');
+        }
+        const status = await response.json();
+        setAutoTradingUI(true);
+        addTradeLogEntry('SYSTEM', 'START', symbol, 0,
+            `Automated trading started on server (${status.jobs.length} jobs)`);
+        await pollSchedulerStatus();
+    } catch (error) {
+        console.error('Error starting auto trading:', error);
+        addTradeLogEntry('ERROR', 'FAILED', symbol, 0, error.message);
+    }
+}
+
+async function stopAutoTrading() {
+    if (!autoTradingActive) return;
     
-    // Run strategy every 60 seconds
-    autoTradingInterval = setInterval(async () => {
-        await executeAutoTrade(symbol);
-    }, 60000);
+    const symbol = document.getElementById('auto-trade-symbol').value;
     
-    // Execute immediately
-    await executeAutoTrade(symbol);
+    try {
+        await fetch('/api/scheduler/stop', { method: 'POST' });
+        setAutoTradingUI(false);
+        addTradeLogEntry('SYSTEM', 'STOP', symbol, 0, 'Automated trading stopped');
+    } catch (error) {
+        console.error('Error stopping auto trading:', error);
+        addTradeLogEntry('ERROR', 'FAILED', symbol, 0, error.message);
+    }
 }
 
-function stopAutoTrading() {
-    if (!autoTradingActive) return;
+function setAutoTradingUI(active) {
+    autoTradingActive = active;
     
-    autoTradingActive = false;
+    const status = document.getElementById('strategy-status');
+    status.textContent = active ? 'ACTIVE' : 'INACTIVE';
+    status.classList.toggle('active', active);
+    status.classList.toggle('inactive', !active);
+    document.getElementById('start-auto-trading-btn').disabled = active;
+    document.getElementById('stop-auto-trading-btn').disabled = !active;
     
-    if (autoTradingInterval) {
+    if (active && !autoTradingInterval) {
+        // Only reads the server state; evaluation no longer depends on this tab
+        autoTradingInterval = setInterval(pollSchedulerStatus, 15000);
+    } else if (!active && autoTradingInterval) {
         clearInterval(autoTradingInterval);
         autoTradingInterval = null;
     }
-    
-    // Update UI
-    document.getElementById('strategy-status').textContent = 'INACTIVE';
-    document.getElementById('strategy-status').classList.remove('active');
-    document.getElementById('strategy-status').classList.add('inactive');
-    document.getElementById('start-auto-trading-btn').disabled = false;
-    document.getElementById('stop-auto-trading-btn').disabled = true;
-    
-    const symbol = document.getElementById('auto-trade-symbol').value;
-    addTradeLogEntry('SYSTEM', 'STOP', symbol, 0, 'Automated trading stopped');
 }
 
-async function executeAutoTrade(symbol) {
+let seenSignals = new Set();
+
+async function pollSchedulerStatus() {
     try {
-        const response = await fetch(`/api/signal/${symbol}`, {
-            method: 'POST'
-        });
-        const data = await response.json();
-        
-        addTradeLogEntry('SIGNAL', data.signal, symbol, data.current_price, 
-            `Fast SMA: $${data.sma_fast}, Slow SMA: $${data.sma_slow}`);
+        const response = await fetch('/api/scheduler/status');
+        const status = await response.json();
         
-        // In a real implementation, you would execute trades here based on the signal
-        // For now, this is just a placeholder that logs signals
+        if (status.running !== autoTradingActive) {
+            setAutoTradingUI(status.running);
+        }
         
-        if (data.signal === 'BUY' || data.signal === 'SELL') {
-            // Simulate trade execution (in production, you'd call the order API)
+        for (const data of status.signals) {
+            const key = `${data.strategy}|${data.symbol}|${data.interval}|${data.timestamp}`;
+            if (seenSignals.has(key)) continue;
+            seenSignals.add(key);
+            
+            addTradeLogEntry('SIGNAL', data.signal, data.symbol, data.current_price, describeSignal(data));
             stats.totalTrades++;
-            // Simulate random win/loss for demo
-            if (Math.random() > 0.5) {
-                stats.winningTrades++;
-                const profit = Math.random() * 50;
-                stats.totalPnL += profit;
-            } else {
-                const loss = Math.random() * 30;
-                stats.totalPnL -= loss;
-            }
-            updateStats();
         }
+        updateStats();
     } catch (error) {
-        console.error('Error executing auto trade:', error);
-        addTradeLogEntry('ERROR', 'FAILED', symbol, 0, error.message);
+        console.error('Error loading scheduler status:', error);
     }
 }
 
@@ -0,0 +1,42 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.async_bybit_client import AsyncBybitClient
+from app.mock_exchange import MockConfig, create_app
+from app.rate_limiter import RateLimitExceeded
+
+
+def _client(app) -> AsyncBybitClient:
+    client = AsyncBybitClient(base_url="http://mock", api_key="key", api_secret="secret")
+    client._http = httpx.AsyncClient(base_url="http://mock", transport=httpx.ASGITransport(app=app))
+    return client
+
+
+def test_ret_code_10006_raises_rate_limit_exceeded():
+    # One market request per second: the second one gets retCode 10006 in an HTTP 200
+    client = _client(create_app(MockConfig(rate_limits={"market": 1.0, "order": 10.0, "account": 10.0})))
+
+    async def run():
+        await client.get_server_time()
+        with pytest.raises(RateLimitExceeded):
+            await client.get_server_time()
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+@pytest.mark.parametrize("status", [403, 429])
+def test_ip_level_limit_raises_rate_limit_exceeded(status):
+    client = AsyncBybitClient(base_url="http://mock", api_key="key", api_secret="secret")
+    client._http = httpx.AsyncClient(
+        base_url="http://mock", transport=httpx.MockTransport(lambda request: httpx.Response(status, text="Forbidden"))
+    )
+
+    async def run():
+        with pytest.raises(RateLimitExceeded):
+            await client.get_server_time()
+        await client.aclose()
+
+    asyncio.run(run())
@@ -0,0 +1,37 @@
+import numpy as np
+
+from app.candle_archive import COLUMNS, CandleArchive
+from app.candles import CandleSeries
+
+
+def _candles(start: int, n: int) -> CandleSeries:
+    ts = (start + np.arange(n, dtype=np.int64)) * 60_000
+    base = ts / 60_000.0
+    return CandleSeries(ts, base + 0.1, base + 0.2, base + 0.3, base + 0.4, base + 0.5)
+
+
+def test_append_after_torn_append_keeps_columns_aligned(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    archive.append("BTCUSDT", "1", _candles(0, 10))
+
+    # A crash mid-append: only the first columns got the next rows
+    torn = _candles(10, 5)
+    for column, dtype in COLUMNS[:3]:
+        with open(archive._path("BTCUSDT", "1", column, dtype), "ab") as f:
+            f.write(np.ascontiguousarray(getattr(torn, column), dtype=dtype).tobytes())
+    assert len(archive.series("BTCUSDT", "1")) == 10
+
+    assert archive.append("BTCUSDT", "1", _candles(10, 5)) == 5
+    series = archive.series("BTCUSDT", "1")
+    expected = _candles(0, 15)
+    assert len(series) == 15
+    for column, _ in COLUMNS:
+        assert np.array_equal(getattr(series, column), getattr(expected, column)), column
+    assert archive.compact("BTCUSDT", "1")["torn"] == 0
+
+
+def test_append_skips_rows_already_archived(tmp_path):
+    archive = CandleArchive(str(tmp_path))
+    assert archive.append("BTCUSDT", "1", _candles(0, 10)) == 10
+    assert archive.append("BTCUSDT", "1", _candles(5, 10)) == 5
+    assert np.array_equal(archive.series("BTCUSDT", "1").timestamp, _candles(0, 15).timestamp)
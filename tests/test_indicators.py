@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+
+from app.candles import CandleSeries
+from app.indicators import INDICATORS, IndicatorStore, make_indicator
+
+CONFIGS = [
+    ("sma", {"period": 20}),
+    ("ema", {"period": 21}),
+    ("rsi", {"period": 14}),
+    ("macd", {"fast": 12, "slow": 26, "signal": 9}),
+    ("atr", {"period": 14}),
+    ("bollinger", {"period": 20, "width": 2.0}),
+]
+
+
+def _series(n: int, seed: int = 1, start: int = 0) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    closes = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    opens = np.r_[closes[0], closes[:-1]]
+    highs = np.maximum(opens, closes) * (1 + rng.uniform(0, 0.005, n))
+    lows = np.minimum(opens, closes) * (1 - rng.uniform(0, 0.005, n))
+    timestamps = start + np.arange(n, dtype=np.int64) * 60_000
+    return CandleSeries(timestamps, opens, highs, lows, closes, rng.uniform(1, 10, n))
+
+
+def _stepped(indicator, candles: CandleSeries):
+    rows = [indicator.update(h, l, c) for h, l, c in zip(candles.high.tolist(), candles.low.tolist(), candles.close.tolist())]
+    return {name: np.array([row[name] for row in rows]) for name in indicator.outputs}
+
+
+def test_every_indicator_is_covered():
+    assert {name for name, _ in CONFIGS} == set(INDICATORS)
+
+
+@pytest.mark.parametrize("name,params", CONFIGS)
+def test_update_matches_batch(name, params):
+    candles = _series(2500)
+    batch = make_indicator(name, **params).batch(candles)
+    stepped = _stepped(make_indicator(name, **params), candles)
+    for output in make_indicator(name, **params).outputs:
+        expected, actual = batch[output], stepped[output]
+        assert np.array_equal(np.isnan(expected), np.isnan(actual)), output
+        assert np.allclose(expected, actual, rtol=1e-9, atol=1e-9, equal_nan=True), output
+
+
+@pytest.mark.parametrize("name,params", CONFIGS)
+def test_short_series_stays_nan_alike(name, params):
+    candles = _series(5)
+    batch = make_indicator(name, **params).batch(candles)
+    stepped = _stepped(make_indicator(name, **params), candles)
+    for output in batch:
+        assert np.array_equal(np.isnan(batch[output]), np.isnan(stepped[output])), output
+
+
+@pytest.mark.parametrize("name,params", CONFIGS)
+def test_spawn_starts_from_scratch(name, params):
+    candles = _series(300)
+    used = make_indicator(name, **params)
+    _stepped(used, candles[:100])
+    fresh = used.spawn()
+    assert fresh.key == used.key and fresh is not used
+    stepped = _stepped(fresh, candles)
+    batch = used.batch(candles)
+    for output in used.outputs:
+        assert np.allclose(batch[output], stepped[output], equal_nan=True), output
+
+
+@pytest.mark.parametrize("name,params", CONFIGS)
+def test_store_latest_advances_incrementally(name, params):
+    candles = _series(400)
+    store = IndicatorStore()
+    indicator = make_indicator(name, **params)
+    for end in (150, 151, 200, 400):
+        latest = store.latest("BTCUSDT", "1", indicator, candles[:end])
+        batch = indicator.batch(candles[:end])
+        for output in indicator.outputs:
+            assert latest[output] == pytest.approx(float(batch[output][-1]), rel=1e-9, nan_ok=True), output
+    # The store keeps its own spawned state; the indicator passed in is never stepped
+    assert store.stats()["states"] == 1
+
+
+def test_store_latest_rebuilds_after_a_gap():
+    candles = _series(300)
+    store = IndicatorStore()
+    indicator = make_indicator("ema", period=21)
+    store.latest("BTCUSDT", "1", indicator, candles[:100])
+    # A window that no longer contains the last candle seen starts over
+    restarted = _series(200, seed=2, start=10 ** 9)
+    latest = store.latest("BTCUSDT", "1", indicator, restarted)
+    assert latest["ema"] == pytest.approx(float(indicator.batch(restarted)["ema"][-1]))
+
+
+def test_store_series_reuses_same_window():
+    candles = _series(300)
+    store = IndicatorStore()
+    indicator = make_indicator("macd")
+    first = store.series("BTCUSDT", "1", indicator, candles)
+    again = store.series("BTCUSDT", "1", make_indicator("macd"), candles)
+    assert again is first
+    assert store.stats()["computed"] == 1 and store.stats()["reused"] == 1
+
+    # Same timestamps but the forming candle's close moved
+    moved = candles.copy()
+    moved.close[-1] *= 1.01
+    store.series("BTCUSDT", "1", indicator, moved)
+    assert store.stats()["computed"] == 2
+
+    store.reset("BTCUSDT")
+    assert store.stats()["series"] == 0
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from app.candles import CandleSeries
+from app.strategy.base import get_strategy, list_strategies
+
+
+def _series(n: int, seed: int) -> CandleSeries:
+    rng = np.random.default_rng(seed)
+    closes = 30000 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    timestamps = np.arange(n, dtype=np.int64) * 60_000
+    return CandleSeries(timestamps, closes, closes * 1.001, closes * 0.999, closes, np.ones(n))
+
+
+@pytest.mark.parametrize("name", [s.name for s in list_strategies()])
+def test_evaluate_many_matches_analyze_for_mixed_lengths(name):
+    strategy = get_strategy(name)
+    candles = {
+        "LONG": _series(200, 1),
+        "SHORT": _series(max(strategy.min_bars, 16), 2),
+        "MID": _series(120, 3),
+        "MID2": _series(120, 4),
+        "TOO_SHORT": _series(strategy.min_bars - 1, 5),
+    }
+    batched = strategy.evaluate_many(candles)
+    assert set(batched) == set(candles)
+    for symbol, series in candles.items():
+        signal, values = strategy.analyze(series)
+        assert batched[symbol][0] == signal
+        for key, value in values.items():
+            assert batched[symbol][1][key] == pytest.approx(value, rel=1e-9, abs=1e-9)
+
+
+def test_rsi_batch_does_not_depend_on_neighbours():
+    strategy = get_strategy("rsi")
+    long = _series(200, 1)
+    alone = strategy.evaluate_many({"LONG": long})["LONG"][1]["rsi"]
+    together = strategy.evaluate_many({"LONG": long, "SHORT": _series(16, 2)})["LONG"][1]["rsi"]
+    assert together == pytest.approx(alone)
+
+
+def test_incomplete_strategy_fails_on_instantiation():
+    from app.strategy.base import Strategy
+
+    class NoBatch(Strategy):
+        name = "no_batch"
+
+        @property
+        def min_bars(self) -> int:
+            return 1
+
+    with pytest.raises(TypeError):
+        NoBatch()
+
+
+def test_sma_stale_window_does_not_replace_newer_state():
+    from app.strategy.simple_sma import SimpleSMA
+
+    strategy = SimpleSMA()
+    series = _series(200, 7)
+    newer, stale = series[100:], series[:80]
+    strategy.update("BTCUSDT", "1", newer)
+    last = strategy._states[("BTCUSDT", "1")].last_timestamp
+
+    signal, sma_fast, sma_slow = strategy.update("BTCUSDT", "1", stale)
+    assert strategy._states[("BTCUSDT", "1")].last_timestamp == last
+    ref_signal, ref_fast, ref_slow = strategy.analyze_with_pandas(stale)
+    assert signal == ref_signal
+    assert (sma_fast, sma_slow) == pytest.approx((ref_fast, ref_slow))
+    assert strategy.verify("BTCUSDT", "1", newer)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from app.candles import CandleSeries
+from app.sweep import build_tasks, run_sweep
+
+
+def _datasets():
+    n = 300
+    closes = 100 + np.cumsum(np.random.default_rng(1).normal(0, 1, n))
+    ts = np.arange(n, dtype=np.int64) * 3_600_000
+    return {("BTCUSDT", "60"): CandleSeries(ts, closes, closes, closes, closes, np.ones(n))}
+
+
+def test_resume_skips_done_and_refuses_other_options(tmp_path):
+    out = str(tmp_path / "sweep.csv")
+    datasets = _datasets()
+    tasks = build_tasks(datasets, [3, 5], [10, 20])
+    assert run_sweep(datasets, tasks, out, workers=1, fee_rate=0.00055) == 4
+    assert run_sweep(datasets, tasks, out, workers=1, fee_rate=0.00055) == 0
+
+    with pytest.raises(ValueError):
+        run_sweep(datasets, tasks, out, workers=1, fee_rate=0.001)
+    with pytest.raises(ValueError):
+        run_sweep(datasets, tasks, out, workers=1, window={"start": 1}, fee_rate=0.00055)